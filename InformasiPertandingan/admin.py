@@ -1,5 +1,15 @@
 from django.contrib import admin
-from .models import Informasi, Country  
+from .models import Informasi, Country, HeadToHead, TeamStats
 
 admin.site.register(Informasi)
-admin.site.register(Country)
\ No newline at end of file
+admin.site.register(Country)
+
+@admin.register(TeamStats)
+class TeamStatsAdmin(admin.ModelAdmin):
+    list_display = ('team', 'played', 'wins', 'draws', 'losses', 'goals_for', 'goals_against', 'form')
+    list_select_related = ('team',)
+
+@admin.register(HeadToHead)
+class HeadToHeadAdmin(admin.ModelAdmin):
+    list_display = ('team_a', 'team_b', 'played', 'team_a_wins', 'draws', 'team_b_wins')
+    list_select_related = ('team_a', 'team_b')
@@ -0,0 +1,96 @@
+"""
+Cache Country per proses: name -> Country, id -> Country, dan body JSON json-country
+yang sudah diserialisasi.
+
+Snapshot di-load ulang kalau versinya berubah. Versi disimpan di cache Django
+(COUNTRY_CACHE_VERSION_KEY) dan diganti setiap ada tulis ke Country (signal di
+models.py, plus invalidate() manual setelah bulk_create/update). Dengan cache
+bersama (Redis/Memcached) semua worker langsung melihat versi baru; dengan LocMem
+bawaan, COUNTRY_CACHE_TTL membatasi berapa lama worker lain bisa tertinggal.
+"""
+import json
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import Http404
+
+VERSION_KEY = 'InformasiPertandingan:country_cache_version'
+
+
+class _Snapshot:
+    __slots__ = ('version', 'loaded_at', 'by_name', 'by_id', 'json_bytes', 'count', 'last_modified')
+
+    def __init__(self, version, countries):
+        self.version = version
+        self.loaded_at = time.monotonic()
+        self.by_name = {c.name: c for c in countries}
+        self.by_id = {c.pk: c for c in countries}
+        data = [{'id': str(c.id), 'name': c.name, 'flag': c.flag} for c in countries]
+        self.json_bytes = json.dumps(data, cls=DjangoJSONEncoder).encode('utf-8')
+        self.count = len(countries)
+        self.last_modified = max((c.updated_at for c in countries), default=None)
+
+
+_lock = threading.Lock()
+_snapshot = None
+
+
+def _current_version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        # key belum ada (atau ter-evict): buat versi baru, proses lain akan memakai yang sama
+        cache.add(VERSION_KEY, uuid.uuid4().hex, None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def invalidate():
+    """Tandai snapshot semua proses sebagai basi; dipanggil setelah tulis ke Country."""
+    global _snapshot
+    cache.set(VERSION_KEY, uuid.uuid4().hex, None)
+    with _lock:
+        _snapshot = None
+
+
+def snapshot():
+    global _snapshot
+    version = _current_version()
+    ttl = getattr(settings, 'COUNTRY_CACHE_TTL', 60)
+    current = _snapshot
+    if current and current.version == version and time.monotonic() - current.loaded_at < ttl:
+        return current
+    with _lock:
+        current = _snapshot
+        if current is None or current.version != version or time.monotonic() - current.loaded_at >= ttl:
+            from InformasiPertandingan.models import Country
+            current = _snapshot = _Snapshot(version, list(Country.objects.order_by('name')))
+        return current
+
+
+def get_by_name(name):
+    return snapshot().by_name.get(name)
+
+
+def get_by_id(pk):
+    return snapshot().by_id.get(pk)
+
+
+def get_by_name_or_404(name):
+    country = get_by_name(name)
+    if country is None:
+        raise Http404('No Country matches the given query.')
+    return country
+
+
+def version_info():
+    """
+    Versi untuk conditional_feed, dibaca dari snapshot tanpa query tambahan. Isinya sama
+    dengan table_version(Country) (jumlah baris, max(updated_at)), jadi ETag tidak ikut
+    berubah hanya karena worker lain punya token versi cache yang berbeda.
+    """
+    current = snapshot()
+    return {'count': current.count, 'last_modified': current.last_modified}
@@ -1,6 +1,9 @@
+import argparse
+import datetime
 import os
 import django
 import random
+import uuid
 from pathlib import Path
 import sys
 
@@ -18,7 +21,9 @@ except Exception as e:
 
 # import model
 try:
-    from InformasiPertandingan.models import Country, Informasi
+    from InformasiPertandingan.models import Country, Informasi, rebuild_match_stats
+    from InformasiPertandingan import country_cache
+    from main.bulk_import import BulkImporter, RowError, read_csv
 except ImportError:
     print("ERROR: Gagal impor model 'Country' atau 'Informasi'.")
     exit()
@@ -29,82 +34,120 @@ MATCHES_CSV_FILE = APP_DIR / 'data' / 'matches.csv' #InformasiPertandingan/data/
 DUMMY_COUNTRY_NAME = "Tim Tidak Diketahui" # tim yang country nya tidak ada di daftar country.csv
 DUMMY_COUNTRY_FLAG = "/static/image/no-flag.png" # flag untuk unknown tim (bendera yang tidak diketahui)
 
+class CountryImporter(BulkImporter):
+    """Upsert negara dari country.csv berdasarkan nama."""
+    model = Country
+    unique_fields = ['id']
+    update_fields = ['flag', 'updated_at']
+
+    def prefetch(self):
+        self.ids_by_name = country_ids_by_name()
+
+    def build(self, row):
+        nama, flag = row.get('nama') or row.get('name'), row.get('flag')
+        if not nama or not flag:
+            raise RowError("baris tidak valid")
+        return Country(id=self.ids_by_name.setdefault(nama, uuid.uuid4()), name=nama, flag=flag)
+
+    def key(self, obj):
+        return obj.name
+
+    def finish(self):
+        # bulk_create tidak mengirim post_save
+        country_cache.invalidate()
+
+
+class MatchImporter(BulkImporter):
+    """
+    Upsert pertandingan berdasarkan (date, home_team, away_team). Tim yang belum ada
+    dibuat sebagai negara dengan DUMMY_COUNTRY_FLAG sebelum batch pertandingannya
+    ditulis. views tidak ikut di-update supaya hitungan yang sudah berjalan tidak hilang.
+    """
+    model = Informasi
+    unique_fields = ['id']
+    update_fields = ['title', 'city', 'country', 'score_home_team', 'score_away_team', 'updated_at']
+
+    def prefetch(self):
+        self.country_ids = country_ids_by_name()
+        self.new_countries = []
+        self.match_ids = {
+            (date, home, away): pk
+            for pk, date, home, away in Informasi.objects.values_list('pk', 'date', 'home_team_id', 'away_team_id')
+        }
+
+    def team_id(self, name):
+        if name not in self.country_ids:
+            country = Country(name=name, flag=DUMMY_COUNTRY_FLAG)
+            self.new_countries.append(country)
+            self.country_ids[name] = country.pk
+        return self.country_ids[name]
+
+    def build(self, row):
+        home_team, away_team = row['home_team'], row['away_team']
+        if not home_team or not away_team:
+            raise RowError("tim kosong")
+        date = datetime.date.fromisoformat(row['date'])
+        home_id, away_id = self.team_id(home_team), self.team_id(away_team)
+        key = (date, home_id, away_id)
+        return Informasi(
+            id=self.match_ids.setdefault(key, uuid.uuid4()),
+            date=date,
+            home_team_id=home_id,
+            away_team_id=away_id,
+            title=row['tournament'],
+            city=row['city'],
+            country=row['country'],
+            score_home_team=int(row['home_score']),
+            score_away_team=int(row['away_score']),
+            views=random.randint(0, 50),
+        )
+
+    def key(self, obj):
+        return (obj.date, obj.home_team_id, obj.away_team_id)
+
+    def write(self, objs):
+        if self.new_countries:
+            Country.objects.bulk_create(self.new_countries, batch_size=self.batch_size)
+            self.new_countries = []
+        super().write(objs)
+
+    def finish(self):
+        # bulk_create melewati Informasi.save() dan signal Country, jadi cache dan statistik diperbarui di akhir
+        country_cache.invalidate()
+        rebuild_match_stats()
+
+
+def country_ids_by_name():
+    ids = {}
+    for pk, name in Country.objects.order_by('pk').values_list('pk', 'name'):
+        ids.setdefault(name, pk)
+    return ids
+
+
 # impor country.csv
-def import_countries():
+def import_countries(path=COUNTRY_CSV_FILE, batch_size=None):
     Country.objects.get_or_create(
         name=DUMMY_COUNTRY_NAME,
         defaults={'flag': DUMMY_COUNTRY_FLAG}
     )
-
-    # baca file dan impor negara
     try:
-        # buat setiap country jika belum ada
-        with open(COUNTRY_CSV_FILE, mode='r', encoding='utf-8') as f:
-            next(f)  # skip header
-            for line in f:
-                line = line.strip()
-                if not line:  # skip baris kosong
-                    continue
-                kata = line.split(',')
-
-                if len(kata) != 2:
-                    continue # skip baris tidak valid
-                nama, flag = kata
-                Country.objects.get_or_create(name=nama, defaults={'flag': flag})
+        return CountryImporter(batch_size=batch_size).run(read_csv(path))
     except FileNotFoundError:
-        print(f"ERROR: File '{COUNTRY_CSV_FILE}' tidak ditemukan. Pastikan path sudah benar.")
-        exit()
-    except Exception as e:
-        print(f"ERROR saat impor negara: {e}")
+        print(f"ERROR: File '{path}' tidak ditemukan. Pastikan path sudah benar.")
         exit()
 
-def import_matches():
-    # membaca file matches.csv
+def import_matches(path=MATCHES_CSV_FILE, batch_size=None):
     try:
-        with open(MATCHES_CSV_FILE, mode='r', encoding='utf-8') as f:
-            lines = f.readlines()
-            header = lines[0].strip().split(',')
-            # membaca dari baris kedua (baris pertama header)
-            for _, line in enumerate(lines[1:], start=2):
-                kata = line.strip().split(',')
-                # baris tidak lengkap / invalid
-                if len(kata) < 9:
-                    continue
-                date_str, home_team, away_team, home_score, away_score, title, city, country, _ = kata
-                
-                # mencari country untuk home team, kalau tidak ada buat baru
-                home_team_obj,_ = Country.objects.get_or_create(
-                    name=home_team,
-                    defaults={'flag': DUMMY_COUNTRY_FLAG}
-                )
-
-                # mencari country untuk away team
-                away_team_obj,_ = Country.objects.get_or_create(
-                    name=away_team,
-                    defaults={'flag': DUMMY_COUNTRY_FLAG}
-                )
-
-                # membuat object Informasi bila belum ada sebelumnya
-                Informasi.objects.get_or_create(
-                    date=date_str,
-                    home_team=home_team_obj,
-                    away_team=away_team_obj,
-                    defaults={
-                        'title': title,
-                        'city': city,
-                        'country': country,
-                        'score_home_team': int(home_score),
-                        'score_away_team': int(away_score),
-                        'views': random.randint(0, 50)
-                    }
-                )
+        return MatchImporter(batch_size=batch_size).run(read_csv(path))
     except FileNotFoundError:
-        print(f"ERROR: File '{MATCHES_CSV_FILE}' tidak ditemukan. Pastikan path sudah benar.")
-        exit()
-    except Exception as e:
-        print(f"ERROR saat impor pertandingan: {e}")
+        print(f"ERROR: File '{path}' tidak ditemukan. Pastikan path sudah benar.")
         exit()
 
 if __name__ == "__main__":
-    import_countries()
-    import_matches()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Import negara dan pertandingan dari CSV.")
+    parser.add_argument('--countries', default=COUNTRY_CSV_FILE)
+    parser.add_argument('--matches', default=MATCHES_CSV_FILE)
+    parser.add_argument('--batch-size', type=int, default=None)
+    args = parser.parse_args()
+    import_countries(args.countries, batch_size=args.batch_size)
+    import_matches(args.matches, batch_size=args.batch_size)
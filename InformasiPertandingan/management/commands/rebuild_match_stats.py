@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from InformasiPertandingan.models import HeadToHead, TeamStats, rebuild_match_stats
+
+
+class Command(BaseCommand):
+    help = "Hitung ulang rekap tim (W/D/L, gol, streak, form) dan head-to-head dari tabel Informasi."
+
+    def handle(self, *args, **options):
+        rebuild_match_stats()
+        self.stdout.write(self.style.SUCCESS(
+            f"Statistik match dibangun ulang: {TeamStats.objects.count()} tim, "
+            f"{HeadToHead.objects.count()} pasangan head-to-head."
+        ))
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-17 19:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('InformasiPertandingan', '0003_alter_informasi_country'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='country',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='informasi',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
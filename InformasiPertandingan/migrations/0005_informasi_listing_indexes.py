@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-17 19:32
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('InformasiPertandingan', '0004_country_updated_at_informasi_updated_at'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='informasi',
+            index=models.Index(fields=['date', 'id'], name='InformasiPe_date_2ca39e_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='informasi',
+            index=models.Index(fields=['home_team', 'date'], name='InformasiPe_home_te_11c917_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='informasi',
+            index=models.Index(fields=['away_team', 'date'], name='InformasiPe_away_te_25122a_idx'),
+        ),
+    ]
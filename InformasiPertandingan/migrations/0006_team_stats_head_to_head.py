@@ -0,0 +1,116 @@
+# Generated by Django 5.2.18 on 2026-10-17 19:34
+
+from collections import defaultdict
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+FORM_LENGTH = 5
+
+
+def _result(goals_for, goals_against):
+    if goals_for > goals_against:
+        return 'W'
+    if goals_for < goals_against:
+        return 'L'
+    return 'D'
+
+
+def rebuild_stats(apps):
+    # salinan rebuild_match_stats() dengan model historis, supaya migrasi tetap jalan
+    # setelah model-modelnya berubah
+    Informasi = apps.get_model('InformasiPertandingan', 'Informasi')
+    TeamStats = apps.get_model('InformasiPertandingan', 'TeamStats')
+    HeadToHead = apps.get_model('InformasiPertandingan', 'HeadToHead')
+    teams = defaultdict(lambda: defaultdict(int))
+    results = defaultdict(list)
+    pairs = defaultdict(lambda: defaultdict(int))
+    matches = Informasi.objects.order_by('-date', '-id').values_list(
+        'home_team_id', 'away_team_id', 'score_home_team', 'score_away_team')
+    for home, away, score_home, score_away in matches.iterator(chunk_size=2000):
+        for team_id, goals_for, goals_against in ((home, score_home, score_away), (away, score_away, score_home)):
+            result = _result(goals_for, goals_against)
+            team = teams[team_id]
+            team['played'] += 1
+            team[{'W': 'wins', 'D': 'draws', 'L': 'losses'}[result]] += 1
+            team['goals_for'] += goals_for
+            team['goals_against'] += goals_against
+            results[team_id].append(result)
+        if home == away:
+            continue
+        # pasangan kanonis team_a < team_b (urutan string id), sama dengan HeadToHead.pair()
+        if str(home) <= str(away):
+            team_a, team_b, goals_a, goals_b = home, away, score_home, score_away
+        else:
+            team_a, team_b, goals_a, goals_b = away, home, score_away, score_home
+        pair = pairs[(team_a, team_b)]
+        pair['played'] += 1
+        pair[{'W': 'team_a_wins', 'D': 'draws', 'L': 'team_b_wins'}[_result(goals_a, goals_b)]] += 1
+        pair['team_a_goals'] += goals_a
+        pair['team_b_goals'] += goals_b
+
+    stats = []
+    for team_id, team in teams.items():
+        history = results[team_id]  # terbaru dulu
+        streak_length = 0
+        while streak_length < len(history) and history[streak_length] == history[0]:
+            streak_length += 1
+        stats.append(TeamStats(
+            team_id=team_id, **team, form=''.join(history[:FORM_LENGTH]),
+            streak_type=history[0] if history else '', streak_length=streak_length,
+        ))
+    TeamStats.objects.all().delete()
+    TeamStats.objects.bulk_create(stats, batch_size=1000)
+    HeadToHead.objects.all().delete()
+    HeadToHead.objects.bulk_create(
+        [HeadToHead(team_a_id=team_a, team_b_id=team_b, **pair) for (team_a, team_b), pair in pairs.items()],
+        batch_size=1000,
+    )
+
+
+def build_stats(apps, schema_editor):
+    rebuild_stats(apps)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('InformasiPertandingan', '0005_informasi_listing_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TeamStats',
+            fields=[
+                ('team', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='InformasiPertandingan.country')),
+                ('played', models.PositiveIntegerField(default=0)),
+                ('wins', models.PositiveIntegerField(default=0)),
+                ('draws', models.PositiveIntegerField(default=0)),
+                ('losses', models.PositiveIntegerField(default=0)),
+                ('goals_for', models.PositiveIntegerField(default=0)),
+                ('goals_against', models.PositiveIntegerField(default=0)),
+                ('streak_type', models.CharField(blank=True, max_length=1)),
+                ('streak_length', models.PositiveIntegerField(default=0)),
+                ('form', models.CharField(blank=True, max_length=5)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='HeadToHead',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('played', models.PositiveIntegerField(default=0)),
+                ('team_a_wins', models.PositiveIntegerField(default=0)),
+                ('team_b_wins', models.PositiveIntegerField(default=0)),
+                ('draws', models.PositiveIntegerField(default=0)),
+                ('team_a_goals', models.PositiveIntegerField(default=0)),
+                ('team_b_goals', models.PositiveIntegerField(default=0)),
+                ('team_a', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='InformasiPertandingan.country')),
+                ('team_b', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='InformasiPertandingan.country')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('team_a', 'team_b'), name='unique_head_to_head_pair')],
+            },
+        ),
+        migrations.RunPython(build_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-17 19:37
+
+from django.db import migrations, models
+
+
+# dipisah dari 0007 supaya ALTER TABLE tidak berjalan di transaksi yang sama dengan
+# update/delete data (Postgres menolak ALTER saat masih ada pending trigger event FK)
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('InformasiPertandingan', '0007_merge_duplicate_countries'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='country',
+            name='name',
+            field=models.CharField(max_length=100, unique=True),
+        ),
+    ]
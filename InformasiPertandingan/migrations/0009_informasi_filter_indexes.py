@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-17 20:28
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('InformasiPertandingan', '0008_country_name_unique'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='informasi',
+            index=models.Index(django.db.models.functions.text.Upper('city'), models.F('date'), models.F('id'), name='informasi_city_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='informasi',
+            index=models.Index(django.db.models.functions.text.Upper('country'), models.F('date'), models.F('id'), name='informasi_country_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='informasi',
+            index=models.Index(fields=['views', 'id'], name='InformasiPe_views_853c8a_idx'),
+        ),
+    ]
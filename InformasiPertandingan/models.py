@@ -1,11 +1,19 @@
 import uuid
+from collections import defaultdict
 from django.contrib.auth.models import User
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import Upper
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from main import view_counter
+from InformasiPertandingan import country_cache
 
 class Country(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False) 
-    name = models.CharField(max_length=100) 
+    name = models.CharField(max_length=100, unique=True)
     flag = models.URLField()
+    updated_at = models.DateTimeField(auto_now=True)
     
     def __str__(self): 
         return self.name
@@ -22,14 +30,313 @@ class Informasi(models.Model):
     score_home_team = models.PositiveIntegerField(default=0) 
     score_away_team = models.PositiveIntegerField(default=0) 
     views = models.PositiveIntegerField(default=0) 
+    updated_at = models.DateTimeField(auto_now=True)
     
     def __str__(self): 
         return self.title 
     
+    @property
+    def total_views(self):
+        return self.views + view_counter.pending(Informasi, self.pk, 'views')
+
     @property
     def is_info_hot(self):
-        return self.views > 20
+        return self.total_views > 20
 
     def increment_views(self):
-        self.views += 1
-        self.save()     
\ No newline at end of file
+        self.views += view_counter.increment(Informasi, self.pk, 'views')
+
+    def stats_snapshot(self):
+        """(home, away, skor home, skor away, tanggal) yang dipakai TeamStats dan HeadToHead."""
+        return (self.home_team_id, self.away_team_id, int(self.score_home_team), int(self.score_away_team), str(self.date))
+
+    def save(self, *args, **kwargs):
+        # statistik tim ikut di-update dalam transaksi yang sama dengan match-nya
+        with transaction.atomic():
+            old = None
+            if not self._state.adding:
+                previous = (
+                    Informasi.objects.select_for_update()
+                    .filter(pk=self.pk)
+                    .first()
+                )
+                if previous:
+                    old = previous.stats_snapshot()
+            super().save(*args, **kwargs)
+            apply_match_change(old, self.stats_snapshot())
+
+    class Meta:
+        indexes = [
+            # listing default (-date, -id) dan filter rentang tanggal
+            models.Index(fields=['date', 'id']),
+            # filter per tim; pertandingan tim X = home_team X OR away_team X
+            models.Index(fields=['home_team', 'date']),
+            models.Index(fields=['away_team', 'date']),
+            # filter city/country tidak peka huruf besar (UPPER(kolom) = UPPER(nilai)), urut tanggal
+            models.Index(Upper('city'), 'date', 'id', name='informasi_city_date_idx'),
+            models.Index(Upper('country'), 'date', 'id', name='informasi_country_date_idx'),
+            # urutan "views terbanyak" di halaman match
+            models.Index(fields=['views', 'id']),
+        ]
+
+
+def _result(goals_for, goals_against):
+    if goals_for > goals_against:
+        return 'W'
+    if goals_for < goals_against:
+        return 'L'
+    return 'D'
+
+
+class TeamStats(models.Model):
+    """Rekap per tim (W/D/L, gol, streak, form 5 match terakhir) dari semua Informasi."""
+    team = models.OneToOneField(Country, on_delete=models.CASCADE, primary_key=True, related_name='stats')
+    played = models.PositiveIntegerField(default=0)
+    wins = models.PositiveIntegerField(default=0)
+    draws = models.PositiveIntegerField(default=0)
+    losses = models.PositiveIntegerField(default=0)
+    goals_for = models.PositiveIntegerField(default=0)
+    goals_against = models.PositiveIntegerField(default=0)
+    # streak hasil yang sama berturut-turut dari match terbaru, mis. 'W' x 3
+    streak_type = models.CharField(max_length=1, blank=True)
+    streak_length = models.PositiveIntegerField(default=0)
+    # hasil 5 match terakhir, terbaru di depan, mis. 'WWDLW'
+    form = models.CharField(max_length=5, blank=True)
+
+    FORM_LENGTH = 5
+
+    def __str__(self):
+        return f"{self.team_id}: {self.wins}W {self.draws}D {self.losses}L"
+
+    @property
+    def goal_difference(self):
+        return self.goals_for - self.goals_against
+
+    @classmethod
+    def for_team(cls, team):
+        """Ambil rekap tim; tim tanpa match dapat rekap kosong (tidak disimpan)."""
+        try:
+            return team.stats
+        except cls.DoesNotExist:
+            return cls(team=team)
+
+    @staticmethod
+    def _deltas(snapshot, sign, deltas):
+        home, away, score_home, score_away, _ = snapshot
+        for team_id, goals_for, goals_against in ((home, score_home, score_away), (away, score_away, score_home)):
+            team = deltas[team_id]
+            team['played'] += sign
+            team[{'W': 'wins', 'D': 'draws', 'L': 'losses'}[_result(goals_for, goals_against)]] += sign
+            team['goals_for'] += sign * goals_for
+            team['goals_against'] += sign * goals_against
+
+    @classmethod
+    def apply_change(cls, old=None, new=None):
+        """Geser rekap tim dari snapshot match lama ke yang baru (None = match tidak ada)."""
+        deltas = defaultdict(lambda: defaultdict(int))
+        if old:
+            cls._deltas(old, -1, deltas)
+        if new:
+            cls._deltas(new, 1, deltas)
+            for team_id in (new[0], new[1]):
+                cls.objects.get_or_create(team_id=team_id)
+        for team_id, team in deltas.items():
+            updates = {field: F(field) + delta for field, delta in team.items() if delta}
+            if updates:
+                cls.objects.filter(team_id=team_id).update(**updates)
+        cls.refresh_streaks(deltas.keys())
+
+    @classmethod
+    def _streak(cls, team_id, results):
+        form, streak_type, streak_length, streak_open = [], '', 0, True
+        for home_id, score_home, score_away in results:
+            if home_id == team_id:
+                result = _result(score_home, score_away)
+            else:
+                result = _result(score_away, score_home)
+            if len(form) < cls.FORM_LENGTH:
+                form.append(result)
+            if streak_open and result == (streak_type or result):
+                streak_type = result
+                streak_length += 1
+            else:
+                streak_open = False
+                if len(form) >= cls.FORM_LENGTH:
+                    break
+        return {'form': ''.join(form), 'streak_type': streak_type, 'streak_length': streak_length}
+
+    @classmethod
+    def refresh_streaks(cls, team_ids):
+        """Hitung ulang streak dan form; hanya membaca match terbaru tim sampai streak-nya putus."""
+        for team_id in team_ids:
+            results = (
+                Informasi.objects.filter(Q(home_team_id=team_id) | Q(away_team_id=team_id))
+                .order_by('-date', '-id')
+                .values_list('home_team_id', 'score_home_team', 'score_away_team')
+            )
+            cls.objects.filter(team_id=team_id).update(**cls._streak(team_id, results.iterator(chunk_size=50)))
+
+    @classmethod
+    def rebuild(cls):
+        """Hitung ulang semua rekap tim dari tabel Informasi."""
+        deltas = defaultdict(lambda: defaultdict(int))
+        sides = (('home_team_id', 'score_home_team', 'score_away_team'),
+                 ('away_team_id', 'score_away_team', 'score_home_team'))
+        for team_field, goals_for, goals_against in sides:
+            rows = Informasi.objects.order_by().values(team_field).annotate(
+                played=Count('id'),
+                wins=Count('id', filter=Q(**{f'{goals_for}__gt': F(goals_against)})),
+                draws=Count('id', filter=Q(**{goals_for: F(goals_against)})),
+                losses=Count('id', filter=Q(**{f'{goals_for}__lt': F(goals_against)})),
+                goals_for=Sum(goals_for),
+                goals_against=Sum(goals_against),
+            )
+            for row in rows:
+                team = deltas[row.pop(team_field)]
+                for field, value in row.items():
+                    team[field] += value
+
+        # streak dan form semua tim dari satu scan match terurut
+        history = defaultdict(list)
+        matches = Informasi.objects.order_by('-date', '-id').values_list(
+            'home_team_id', 'away_team_id', 'score_home_team', 'score_away_team')
+        for home, away, score_home, score_away in matches.iterator(chunk_size=2000):
+            history[home].append((home, score_home, score_away))
+            history[away].append((home, score_home, score_away))
+
+        with transaction.atomic():
+            cls.objects.all().delete()
+            cls.objects.bulk_create(
+                [cls(team_id=team_id, **team, **cls._streak(team_id, history[team_id]))
+                 for team_id, team in deltas.items()],
+                batch_size=1000,
+            )
+
+
+class HeadToHead(models.Model):
+    """
+    Rekap pertemuan dua tim. Pasangan disimpan sekali dengan team_a < team_b (urutan
+    string id), jadi Spain-Brazil dan Brazil-Spain memakai baris yang sama.
+    """
+    team_a = models.ForeignKey(Country, on_delete=models.CASCADE, related_name='+')
+    team_b = models.ForeignKey(Country, on_delete=models.CASCADE, related_name='+')
+    played = models.PositiveIntegerField(default=0)
+    team_a_wins = models.PositiveIntegerField(default=0)
+    team_b_wins = models.PositiveIntegerField(default=0)
+    draws = models.PositiveIntegerField(default=0)
+    team_a_goals = models.PositiveIntegerField(default=0)
+    team_b_goals = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['team_a', 'team_b'], name='unique_head_to_head_pair'),
+        ]
+
+    def __str__(self):
+        return f"{self.team_a_id} vs {self.team_b_id}: {self.team_a_wins}-{self.draws}-{self.team_b_wins}"
+
+    @staticmethod
+    def pair(first_id, second_id):
+        """(team_a, team_b, swapped): urutan kanonis pasangan dan apakah urutannya dibalik."""
+        if str(first_id) <= str(second_id):
+            return first_id, second_id, False
+        return second_id, first_id, True
+
+    @classmethod
+    def between(cls, first, second):
+        """Rekap dari sudut pandang `first`; pasangan tanpa pertemuan dapat rekap kosong."""
+        team_a, team_b, swapped = cls.pair(first.pk, second.pk)
+        h2h = cls.objects.filter(team_a_id=team_a, team_b_id=team_b).first() or cls(team_a_id=team_a, team_b_id=team_b)
+        return h2h, swapped
+
+    @classmethod
+    def _deltas(cls, snapshot, sign):
+        home, away, score_home, score_away, _ = snapshot
+        team_a, team_b, swapped = cls.pair(home, away)
+        goals_a, goals_b = (score_away, score_home) if swapped else (score_home, score_away)
+        result = _result(goals_a, goals_b)
+        return (team_a, team_b), {
+            'played': sign,
+            {'W': 'team_a_wins', 'D': 'draws', 'L': 'team_b_wins'}[result]: sign,
+            'team_a_goals': sign * goals_a,
+            'team_b_goals': sign * goals_b,
+        }
+
+    @classmethod
+    def apply_change(cls, old=None, new=None):
+        deltas = defaultdict(lambda: defaultdict(int))
+        for snapshot, sign in ((old, -1), (new, 1)):
+            if snapshot and snapshot[0] != snapshot[1]:
+                key, changes = cls._deltas(snapshot, sign)
+                for field, delta in changes.items():
+                    deltas[key][field] += delta
+        if new and new[0] != new[1]:
+            team_a, team_b, _ = cls.pair(new[0], new[1])
+            cls.objects.get_or_create(team_a_id=team_a, team_b_id=team_b)
+        for (team_a, team_b), changes in deltas.items():
+            updates = {field: F(field) + delta for field, delta in changes.items() if delta}
+            if updates:
+                cls.objects.filter(team_a_id=team_a, team_b_id=team_b).update(**updates)
+
+    @classmethod
+    def rebuild(cls):
+        """Hitung ulang semua rekap head-to-head dari tabel Informasi."""
+        totals = defaultdict(lambda: defaultdict(int))
+        rows = (
+            Informasi.objects.exclude(home_team=F('away_team')).order_by()
+            .values('home_team_id', 'away_team_id')
+            .annotate(
+                played=Count('id'),
+                home_wins=Count('id', filter=Q(score_home_team__gt=F('score_away_team'))),
+                away_wins=Count('id', filter=Q(score_home_team__lt=F('score_away_team'))),
+                draws=Count('id', filter=Q(score_home_team=F('score_away_team'))),
+                home_goals=Sum('score_home_team'),
+                away_goals=Sum('score_away_team'),
+            )
+        )
+        for row in rows:
+            team_a, team_b, swapped = cls.pair(row['home_team_id'], row['away_team_id'])
+            side_a, side_b = ('away', 'home') if swapped else ('home', 'away')
+            total = totals[(team_a, team_b)]
+            total['played'] += row['played']
+            total['draws'] += row['draws']
+            total['team_a_wins'] += row[f'{side_a}_wins']
+            total['team_b_wins'] += row[f'{side_b}_wins']
+            total['team_a_goals'] += row[f'{side_a}_goals']
+            total['team_b_goals'] += row[f'{side_b}_goals']
+
+        with transaction.atomic():
+            cls.objects.all().delete()
+            cls.objects.bulk_create(
+                [cls(team_a_id=team_a, team_b_id=team_b, **total) for (team_a, team_b), total in totals.items()],
+                batch_size=1000,
+            )
+
+
+def apply_match_change(old=None, new=None):
+    """Terapkan perubahan satu match (snapshot lama -> baru) ke TeamStats dan HeadToHead."""
+    if old == new:
+        return
+    TeamStats.apply_change(old, new)
+    HeadToHead.apply_change(old, new)
+
+
+def rebuild_match_stats():
+    with transaction.atomic():
+        TeamStats.rebuild()
+        HeadToHead.rebuild()
+
+
+@receiver(post_save, sender=Country)
+@receiver(post_delete, sender=Country)
+def _invalidate_country_cache(sender, **kwargs):
+    # bulk_create / queryset.update() tidak mengirim signal; pemanggilnya memanggil invalidate() sendiri.
+    # Diulang saat commit supaya snapshot yang sempat di-load proses lain sebelum commit ikut dibuang.
+    country_cache.invalidate()
+    transaction.on_commit(country_cache.invalidate)
+
+
+@receiver(post_delete, sender=Informasi)
+def _remove_deleted_match_from_stats(sender, instance, **kwargs):
+    # delete_match, delete_match_flutter, queryset.delete() dan cascade dari Country/User
+    apply_match_change(instance.stats_snapshot(), None)
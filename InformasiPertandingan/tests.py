@@ -1,9 +1,13 @@
 from django.test import TestCase, Client
 from django.urls import reverse
 from django.contrib.auth.models import User
-from .models import Country, Informasi
+from django.core.management import call_command
+from . import country_cache
+from .models import Country, HeadToHead, Informasi, TeamStats
 from main.models import Profile
+from main import view_counter
 import uuid
+from io import StringIO
 
 class InformasiPertandinganTests(TestCase):
 
@@ -54,7 +58,8 @@ class InformasiPertandinganTests(TestCase):
     def test_increment_views(self):
         initial_views = self.matchHot.views
         self.matchHot.increment_views()
-        self.assertEqual(self.matchHot.views, initial_views + 1)
+        self.assertEqual(self.matchHot.total_views, initial_views + 1)
+        view_counter.flush()
         self.matchHot.refresh_from_db()
         self.assertEqual(self.matchHot.views, 101)
 
@@ -63,6 +68,8 @@ class InformasiPertandinganTests(TestCase):
         response = self.client.get(reverse('InformasiPertandingan:show_main'))
         self.assertEqual(response.status_code, 200)
         self.assertTemplateUsed(response, 'InformasiPertandingan/main.html')
+        # halaman memuat match per halaman dari api, bukan seluruh isi json/
+        self.assertContains(response, reverse('InformasiPertandingan:matches_json'))
 
     #tes perbedaan tampilan untuk admin dan user biasa
     def test_create_match(self):
@@ -95,6 +102,7 @@ class InformasiPertandinganTests(TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertTemplateUsed(response, 'InformasiPertandingan/match_detail.html')
         
+        view_counter.flush()
         self.matchHot.refresh_from_db()
         self.assertEqual(self.matchHot.views, initial_views + 1)
         self.assertContains(response, 'const isAuthenticated = "True" === "True";')
@@ -107,6 +115,7 @@ class InformasiPertandinganTests(TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertTemplateUsed(response, 'InformasiPertandingan/match_detail.html')
         
+        view_counter.flush()
         self.matchHot.refresh_from_db()
         self.assertEqual(self.matchHot.views, initial_views + 1)
         self.assertContains(response, 'const isAuthenticated = "False" === "True";')        
@@ -277,4 +286,103 @@ class InformasiPertandinganTests(TestCase):
         self.client.login(username='admin', password='admin123')
         response = self.client.get(reverse('InformasiPertandingan:delete_match', args=[self.matchHot.id]))
         self.assertRedirects(response, reverse('InformasiPertandingan:show_main'))
-        self.assertEqual(Informasi.objects.count(), 1)
\ No newline at end of file
+        self.assertEqual(Informasi.objects.count(), 1)
+    # tes api daftar match dengan filter dan cursor pagination
+    def test_matches_json_filters_and_paginates(self):
+        url = reverse('InformasiPertandingan:matches_json')
+        Informasi.objects.create(title="Piala AFF", date="2025-10-11", city="Jakarta", country="Indonesia",
+                                 home_team=self.brazil, away_team=self.indonesia)
+
+        response = self.client.get(url, {'team': 'Indonesia'})
+        self.assertEqual([m['date'] for m in response.json()['results']], ['2025-10-12', '2025-10-11'])
+        self.assertEqual(self.client.get(url, {'team': 'Atlantis'}).json(), {'results': [], 'next': None})
+
+        response = self.client.get(url, {'city': 'jakarta', 'date_from': '2025-10-12', 'sort': 'date'})
+        self.assertEqual([m['title'] for m in response.json()['results']], ['Friendly Match'])
+        self.assertEqual(self.client.get(url, {'title': 'aff'}).json()['results'][0]['title'], 'Piala AFF')
+
+        first = self.client.get(url, {'limit': 2}).json()
+        self.assertEqual(len(first['results']), 2)
+        second = self.client.get(url, {'limit': 2, 'cursor': first['next']}).json()
+        self.assertEqual([m['title'] for m in second['results']], ['Spain vs Brazil'])
+        self.assertIsNone(second['next'])
+
+        # urutan views terbanyak dan filter country tidak peka huruf besar
+        response = self.client.get(url, {'sort': '-views', 'limit': 1})
+        self.assertEqual(response.json()['results'][0]['title'], 'Spain vs Brazil')
+        response = self.client.get(url, {'sort': '-views', 'limit': 1, 'cursor': response.json()['next']})
+        self.assertEqual(response.json()['results'][0]['title'], 'Friendly Match')
+        response = self.client.get(url, {'country': 'INDONESIA'})
+        self.assertEqual([m['title'] for m in response.json()['results']], ['Friendly Match', 'Piala AFF'])
+
+    def test_matches_json_rejects_bad_params(self):
+        url = reverse('InformasiPertandingan:matches_json')
+        self.assertEqual(self.client.get(url, {'sort': 'views'}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'date_from': '12-10-2025'}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'cursor': 'rusak'}).status_code, 400)
+
+    # tes statistik tim dan head-to-head yang di-update saat match dibuat/diubah/dihapus
+    def test_team_stats_follow_match_changes(self):
+        stats = TeamStats.objects.get(team=self.spain)
+        self.assertEqual((stats.played, stats.wins, stats.draws, stats.goals_for, stats.goals_against), (2, 1, 1, 2, 1))
+        self.assertEqual((stats.form, stats.streak_type, stats.streak_length), ('DW', 'D', 1))
+
+        self.client.login(username='admin', password='admin123')
+        self.client.post(reverse('InformasiPertandingan:edit_match', args=[self.matchHot.id]),
+                         {'score_home_team': 0, 'score_away_team': 3})
+        stats.refresh_from_db()
+        self.assertEqual((stats.wins, stats.losses, stats.goals_for, stats.goals_against), (0, 1, 0, 3))
+        h2h, swapped = HeadToHead.between(self.brazil, self.spain)
+        brazil_wins = h2h.team_a_wins if not swapped else h2h.team_b_wins
+        self.assertEqual((h2h.played, brazil_wins), (1, 1))
+
+        self.client.post(reverse('InformasiPertandingan:delete_match_flutter', args=[self.matchNoHot.id]))
+        stats.refresh_from_db()
+        self.assertEqual((stats.played, stats.draws, stats.form), (1, 0, 'L'))
+        self.assertEqual(TeamStats.objects.get(team=self.indonesia).played, 0)
+
+        incremental = {s.pk: (s.played, s.wins, s.draws, s.losses, s.goals_for, s.goals_against, s.form, s.streak_length)
+                       for s in TeamStats.objects.all()}
+        call_command('rebuild_match_stats', stdout=StringIO())
+        rebuilt = {s.pk: (s.played, s.wins, s.draws, s.losses, s.goals_for, s.goals_against, s.form, s.streak_length)
+                   for s in TeamStats.objects.all()}
+        self.assertEqual({k: v for k, v in incremental.items() if v[0]}, rebuilt)
+
+    def test_stats_endpoints(self):
+        response = self.client.get(reverse('InformasiPertandingan:team_stats_json', args=[self.spain.id]))
+        self.assertEqual(response.json()['form'], 'DW')
+        self.assertEqual(response.json()['goal_difference'], 1)
+
+        country_cache.snapshot()
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('InformasiPertandingan:head_to_head_json', args=[self.brazil.id, self.spain.id]))
+        data = response.json()
+        self.assertEqual((data['played'], data['wins'], data['losses'], data['goals_for']), (1, 0, 1, 1))
+
+        response = self.client.get(reverse('InformasiPertandingan:head_to_head_json', args=[self.brazil.id, uuid.uuid4()]))
+        self.assertEqual(response.status_code, 404)
+
+    # tes cache country: json-country tanpa query saat cache hangat, dan di-invalidate saat ada tulis
+    def test_country_cache_serves_json_and_invalidates_on_write(self):
+        url = reverse('InformasiPertandingan:show_json_country')
+        self.client.get(url)
+        with self.assertNumQueries(0):
+            response = self.client.get(url)
+        self.assertEqual([c['name'] for c in response.json()], ['Brazil', 'Indonesia', 'Spain'])
+
+        etag = response['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        Country.objects.create(name='Japan', flag='https://flagcdn.com/w320/jp.png')
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('Japan', [c['name'] for c in response.json()])
+        self.assertEqual(country_cache.get_by_name('Japan').flag, 'https://flagcdn.com/w320/jp.png')
+
+    def test_add_match_with_unknown_team_returns_404(self):
+        self.client.login(username='admin', password='admin123')
+        response = self.client.post(reverse('InformasiPertandingan:add_match'), {
+            'title': 'X', 'date': '2025-10-20', 'city': 'A', 'country': 'B',
+            'home_team': 'Atlantis', 'away_team': 'Spain', 'score_home_team': 0, 'score_away_team': 0,
+        })
+        self.assertEqual(response.status_code, 404)
@@ -1,11 +1,14 @@
 from django.urls import path
-from InformasiPertandingan.views import edit_match_flutter, delete_match_flutter, show_json_country, show_main, add_match, create_match_flutter, proxy_image, show_json, show_json_by_id, edit_match, delete_match, show_match, show_xml, show_xml_by_id
+from InformasiPertandingan.views import edit_match_flutter, delete_match_flutter, show_json_country, show_main, add_match, create_match_flutter, proxy_image, show_json, show_json_by_id, edit_match, delete_match, show_match, show_xml, show_xml_by_id, matches_json, team_stats_json, head_to_head_json
 app_name = 'InformasiPertandingan'
 
 urlpatterns = [
     path('', show_main, name='show_main'),
     path('add-match/', add_match, name='add_match'),
     path('json/', show_json, name='show_json'),
+    path('api/matches/', matches_json, name='matches_json'),
+    path('stats/team/<uuid:team_id>/', team_stats_json, name='team_stats_json'),
+    path('stats/head-to-head/<uuid:team_id>/<uuid:opponent_id>/', head_to_head_json, name='head_to_head_json'),
     path('json/<str:match_id>/', show_json_by_id, name='show_json_by_id'),
     path('xml/', show_xml, name='show_xml'),
     path('xml/<str:match_id>/', show_xml_by_id, name='show_xml_by_id'),
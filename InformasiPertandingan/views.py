@@ -1,12 +1,19 @@
 from django.shortcuts import render, get_object_or_404
-from InformasiPertandingan.models import Informasi, Country
+from InformasiPertandingan.models import Informasi, Country, HeadToHead, TeamStats
 from django.http import HttpResponse, HttpResponseRedirect, JsonResponse
 from django.urls import reverse
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_POST
 from django.core import serializers
 from django.utils.html import strip_tags
-import requests, json
+from django.db.models import Q, Sum, Value
+from django.db.models.functions import Upper
+from main.conditional import conditional_feed, table_version
+from main.pagination import InvalidCursor, get_page_size, keyset_paginate
+from main import image_proxy, view_counter
+from InformasiPertandingan import country_cache
+import datetime
+import json
 
 @csrf_exempt
 def create_match_flutter(request):
@@ -28,8 +35,8 @@ def create_match_flutter(request):
             date=date, 
             city=city,
             country=country,
-            home_team=get_object_or_404(Country, name=home_team_name),
-            away_team=get_object_or_404(Country, name=away_team_name),
+            home_team=country_cache.get_by_name_or_404(home_team_name),
+            away_team=country_cache.get_by_name_or_404(away_team_name),
             score_home_team=score_home_team,
             score_away_team=score_away_team,
             views=views,
@@ -41,33 +48,56 @@ def create_match_flutter(request):
     else:
         return JsonResponse({"status": "error"}, status=401)
 
+MATCH_ORDERINGS = {
+    '-date': ('-date', '-id'),
+    'date': ('date', 'id'),
+    '-views': ('-views', '-id'),
+}
+
+def _serialize_match(informasi):
+    return {
+        'id': str(informasi.id),
+        'title': informasi.title,
+        'date': informasi.date.isoformat(),
+        'city': informasi.city,
+        'country': informasi.country,
+        'is_info_hot': informasi.is_info_hot,
+        'home_team': {
+            'name': informasi.home_team.name,
+            'flag': informasi.home_team.flag
+        },
+        'away_team': {
+            'name': informasi.away_team.name,
+            'flag': informasi.away_team.flag
+        },
+        'score_home_team': informasi.score_home_team,
+        'score_away_team': informasi.score_away_team,
+        'views': informasi.total_views,
+        'user_id': informasi.user_id,
+    }
+
+def _serialize_team(country):
+    return {'id': str(country.id), 'name': country.name, 'flag': country.flag}
+
+def _country_version(request):
+    return [country_cache.version_info()]
+
+def _informasi_feed_version(request):
+    return [
+        table_version(Informasi.objects.all(), views=Sum('views')),
+        # total_views di payload memuat delta view_counter yang belum di-flush
+        {'pending_views': view_counter.pending_total(Informasi, 'views')},
+        country_cache.version_info(),
+    ]
+
+# body JSON daftar negara sudah diserialisasi di country_cache, jadi tidak ada query per request
+@conditional_feed(_country_version)
 def show_json_country(request):
-    country_list = Country.objects.all()
-    data = []
-    for country in country_list:
-        data.append({
-            'id': str(country.id),
-            'name': country.name,
-            'flag': country.flag
-        })
-    return JsonResponse(data, safe=False)   
-
-# fungsi untuk menjadi perantara agar gambar dapat ditampilkan di Flutter
-def proxy_image(request):
-    image_url = request.GET.get('url')
-    if not image_url:
-        return HttpResponse('No URL provided', status=400)
+    return HttpResponse(country_cache.snapshot().json_bytes, content_type='application/json')
 
-    # kalau imagenya ada, fetch gambarnya dan return isinya
-    try:
-        response = requests.get(image_url, timeout=10)
-        response.raise_for_status()
-        return HttpResponse(
-            response.content,
-            content_type=response.headers.get('Content-Type', 'image/jpeg')
-        )
-    except requests.RequestException as e:
-        return HttpResponse(f'Error fetching image: {str(e)}', status=500)
+# fungsi untuk menjadi perantara agar gambar dapat ditampilkan di Flutter (lewat cache disk bersama)
+def proxy_image(request):
+    return image_proxy.serve(request)
     
 # fungsi halaman utama page
 def show_main(request):
@@ -92,8 +122,8 @@ def add_match(request):
     score_away_team = request.POST.get("score_away_team")
     user = request.user if request.user.is_authenticated else None
     
-    home_team = get_object_or_404(Country, name=home_team_name)
-    away_team = get_object_or_404(Country, name=away_team_name)
+    home_team = country_cache.get_by_name_or_404(home_team_name)
+    away_team = country_cache.get_by_name_or_404(away_team_name)
 
     new_match = Informasi(
         title=title,
@@ -110,60 +140,109 @@ def add_match(request):
     return JsonResponse({'success': True, 'id': new_match.id}, status=201)
 
 # fungsi untuk menampilkan data dengan format json
+@conditional_feed(_informasi_feed_version)
 def show_json(request):
     # select related untuk sekaligus mengambil data country
     informasi_list = Informasi.objects.select_related('home_team', 'away_team').all()
-    data = []
     # menambahkan semua data matches
-    for informasi in informasi_list:
-        data.append({
-            'id': str(informasi.id),
-            'title': informasi.title,
-            'date': informasi.date.isoformat(),
-            'city': informasi.city,
-            'country': informasi.country,
-            'is_info_hot': informasi.is_info_hot,
-            'home_team': {
-                'name': informasi.home_team.name,
-                'flag': informasi.home_team.flag
-            },
-            'away_team': {
-                'name': informasi.away_team.name,
-                'flag': informasi.away_team.flag
-            },
-            'score_home_team': informasi.score_home_team,
-            'score_away_team': informasi.score_away_team,
-            'views': informasi.views,
-            'user_id': informasi.user_id if informasi.user else None,
-        })
+    data = [_serialize_match(informasi) for informasi in informasi_list]
     return JsonResponse(data, safe=False)
 
+# fungsi untuk menampilkan daftar match dengan filter dan cursor pagination
+# (tanpa conditional_feed: versi seluruh tabel membuat setiap halaman O(N))
+def matches_json(request):
+    """
+    Daftar match untuk Flutter/web dengan filter di sisi server.
+    Query param: team, date_from, date_to (YYYY-MM-DD), title, city, country, sort, limit, cursor.
+    Semua filter kecuali title dilayani index; title (substring) difilter sambil membaca
+    index urutan dan berhenti begitu satu halaman terisi.
+    """
+    ordering = MATCH_ORDERINGS.get(request.GET.get('sort', '-date'))
+    if ordering is None:
+        return JsonResponse({'error': 'Invalid sort'}, status=400)
+
+    matches = Informasi.objects.select_related('home_team', 'away_team')
+    team = request.GET.get('team')
+    if team:
+        # nama tim di-resolve lewat country_cache supaya filter memakai index (home_team, date)
+        # dan (away_team, date); tim yang tidak dikenal berarti halaman kosong tanpa query
+        country = country_cache.get_by_name(team)
+        if country is None:
+            matches = matches.none()
+        else:
+            matches = matches.filter(Q(home_team_id=country.pk) | Q(away_team_id=country.pk))
+    for param, lookup in (('date_from', 'date__gte'), ('date_to', 'date__lte')):
+        value = request.GET.get(param)
+        if value:
+            try:
+                matches = matches.filter(**{lookup: datetime.date.fromisoformat(value)})
+            except ValueError:
+                return JsonResponse({'error': f'Invalid {param}'}, status=400)
+    title = request.GET.get('title')
+    if title:
+        matches = matches.filter(title__icontains=title)
+    # UPPER di kedua sisi supaya sama persis dengan index ekspresi Upper(city/country)
+    for field in ('city', 'country'):
+        value = request.GET.get(field)
+        if value:
+            matches = matches.alias(**{f'{field}_upper': Upper(field)}).filter(**{f'{field}_upper': Upper(Value(value))})
+
+    try:
+        items, next_cursor = keyset_paginate(
+            matches, ordering,
+            cursor=request.GET.get('cursor'),
+            limit=get_page_size(request),
+        )
+    except InvalidCursor:
+        return JsonResponse({'error': 'Invalid cursor'}, status=400)
+
+    return JsonResponse({
+        'results': [_serialize_match(informasi) for informasi in items],
+        'next': next_cursor,
+    })
+
+# fungsi untuk menampilkan rekap satu tim dari tabel TeamStats (tanpa menghitung ulang match)
+def team_stats_json(request, team_id):
+    team = get_object_or_404(Country.objects.select_related('stats'), pk=team_id)
+    stats = TeamStats.for_team(team)
+    return JsonResponse({
+        'team': _serialize_team(team),
+        'played': stats.played,
+        'wins': stats.wins,
+        'draws': stats.draws,
+        'losses': stats.losses,
+        'goals_for': stats.goals_for,
+        'goals_against': stats.goals_against,
+        'goal_difference': stats.goal_difference,
+        'streak': {'type': stats.streak_type, 'length': stats.streak_length},
+        'form': stats.form,
+    })
+
+# fungsi untuk menampilkan rekap pertemuan dua tim dari sudut pandang tim pertama
+def head_to_head_json(request, team_id, opponent_id):
+    team, opponent = country_cache.get_by_id(team_id), country_cache.get_by_id(opponent_id)
+    if team is None or opponent is None:
+        return JsonResponse({'detail': 'Not found'}, status=404)
+    h2h, swapped = HeadToHead.between(team, opponent)
+    wins, losses = (h2h.team_b_wins, h2h.team_a_wins) if swapped else (h2h.team_a_wins, h2h.team_b_wins)
+    goals_for, goals_against = (h2h.team_b_goals, h2h.team_a_goals) if swapped else (h2h.team_a_goals, h2h.team_b_goals)
+    return JsonResponse({
+        'team': _serialize_team(team),
+        'opponent': _serialize_team(opponent),
+        'played': h2h.played,
+        'wins': wins,
+        'draws': h2h.draws,
+        'losses': losses,
+        'goals_for': goals_for,
+        'goals_against': goals_against,
+    })
+
 # fungsi untuk menampilkan data json berdasarkan suatu id match
 def show_json_by_id(request, match_id):
     try:
-        informasi = Informasi.objects.select_related('user').get(pk=match_id)
+        informasi = Informasi.objects.select_related('home_team', 'away_team').get(pk=match_id)
         informasi.increment_views()
-        data = {
-            'id': str(informasi.id),
-            'title': informasi.title,
-            'date': informasi.date.isoformat(),
-            'city': informasi.city,
-            'country': informasi.country,
-            'is_info_hot': informasi.is_info_hot,
-            'home_team': {
-                'name': informasi.home_team.name,
-                'flag': informasi.home_team.flag
-            },
-            'away_team': {
-                'name': informasi.away_team.name,
-                'flag': informasi.away_team.flag
-            },
-            'score_home_team': informasi.score_home_team,
-            'score_away_team': informasi.score_away_team,
-            'views': informasi.views,
-            'user_id': informasi.user_id if informasi.user else None,
-        }
-        return JsonResponse(data)
+        return JsonResponse(_serialize_match(informasi))
     except Informasi.DoesNotExist:
         return JsonResponse({'detail': 'Not found'}, status=404)
 
@@ -191,9 +270,9 @@ def edit_match(request, match_id):
     away_team_name = request.POST.get("away_team")
     
     if home_team_name:
-        match.home_team = get_object_or_404(Country, name=home_team_name)
+        match.home_team = country_cache.get_by_name_or_404(home_team_name)
     if away_team_name:
-        match.away_team = get_object_or_404(Country, name=away_team_name)
+        match.away_team = country_cache.get_by_name_or_404(away_team_name)
     
     match.title = request.POST.get("title", match.title)
     match.date = request.POST.get("date", match.date)
@@ -217,9 +296,9 @@ def edit_match_flutter(request, match_id):
         away_team_name = data.get("away_team", "")
 
         if home_team_name:
-            match.home_team = get_object_or_404(Country, name=home_team_name)
+            match.home_team = country_cache.get_by_name_or_404(home_team_name)
         if away_team_name:
-            match.away_team = get_object_or_404(Country, name=away_team_name)
+            match.away_team = country_cache.get_by_name_or_404(away_team_name)
         match.score_home_team = data.get("score_home_team", "")
         match.score_away_team = data.get("score_away_team", "")
         match.save()
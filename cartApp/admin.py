@@ -1,6 +1,6 @@
 # cartApp/admin.py
 from django.contrib import admin
-from .models import Cart, CartItem, Purchase
+from .models import Cart, CartItem, Purchase, IdempotencyKey
 
 
 @admin.register(Cart)
@@ -53,16 +53,16 @@ class CartItemAdmin(admin.ModelAdmin):
 
 @admin.register(Purchase)
 class PurchaseAdmin(admin.ModelAdmin):
-    list_display = ('id', 'order_token', 'user', 'get_product_name', 'quantity', 'product_price', 'line_total')
+    list_display = ('id', 'order_token', 'user', 'get_product_name', 'quantity', 'product_price', 'line_total', 'created_at')
     list_filter = ('user', 'order_token')
     search_fields = ('order_token', 'user__username', 'product__name', 'product_name')
     readonly_fields = ('id', 'order_token', 'line_total')
     raw_id_fields = ('user', 'product')
-    date_hierarchy = None  # Add if you have created_at field
+    date_hierarchy = 'created_at'
     
     fieldsets = (
         ('Order Information', {
-            'fields': ('id', 'order_token', 'user')
+            'fields': ('id', 'order_token', 'user', 'created_at')
         }),
         ('Product Information (Database)', {
             'fields': ('product',),
@@ -88,4 +88,13 @@ class PurchaseAdmin(admin.ModelAdmin):
     def changelist_view(self, request, extra_context=None):
         extra_context = extra_context or {}
         extra_context['title'] = 'Purchase History'
-        return super().changelist_view(request, extra_context)
\ No newline at end of file
+        return super().changelist_view(request, extra_context)
+
+
+@admin.register(IdempotencyKey)
+class IdempotencyKeyAdmin(admin.ModelAdmin):
+    list_display = ('key', 'user', 'endpoint', 'order_token', 'status_code', 'created_at')
+    list_filter = ('endpoint',)
+    search_fields = ('key', 'order_token', 'user__username')
+    readonly_fields = ('created_at',)
+    raw_id_fields = ('user',)
@@ -0,0 +1,74 @@
+# cartApp/csv_catalog.py
+import csv
+import os
+import threading
+from collections import namedtuple
+
+from django.conf import settings
+
+CsvProduct = namedtuple('CsvProduct', ['index', 'name', 'price', 'thumbnail', 'stock'])
+
+
+def _parse_int(value):
+    try:
+        return int(float(value or 0))
+    except (TypeError, ValueError):
+        return 0
+
+
+class CsvCatalog:
+    """
+    Index merchandise.csv di memori untuk produk fallback (product_id "csv_<idx>").
+
+    File hanya di-parse ulang kalau mtime/ukurannya berubah. Snapshot baru dibangun
+    penuh dulu baru diganti sekaligus, jadi request lain tidak pernah melihat index
+    yang setengah jadi.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._snapshot = None  # (signature, rows, by_name)
+
+    def _current(self):
+        stat = os.stat(self.path)  # FileNotFoundError diteruskan ke pemanggil
+        signature = (stat.st_mtime_ns, stat.st_size)
+        snapshot = self._snapshot
+        if snapshot is None or snapshot[0] != signature:
+            with self._lock:
+                snapshot = self._snapshot
+                if snapshot is None or snapshot[0] != signature:
+                    snapshot = (signature,) + self._load()
+                    self._snapshot = snapshot
+        return snapshot
+
+    def _load(self):
+        rows = []
+        by_name = {}
+        with open(self.path, newline='', encoding='utf-8') as f:
+            for idx, row in enumerate(csv.DictReader(f)):
+                product = CsvProduct(
+                    index=idx,
+                    name=row.get('name') or '',
+                    price=_parse_int(row.get('price')),
+                    thumbnail=row.get('thumbnail') or '',
+                    stock=_parse_int(row.get('stock') or row.get('Stock') or row.get('stok')),
+                )
+                rows.append(product)
+                by_name.setdefault(product.name, product)
+        return tuple(rows), by_name
+
+    def get(self, index):
+        rows = self._current()[1]
+        if 0 <= index < len(rows):
+            return rows[index]
+        return None
+
+    def get_by_name(self, name):
+        return self._current()[2].get(name)
+
+    def __len__(self):
+        return len(self._current()[1])
+
+
+catalog = CsvCatalog(os.path.join(settings.BASE_DIR, 'merchandise.csv'))
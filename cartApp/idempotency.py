@@ -0,0 +1,140 @@
+# cartApp/idempotency.py
+import json
+import time
+from datetime import timedelta
+from functools import wraps
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.http import JsonResponse
+from django.utils import timezone
+
+from .models import IdempotencyKey
+
+HEADER = 'Idempotency-Key'
+FIELD = 'idempotency_key'
+
+_last_purge = None  # waktu monotonic purge global terakhir di proses ini
+
+
+def _ttl():
+    return timedelta(seconds=getattr(settings, 'IDEMPOTENCY_KEY_TTL', 24 * 60 * 60))
+
+
+def _in_progress_timeout():
+    # record tanpa status_code yang lebih tua dari ini dianggap ditinggal worker yang mati
+    return timedelta(seconds=getattr(settings, 'IDEMPOTENCY_IN_PROGRESS_TIMEOUT', 5 * 60))
+
+
+def _purge_interval():
+    return getattr(settings, 'IDEMPOTENCY_PURGE_INTERVAL', 60 * 60)
+
+
+def _stale(now):
+    return (Q(created_at__lt=now - _ttl())
+            | Q(status_code__isnull=True, created_at__lt=now - _in_progress_timeout()))
+
+
+def purge_expired():
+    """
+    Hapus semua key yang lewat TTL dan record in-progress yang ditinggalkan.
+    Dua DELETE terpisah supaya masing-masing cukup membaca index created_at.
+    Mengembalikan jumlah baris yang dihapus.
+    """
+    now = timezone.now()
+    expired, _ = IdempotencyKey.objects.filter(created_at__lt=now - _ttl()).delete()
+    abandoned, _ = IdempotencyKey.objects.filter(
+        status_code__isnull=True, created_at__lt=now - _in_progress_timeout()).delete()
+    return expired + abandoned
+
+
+def _maybe_purge():
+    # sweep global paling banyak sekali per IDEMPOTENCY_PURGE_INTERVAL per proses,
+    # supaya key yang tidak pernah dipakai lagi tidak menumpuk di tabel
+    global _last_purge
+    now = time.monotonic()
+    if _last_purge is not None and now - _last_purge < _purge_interval():
+        return
+    _last_purge = now
+    purge_expired()
+
+
+def _get_key(request):
+    key = request.headers.get(HEADER)
+    if key:
+        return key.strip()
+    if request.content_type == 'application/json':
+        try:
+            data = json.loads(request.body)
+        except ValueError:
+            return None
+        key = data.get(FIELD) if isinstance(data, dict) else None
+    else:
+        key = request.POST.get(FIELD)
+    return str(key).strip() if key else None
+
+
+def _replay(record, endpoint):
+    if record.endpoint != endpoint:
+        return JsonResponse({'success': False, 'error': 'Idempotency key already used for another request'},
+                            status=422)
+    if record.status_code is None:
+        return JsonResponse({'success': False, 'error': 'A request with this idempotency key is still being processed'},
+                            status=409)
+    response = JsonResponse(record.response_body, status=record.status_code, safe=False)
+    response['Idempotent-Replayed'] = 'true'
+    return response
+
+
+def idempotent(view):
+    """
+    Decorator untuk endpoint POST yang membuat pesanan. Kalau client mengirim header
+    Idempotency-Key (atau field idempotency_key), response sukses pertama disimpan
+    selama IDEMPOTENCY_KEY_TTL detik dan retry dengan key yang sama langsung menerima
+    response itu tanpa masuk lagi ke transaksi stok. Response gagal tidak disimpan,
+    jadi client boleh mencoba ulang dengan key yang sama. Record yang masih in-progress
+    setelah IDEMPOTENCY_IN_PROGRESS_TIMEOUT detik (worker mati di tengah request)
+    dianggap ditinggalkan dan key-nya boleh diproses lagi.
+    """
+    endpoint = view.__name__
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if request.method != 'POST' or not request.user.is_authenticated:
+            return view(request, *args, **kwargs)
+        key = _get_key(request)
+        if not key:
+            return view(request, *args, **kwargs)
+        if len(key) > IdempotencyKey._meta.get_field('key').max_length:
+            return JsonResponse({'success': False, 'error': 'Idempotency key too long'}, status=400)
+
+        _maybe_purge()
+        IdempotencyKey.objects.filter(_stale(timezone.now()), user=request.user, key=key).delete()
+        try:
+            with transaction.atomic():
+                record = IdempotencyKey.objects.create(user=request.user, key=key, endpoint=endpoint)
+        except IntegrityError:
+            record = IdempotencyKey.objects.filter(user=request.user, key=key).first()
+            if record is None:
+                return JsonResponse({'success': False, 'error': 'A request with this idempotency key is still being processed'},
+                                    status=409)
+            return _replay(record, endpoint)
+
+        try:
+            response = view(request, *args, **kwargs)
+        except Exception:
+            record.delete()
+            raise
+
+        if isinstance(response, JsonResponse) and 200 <= response.status_code < 300:
+            body = json.loads(response.content)
+            record.status_code = response.status_code
+            record.response_body = body
+            record.order_token = body.get('order_token') if isinstance(body, dict) else None
+            record.save(update_fields=['status_code', 'response_body', 'order_token'])
+        else:
+            record.delete()
+        return response
+
+    return wrapper
@@ -1,6 +1,6 @@
+import argparse
 import os
 import django
-import csv
 import uuid
 from pathlib import Path
 import sys
@@ -21,9 +21,11 @@ except Exception as e:
 
 # import model (sesuaikan app / model jika lokasi berbeda)
 try:
-    from cartApp.models import Purchase
+    from cartApp.models import Purchase, PurchasedProduct
     from django.contrib.auth import get_user_model
+    from django.utils import timezone
     from merchandiseApp.models import Merchandise
+    from main.bulk_import import BulkImporter, read_csv
 except ImportError as e:
     print(f"ERROR: Gagal impor model. {e}")
     exit(1)
@@ -48,100 +50,79 @@ def parse_uuid(val):
     except Exception:
         return None
 
-def get_user_by_id(uid):
-    if uid in (None, "", "None"):
-        return None
-    try:
-        # csv mungkin berisi string; coba konversi ke int dulu
-        pk = int(uid)
-        return User.objects.filter(pk=pk).first()
-    except Exception:
-        return None
-
-def get_product_by_id(pid):
-    if pid in (None, "", "None"):
-        return None
-    try:
-        pk = int(pid)
-        return Merchandise.objects.filter(pk=pk).first()
-    except Exception:
-        return None
-
-def import_purchases(dry_run=False):
-    created = 0
-    updated = 0
-    skipped = 0
-
-    if not PURCHASES_CSV_FILE.exists():
-        print(f"ERROR: File '{PURCHASES_CSV_FILE}' tidak ditemukan. Pastikan path benar.")
+class PurchaseImporter(BulkImporter):
+    """
+    Upsert purchase per baris (order_token, produk). user dan produk dicocokkan dengan
+    map yang di-prefetch sekali: user lewat pk, produk lewat UUID lalu nama produk.
+    """
+    model = Purchase
+    unique_fields = ['id']
+    update_fields = ['user', 'product', 'product_name', 'product_price', 'quantity']
+
+    def prefetch(self):
+        self.user_ids = set(User.objects.values_list('pk', flat=True))
+        self.product_ids = set()
+        self.product_ids_by_name = {}
+        for pk, name in Merchandise.objects.order_by('pk').values_list('pk', 'name'):
+            self.product_ids.add(pk)
+            self.product_ids_by_name.setdefault(name, pk)
+        self.purchase_ids = {}
+        # baris baru dari pesanan yang sudah ada ikut waktu pesanannya, supaya tetap satu pesanan di riwayat
+        self.order_times = {}
+        for pk, token, name, created_at in Purchase.objects.order_by('-pk').values_list(
+                'pk', 'order_token', 'product_name', 'created_at'):
+            self.purchase_ids[(token, name)] = pk
+            self.order_times[token] = created_at
+        self.imported_at = timezone.now()
+
+    def product_id(self, pid, name):
+        pk = parse_uuid(pid)
+        if pk in self.product_ids:
+            return pk
+        return self.product_ids_by_name.get(name)
+
+    def build(self, row):
+        user_id = parse_int(row.get("user_id"), default=None)
+        product_name = row.get("product_name") or ""
+        order_token = parse_uuid(row.get("order_token") or row.get("order")) or uuid.uuid4()
+        purchase = Purchase(
+            order_token=order_token,
+            user_id=user_id if user_id in self.user_ids else None,
+            product_id=self.product_id(row.get("product_id"), product_name),
+            product_name=product_name,
+            product_price=parse_int(row.get("product_price") or row.get("price"), default=0),
+            quantity=parse_int(row.get("quantity"), default=1),
+            created_at=self.order_times.setdefault(order_token, self.imported_at),
+        )
+        purchase.pk = self.purchase_ids.get(self.key(purchase))
+        if self.dry_run:
+            print(f"[DRY RUN] token={order_token} user={purchase.user_id} product={purchase.product_id} "
+                  f"name='{product_name}' price={purchase.product_price} qty={purchase.quantity}")
+        return purchase
+
+    def key(self, obj):
+        return (obj.order_token, obj.product_name)
+
+    def write(self, objs):
+        super().write(objs)
+        PurchasedProduct.record(objs)
+        # pk baris baru dicatat supaya baris yang sama di batch berikutnya meng-update, bukan menduplikasi
+        for obj in objs:
+            self.purchase_ids[self.key(obj)] = obj.pk
+
+
+def import_purchases(dry_run=False, path=PURCHASES_CSV_FILE, batch_size=None):
+    if not Path(path).exists():
+        print(f"ERROR: File '{path}' tidak ditemukan. Pastikan path benar.")
         exit(1)
 
-    with open(PURCHASES_CSV_FILE, mode="r", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row_num, row in enumerate(reader, start=2):
-            # harapkan header seperti: order_token,user_id,product_id,product_name,product_price,quantity,line_total
-            order_token_raw = row.get("order_token") or row.get("order") or row.get("order_token")
-            user_id_raw = row.get("user_id")
-            product_id_raw = row.get("product_id")
-            product_name = (row.get("product_name") or "").strip()
-            product_price_raw = row.get("product_price") or row.get("price") or "0"
-            quantity_raw = row.get("quantity") or "1"
-
-            # parse
-            order_token = parse_uuid(order_token_raw) or uuid.uuid4()
-            user_obj = get_user_by_id(user_id_raw)
-            product_obj = get_product_by_id(product_id_raw)
-            product_price = parse_int(product_price_raw, default=0)
-            quantity = parse_int(quantity_raw, default=1)
-
-            defaults = {
-                "user": user_obj,
-                "product": product_obj,
-                "product_name": product_name,
-                "product_price": product_price,
-                "quantity": quantity
-            }
-
-            try:
-                if dry_run:
-                    # hanya tampilkan apa yang akan dibuat
-                    print(f"[DRY RUN] Row {row_num}: token={order_token} user={getattr(user_obj,'pk',None)} product={getattr(product_obj,'pk',None)} name='{product_name}' price={product_price} qty={quantity}")
-                    created += 1
-                    continue
-
-                # coba get_or_create berdasarkan order_token + product(optional)
-                # jika ingin mencegah duplikat jelas, ubah lookup sesuai kebutuhan.
-                purchase, was_created = Purchase.objects.get_or_create(
-                    order_token=order_token,
-                    defaults=defaults
-                )
-
-                if was_created:
-                    created += 1
-                else:
-                    # update nilai jika ada perbedaan
-                    changed = False
-                    for k, v in defaults.items():
-                        if getattr(purchase, k) != v:
-                            setattr(purchase, k, v)
-                            changed = True
-                    if changed:
-                        purchase.save()
-                        updated += 1
-                    else:
-                        skipped += 1
-
-            except Exception as e:
-                print(f"ERROR saat memproses baris {row_num}: {e}")
-                continue
-
-    print("Selesai import purchases.csv")
-    if dry_run:
-        print(f"[DRY RUN] Baris yang akan diproses: {created}")
-    else:
-        print(f"Created: {created}, Updated: {updated}, Skipped (no change): {skipped}")
+    print("Mulai import purchases.csv")
+    return PurchaseImporter(batch_size=batch_size, dry_run=dry_run).run(read_csv(path))
 
 if __name__ == "__main__":
-    # ubah ke True jika mau cek tanpa menulis ke DB
-    DRY_RUN = False
-    import_purchases(dry_run=DRY_RUN)
+    parser = argparse.ArgumentParser(description="Import purchase dari CSV.")
+    parser.add_argument('path', nargs='?', default=PURCHASES_CSV_FILE)
+    parser.add_argument('--batch-size', type=int, default=None)
+    parser.add_argument('--dry-run', action='store_true', help="cek tanpa menulis ke DB")
+    args = parser.parse_args()
+    import_purchases(dry_run=args.dry_run, path=args.path, batch_size=args.batch_size)
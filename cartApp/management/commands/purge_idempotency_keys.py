@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from cartApp.idempotency import purge_expired
+
+
+class Command(BaseCommand):
+    help = "Hapus Idempotency-Key yang lewat TTL dan record in-progress yang ditinggalkan worker."
+
+    def handle(self, *args, **options):
+        deleted = purge_expired()
+        self.stdout.write(self.style.SUCCESS(f"{deleted} idempotency key dihapus."))
@@ -0,0 +1,29 @@
+from django.db import migrations
+from django.utils import timezone
+
+
+def record_purchased_products(apps, schema_editor):
+    Purchase = apps.get_model('cartApp', 'Purchase')
+    PurchasedProduct = apps.get_model('cartApp', 'PurchasedProduct')
+    # Purchase belum punya waktu pembelian; pembelian lama dicatat dengan waktu migrasi
+    now = timezone.now()
+    pairs = (
+        Purchase.objects.filter(user__isnull=False, product__isnull=False)
+        .order_by().values_list('user_id', 'product_id').distinct()
+    )
+    PurchasedProduct.objects.bulk_create(
+        (PurchasedProduct(user_id=user_id, product_id=product_id, first_purchased_at=now)
+         for user_id, product_id in pairs.iterator()),
+        batch_size=1000, ignore_conflicts=True,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cartApp', '0005_purchasedproduct'),
+    ]
+
+    operations = [
+        migrations.RunPython(record_purchased_products, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-17 20:06
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cartApp', '0006_backfill_purchased_products'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='purchase',
+            name='created_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AddIndex(
+            model_name='purchase',
+            index=models.Index(fields=['user', 'created_at', 'order_token'], name='cartApp_pur_user_id_47d443_idx'),
+        ),
+    ]
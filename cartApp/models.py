@@ -2,7 +2,9 @@
 import uuid
 from django.db import models
 from django.conf import settings
-from django.db.models import F
+from django.db.models import Count, ExpressionWrapper, F, IntegerField, Q, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
 from merchandiseApp.models import Merchandise
 
 User = settings.AUTH_USER_MODEL
@@ -16,11 +18,26 @@ class Cart(models.Model):
             return f"Cart(user={self.user})"
         return f"Cart(session={self.session_key})"
 
+    def summary(self):
+        """
+        Subtotal item terpilih, total quantity, jumlah item, dan jumlah item terpilih
+        dalam satu query agregat. Harga mengikuti line_total(): harga produk kalau
+        produknya masih ada, selain itu product_price yang disimpan di CartItem.
+        """
+        price = Coalesce(F('product__price'), F('product_price'), Value(0))
+        line_total = ExpressionWrapper(F('quantity') * price, output_field=IntegerField())
+        return self.items.aggregate(
+            subtotal=Coalesce(Sum(line_total, filter=Q(selected=True)), Value(0)),
+            total_items=Coalesce(Sum('quantity'), Value(0)),
+            item_count=Count('id'),
+            selected_count=Count('id', filter=Q(selected=True)),
+        )
+
     def total_items(self):
-        return sum(item.quantity for item in self.items.all())
+        return self.summary()['total_items']
 
     def subtotal(self):
-        return sum(item.line_total() for item in self.items.filter(selected=True))
+        return self.summary()['subtotal']
 
 
 class CartItem(models.Model):
@@ -54,6 +71,8 @@ class Purchase(models.Model):
     product_name = models.CharField(max_length=255, blank=True)
     product_price = models.IntegerField(default=0)
     quantity = models.PositiveIntegerField(default=1)
+    # semua baris satu pesanan memakai waktu yang sama, jadi (created_at, order_token) mengelompokkan pesanan
+    created_at = models.DateTimeField(default=timezone.now)
 
     class Meta:
         ordering = ["-id"]
@@ -61,11 +80,91 @@ class Purchase(models.Model):
             models.Index(fields=["user", "product"]),
             models.Index(fields=["product"]),
             models.Index(fields=["order_token"]),
+            models.Index(fields=["user", "created_at", "order_token"]),
         ]
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # pasangan (user, produk) yang sudah tercatat, supaya save() biasa tidak menulis PurchasedProduct lagi
+        instance._recorded_pair = (instance.__dict__.get('user_id'), instance.__dict__.get('product_id'))
+        return instance
+
+    def save(self, *args, **kwargs):
+        pair = (self.user_id, self.product_id)
+        changed = self._state.adding or pair != getattr(self, '_recorded_pair', None)
+        super().save(*args, **kwargs)
+        if changed:
+            PurchasedProduct.record([self])
+            self._recorded_pair = pair
+
     def line_total(self):
         return (self.product_price or (self.product.price if self.product else 0)) * self.quantity
 
     def __str__(self):
         name = self.product.name if self.product else (self.product_name or "Unknown")
         return f"Purchase {self.order_token} - {name} x{self.quantity}"
+
+
+class PurchasedProduct(models.Model):
+    """
+    Satu baris per (user, produk) yang pernah dibeli, supaya kelayakan review cukup dicek
+    dengan satu lookup index unik. Diisi Purchase.save(), dan untuk bulk_create (checkout,
+    import purchase, data sintetis) lewat record(). Tidak dihapus saat Purchase dihapus.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="purchased_products")
+    product = models.ForeignKey(Merchandise, on_delete=models.CASCADE, related_name="purchasers")
+    first_purchased_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["user", "product"], name="unique_purchased_product"),
+        ]
+
+    def __str__(self):
+        return f"PurchasedProduct(user={self.user_id}, product={self.product_id})"
+
+    @classmethod
+    def record(cls, purchases):
+        """Catat pasangan (user, produk) dari purchase; pasangan yang sudah ada tidak diubah."""
+        first = {}
+        for p in purchases:
+            if p.user_id and p.product_id:
+                key = (p.user_id, p.product_id)
+                if key not in first or p.created_at < first[key]:
+                    first[key] = p.created_at
+        if first:
+            cls.objects.bulk_create(
+                [cls(user_id=user_id, product_id=product_id, first_purchased_at=purchased_at)
+                 for (user_id, product_id), purchased_at in first.items()],
+                ignore_conflicts=True,
+            )
+
+    @classmethod
+    def first_purchase_date(cls, user_id, product_id):
+        """Tanggal pembelian pertama, atau None kalau user belum pernah membeli produk ini."""
+        first = cls.objects.filter(user_id=user_id, product_id=product_id).values_list('first_purchased_at', flat=True).first()
+        return first.date() if first else None
+
+
+class IdempotencyKey(models.Model):
+    """
+    Hasil checkout/buy-now untuk satu Idempotency-Key dari client. Selama status_code
+    masih kosong request aslinya sedang diproses; setelah itu retry dengan key yang sama
+    menerima response yang tersimpan.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="idempotency_keys")
+    key = models.CharField(max_length=255)
+    endpoint = models.CharField(max_length=100)
+    order_token = models.UUIDField(null=True, blank=True)
+    status_code = models.PositiveSmallIntegerField(null=True, blank=True)
+    response_body = models.JSONField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["user", "key"], name="unique_idempotency_key_per_user"),
+        ]
+
+    def __str__(self):
+        return f"IdempotencyKey {self.key} ({self.endpoint})"
@@ -0,0 +1,45 @@
+"""
+Riwayat pesanan per user, dikelompokkan dari baris Purchase per order_token.
+
+Semua baris satu pesanan memakai created_at yang sama (checkout, buy-now, import, data
+sintetis), jadi pesanan = GROUP BY (created_at, order_token) dan halaman berikutnya cukup
+difilter di WHERE, bukan HAVING. Dengan index (user, created_at, order_token) database
+membaca baris user dari yang terbaru dan berhenti setelah satu halaman pesanan, jadi
+biaya satu halaman tidak bergantung pada panjang riwayat user.
+"""
+from django.db.models import Count, ExpressionWrapper, F, IntegerField, Max, Sum, Value
+from django.db.models.functions import Coalesce, NullIf
+
+from main.pagination import keyset_paginate
+
+from .models import Purchase
+
+ORDERING = ('-created_at', '-order_token')
+
+# sama dengan Purchase.line_total(): harga tersimpan, atau harga produk kalau harga tersimpan 0
+LINE_TOTAL = ExpressionWrapper(
+    F('quantity') * Coalesce(NullIf(F('product_price'), Value(0)), F('product__price'), Value(0)),
+    output_field=IntegerField(),
+)
+
+AGGREGATES = {
+    'total': Sum(LINE_TOTAL),
+    'item_count': Sum('quantity'),
+    'line_count': Count('id'),
+}
+
+
+def order_history(user, cursor=None, limit=20):
+    """Satu halaman ringkasan pesanan user, terbaru dulu. Mengembalikan (rows, next_cursor)."""
+    summaries = Purchase.objects.filter(user=user).values('created_at', 'order_token').annotate(**AGGREGATES)
+    return keyset_paginate(summaries, ORDERING, cursor=cursor, limit=limit)
+
+
+def order_detail(user, order_token):
+    """(ringkasan, baris Purchase) satu pesanan milik user, atau None kalau tidak ada."""
+    purchases = Purchase.objects.filter(user=user, order_token=order_token)
+    summary = purchases.aggregate(created_at=Max('created_at'), **AGGREGATES)
+    if not summary['line_count']:
+        return None
+    summary['order_token'] = order_token
+    return summary, list(purchases.select_related('product').order_by('id'))
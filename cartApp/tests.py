@@ -3,17 +3,32 @@ from django.test import TestCase, Client, override_settings
 from django.contrib.auth import get_user_model
 from django.urls import reverse
 from django.conf import settings
-from unittest.mock import patch, mock_open, MagicMock
+from django.core.management import call_command
+from django.utils import timezone
+from unittest.mock import patch, MagicMock
 import json
 import uuid
+from io import StringIO
 import os
 import tempfile
+from datetime import timedelta
 
-from .models import Cart, CartItem, Purchase
+from .models import Cart, CartItem, Purchase, PurchasedProduct, IdempotencyKey
+from .csv_catalog import CsvCatalog
 from merchandiseApp.models import Merchandise
 
 User = get_user_model()
 
+_CSV_TMP_DIR = tempfile.mkdtemp()
+
+
+def patch_csv_catalog(read_data):
+    """Ganti katalog CSV yang dipakai views dengan file sementara berisi read_data."""
+    path = os.path.join(_CSV_TMP_DIR, f'{uuid.uuid4()}.csv')
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(read_data)
+    return patch('cartApp.views.csv_catalog', CsvCatalog(path))
+
 
 class CartModelTest(TestCase):
     """Test Cart model methods and properties"""
@@ -45,6 +60,15 @@ class CartModelTest(TestCase):
         CartItem.objects.create(cart=self.cart, product=product2, quantity=1, selected=False)
         self.assertEqual(self.cart.subtotal(), 20000)
 
+    def test_summary_single_query_with_csv_items(self):
+        product = Merchandise.objects.create(name='Product 1', price=10000, stock=10)
+        CartItem.objects.create(cart=self.cart, product=product, quantity=2, selected=True)
+        CartItem.objects.create(cart=self.cart, product_name='CSV', product_price=5000, quantity=3, selected=True)
+        CartItem.objects.create(cart=self.cart, product=product, quantity=1, selected=False)
+        with self.assertNumQueries(1):
+            summary = self.cart.summary()
+        self.assertEqual(summary, {'subtotal': 35000, 'total_items': 6, 'item_count': 3, 'selected_count': 2})
+
 
 class CartItemModelTest(TestCase):
     """Test CartItem model methods"""
@@ -119,6 +143,33 @@ class PurchaseModelTest(TestCase):
         )
         self.assertIsNotNone(purchase.order_token)
 
+    def test_purchase_records_purchased_product_once(self):
+        Purchase.objects.create(user=self.user, product=self.product, quantity=1)
+        first = PurchasedProduct.objects.get(user=self.user, product=self.product)
+        Purchase.objects.create(user=self.user, product=self.product, quantity=2)
+        Purchase.objects.create(user=self.user, product_name='CSV Product', quantity=1)
+
+        self.assertEqual(PurchasedProduct.objects.count(), 1)
+        self.assertEqual(PurchasedProduct.objects.get().first_purchased_at, first.first_purchased_at)
+        self.assertEqual(
+            PurchasedProduct.first_purchase_date(self.user.pk, self.product.pk),
+            first.first_purchased_at.date(),
+        )
+        other = Merchandise.objects.create(name='Other', price=1000, stock=1)
+        self.assertIsNone(PurchasedProduct.first_purchase_date(self.user.pk, other.pk))
+
+    def test_resave_records_only_when_pair_changes(self):
+        purchase = Purchase.objects.create(user=self.user, product=self.product, quantity=1)
+        purchase = Purchase.objects.get(pk=purchase.pk)
+        purchase.quantity = 3
+        with self.assertNumQueries(1):  # hanya UPDATE purchase
+            purchase.save()
+
+        other = Merchandise.objects.create(name='Other', price=1000, stock=1)
+        purchase.product = other
+        purchase.save()
+        self.assertTrue(PurchasedProduct.objects.filter(user=self.user, product=other).exists())
+
 
 class CartViewsTest(TestCase):
     """Test cart views and AJAX endpoints"""
@@ -169,9 +220,8 @@ class CartViewsTest(TestCase):
         item = CartItem.objects.first()
         self.assertEqual(item.quantity, 3)
     
-    @patch('builtins.open', new_callable=mock_open, read_data='name,price,thumbnail,stock\nCSV Product,30000,http://example.com/img.jpg,5')
-    @patch('os.path.exists', return_value=True)
-    def test_add_to_cart_csv_product(self, mock_exists, mock_file):
+    @patch_csv_catalog('name,price,thumbnail,stock\nCSV Product,30000,http://example.com/img.jpg,5')
+    def test_add_to_cart_csv_product(self):
         response = self.client.post(reverse('cartApp:add_to_cart'), {
             'product_id': 'csv_0',
             'quantity': 1
@@ -354,6 +404,8 @@ class CheckoutViewTest(TestCase):
         
         # Check purchase created
         self.assertEqual(Purchase.objects.count(), 1)
+        # bulk_create di checkout tetap mencatat kelayakan review
+        self.assertTrue(PurchasedProduct.objects.filter(user=self.user, product=self.product).exists())
         
         # Check cart item deleted
         self.assertEqual(CartItem.objects.count(), 0)
@@ -404,6 +456,36 @@ class CheckoutViewTest(TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertEqual(Purchase.objects.count(), 1)
 
+    def test_checkout_insufficient_stock_rolls_back_other_products(self):
+        other = Merchandise.objects.create(name='Other Product', price=5000, stock=1)
+        cart = Cart.objects.create(user=self.user)
+        CartItem.objects.create(cart=cart, product=self.product, quantity=2, selected=True)
+        CartItem.objects.create(cart=cart, product=other, quantity=3, selected=True)
+
+        response = self.client.post(reverse('cartApp:checkout'), {
+            'address': 'Test Address',
+            'payment_method': 'gopay'
+        })
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('Not enough stock for Other Product', json.loads(response.content)['error'])
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock, 10)
+        self.assertEqual(Purchase.objects.count(), 0)
+        self.assertEqual(CartItem.objects.count(), 2)
+
+    def test_checkout_combines_quantities_per_product(self):
+        cart = Cart.objects.create(user=self.user)
+        CartItem.objects.create(cart=cart, product=self.product, quantity=6, selected=True)
+        CartItem.objects.create(cart=cart, product=self.product, quantity=5, selected=True)
+
+        response = self.client.post(reverse('cartApp:checkout'), {
+            'address': 'Test Address',
+            'payment_method': 'gopay'
+        })
+        self.assertEqual(response.status_code, 400)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock, 10)
+
 
 class BuyNowTest(TestCase):
     """Test buy now functionality"""
@@ -469,9 +551,8 @@ class BuyNowTest(TestCase):
         })
         self.assertEqual(response.status_code, 400)
     
-    @patch('builtins.open', new_callable=mock_open, read_data='name,price,thumbnail,stock\nCSV Product,40000,http://example.com/img.jpg,8')
-    @patch('os.path.exists', return_value=True)
-    def test_buy_now_csv_product(self, mock_exists, mock_file):
+    @patch_csv_catalog('name,price,thumbnail,stock\nCSV Product,40000,http://example.com/img.jpg,8')
+    def test_buy_now_csv_product(self):
         response = self.client.post(reverse('cartApp:buy_now'), {
             'product_id': 'csv_0',
             'quantity': 2
@@ -580,9 +661,8 @@ class BuyNowCheckoutFlowTest(TestCase):
         data = json.loads(response.content)
         self.assertIn('redirect_url', data)
     
-    @patch('builtins.open', new_callable=mock_open, read_data='name,price,thumbnail,stock\nProduct,50000,img.jpg,2')
-    @patch('os.path.exists', return_value=True)
-    def test_buy_now_csv_insufficient_stock(self, mock_exists, mock_file):
+    @patch_csv_catalog('name,price,thumbnail,stock\nProduct,50000,img.jpg,2')
+    def test_buy_now_csv_insufficient_stock(self):
         """Test buy now CSV product with insufficient stock"""
         response = self.client.post(reverse('cartApp:buy_now'), {
             'product_id': 'csv_0',
@@ -730,9 +810,8 @@ class AddToCartEdgeCasesTest(TestCase):
         self.user = User.objects.create_user(username='testuser', password='testpass123')
         self.client.login(username='testuser', password='testpass123')
     
-    @patch('builtins.open', new_callable=mock_open, read_data='name,price,thumbnail,stock\nProduct,30000,img.jpg,5\nProduct2,40000,img2.jpg,3')
-    @patch('os.path.exists', return_value=True)
-    def test_add_to_cart_csv_existing_item(self, mock_exists, mock_file):
+    @patch_csv_catalog('name,price,thumbnail,stock\nProduct,30000,img.jpg,5\nProduct2,40000,img2.jpg,3')
+    def test_add_to_cart_csv_existing_item(self):
         """Test adding existing CSV product to cart"""
         cart = Cart.objects.create(user=self.user)
         CartItem.objects.create(
@@ -878,3 +957,201 @@ class ProductStockFieldTest(TestCase):
         self.product.refresh_from_db()
         if hasattr(self.product, 'sold'):
             self.assertEqual(self.product.sold, 2)
+
+
+class CsvCatalogTest(TestCase):
+    """Test index merchandise.csv di memori"""
+
+    def setUp(self):
+        self.path = os.path.join(_CSV_TMP_DIR, f'{uuid.uuid4()}.csv')
+        with open(self.path, 'w', encoding='utf-8') as f:
+            f.write('name,price,thumbnail,stock\nScarf,25000.0,img.jpg,4\nCap,30000,,x\n')
+        self.catalog = CsvCatalog(self.path)
+
+    def test_lookup_by_index_and_name(self):
+        """Test lookup per index dan per nama"""
+        scarf = self.catalog.get(0)
+        self.assertEqual((scarf.name, scarf.price, scarf.stock), ('Scarf', 25000, 4))
+        self.assertEqual(self.catalog.get_by_name('Cap').index, 1)
+        self.assertEqual(self.catalog.get(1).stock, 0)
+        self.assertIsNone(self.catalog.get(2))
+        self.assertIsNone(self.catalog.get(-1))
+        self.assertIsNone(self.catalog.get_by_name('Tidak Ada'))
+
+    def test_file_parsed_once_until_changed(self):
+        """Test file hanya di-parse ulang kalau berubah"""
+        self.assertEqual(len(self.catalog), 2)
+        with patch('cartApp.csv_catalog.open', side_effect=AssertionError('parsed again')):
+            self.assertEqual(self.catalog.get(0).name, 'Scarf')
+
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write('Ball,90000,,7\n')
+        self.assertEqual(len(self.catalog), 3)
+        self.assertEqual(self.catalog.get_by_name('Ball').stock, 7)
+
+    def test_missing_file(self):
+        """Test file yang tidak ada"""
+        catalog = CsvCatalog(os.path.join(_CSV_TMP_DIR, 'tidak-ada.csv'))
+        with self.assertRaises(FileNotFoundError):
+            catalog.get(0)
+
+
+class IdempotentCheckoutTest(TestCase):
+    """Retry dengan Idempotency-Key yang sama tidak membuat pesanan baru"""
+
+    def setUp(self):
+        self.client = Client()
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.client.login(username='testuser', password='testpass123')
+        self.product = Merchandise.objects.create(name='Test Product', price=100000, stock=10)
+
+    def _checkout(self, key):
+        return self.client.post(
+            reverse('cartApp:checkout'),
+            json.dumps({'address': 'Test Address', 'payment_method': 'gopay'}),
+            content_type='application/json',
+            HTTP_IDEMPOTENCY_KEY=key,
+        )
+
+    def test_checkout_retry_replays_response(self):
+        cart = Cart.objects.create(user=self.user)
+        CartItem.objects.create(cart=cart, product=self.product, quantity=2, selected=True)
+
+        first = self._checkout('retry-1')
+        self.assertEqual(first.status_code, 201)
+        second = self._checkout('retry-1')
+        self.assertEqual(second.status_code, 201)
+        self.assertEqual(second['Idempotent-Replayed'], 'true')
+        self.assertEqual(json.loads(second.content), json.loads(first.content))
+
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock, 8)
+        self.assertEqual(Purchase.objects.count(), 1)
+        record = IdempotencyKey.objects.get(user=self.user, key='retry-1')
+        self.assertEqual(str(record.order_token), json.loads(first.content)['order_token'])
+
+    def test_buy_now_retry_replays_response(self):
+        payload = {'product_id': str(self.product.id), 'quantity': '1', 'idempotency_key': 'buy-1'}
+        first = self.client.post(reverse('cartApp:buy_now'), payload)
+        second = self.client.post(reverse('cartApp:buy_now'), payload)
+        self.assertEqual(first.status_code, 201)
+        self.assertEqual(json.loads(second.content)['order_token'], json.loads(first.content)['order_token'])
+        self.assertEqual(Purchase.objects.count(), 1)
+
+    def test_failed_request_is_not_stored(self):
+        cart = Cart.objects.create(user=self.user)
+        CartItem.objects.create(cart=cart, product=self.product, quantity=20, selected=True)
+        self.assertEqual(self._checkout('fail-1').status_code, 400)
+        self.assertFalse(IdempotencyKey.objects.filter(key='fail-1').exists())
+
+    def test_key_reused_for_other_endpoint(self):
+        cart = Cart.objects.create(user=self.user)
+        CartItem.objects.create(cart=cart, product=self.product, quantity=1, selected=True)
+        self._checkout('shared-1')
+        response = self.client.post(reverse('cartApp:buy_now'),
+                                    {'product_id': str(self.product.id), 'quantity': '1'},
+                                    HTTP_IDEMPOTENCY_KEY='shared-1')
+        self.assertEqual(response.status_code, 422)
+
+    @override_settings(IDEMPOTENCY_KEY_TTL=0)
+    def test_expired_key_is_processed_again(self):
+        payload = {'product_id': str(self.product.id), 'quantity': '1', 'idempotency_key': 'ttl-1'}
+        self.client.post(reverse('cartApp:buy_now'), payload)
+        self.client.post(reverse('cartApp:buy_now'), payload)
+        self.assertEqual(Purchase.objects.count(), 2)
+
+    def test_abandoned_in_progress_key_is_processed_again(self):
+        # worker mati di tengah request: record tertinggal tanpa status_code
+        IdempotencyKey.objects.create(user=self.user, key='stuck-1', endpoint='buy_now_ajax')
+        payload = {'product_id': str(self.product.id), 'quantity': '1', 'idempotency_key': 'stuck-1'}
+        self.assertEqual(self.client.post(reverse('cartApp:buy_now'), payload).status_code, 409)
+
+        IdempotencyKey.objects.filter(key='stuck-1').update(created_at=timezone.now() - timedelta(minutes=10))
+        self.assertEqual(self.client.post(reverse('cartApp:buy_now'), payload).status_code, 201)
+        self.assertEqual(Purchase.objects.count(), 1)
+
+    def _stale_keys(self):
+        other = User.objects.create_user(username='other', password='testpass123')
+        old = timezone.now() - timedelta(days=2)
+        IdempotencyKey.objects.create(user=other, key='old-done', endpoint='checkout_view', status_code=201)
+        IdempotencyKey.objects.create(user=other, key='old-stuck', endpoint='checkout_view')
+        IdempotencyKey.objects.create(user=other, key='fresh', endpoint='checkout_view', status_code=201)
+        IdempotencyKey.objects.filter(key__startswith='old-').update(created_at=old)
+
+    def test_purge_command_removes_expired_and_abandoned_keys(self):
+        self._stale_keys()
+        out = StringIO()
+        call_command('purge_idempotency_keys', stdout=out)
+        self.assertIn('2 idempotency key dihapus', out.getvalue())
+        self.assertEqual(list(IdempotencyKey.objects.values_list('key', flat=True)), ['fresh'])
+
+    @override_settings(IDEMPOTENCY_PURGE_INTERVAL=0)
+    def test_requests_sweep_keys_of_other_users(self):
+        self._stale_keys()
+        payload = {'product_id': str(self.product.id), 'quantity': '1', 'idempotency_key': 'sweep-1'}
+        self.client.post(reverse('cartApp:buy_now'), payload)
+        self.assertEqual(sorted(IdempotencyKey.objects.values_list('key', flat=True)), ['fresh', 'sweep-1'])
+
+
+class OrderHistoryTest(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.user = User.objects.create_user(username='buyer', password='pw12345')
+        self.other = User.objects.create_user(username='other', password='pw12345')
+        self.client.login(username='buyer', password='pw12345')
+        self.product = Merchandise.objects.create(name='Jersey', price=50000, stock=100)
+        self.base = timezone.now() - timedelta(days=10)
+
+    def _order(self, user, days, lines):
+        token = uuid.uuid4()
+        for product, name, price, qty in lines:
+            Purchase.objects.create(order_token=token, user=user, product=product, product_name=name,
+                                    product_price=price, quantity=qty, created_at=self.base + timedelta(days=days))
+        return token
+
+    def test_history_groups_orders_with_totals_and_paginates(self):
+        tokens = [self._order(self.user, day, [(self.product, 'Jersey', 50000, 2), (None, 'Scarf', 0, 1)])
+                  for day in range(5)]
+        self._order(self.other, 9, [(self.product, 'Jersey', 50000, 1)])
+
+        with self.assertNumQueries(3):  # session, user, satu halaman pesanan
+            response = self.client.get(reverse('cartApp:order_history'), {'limit': 2})
+        data = response.json()
+        self.assertEqual([o['order_token'] for o in data['results']], [str(tokens[4]), str(tokens[3])])
+        self.assertEqual(data['results'][0]['total'], 100000)
+        self.assertEqual(data['results'][0]['item_count'], 3)
+        self.assertEqual(data['results'][0]['line_count'], 2)
+
+        seen = [o['order_token'] for o in data['results']]
+        while data['next']:
+            data = self.client.get(reverse('cartApp:order_history'), {'limit': 2, 'cursor': data['next']}).json()
+            seen += [o['order_token'] for o in data['results']]
+        self.assertEqual(seen, [str(t) for t in reversed(tokens)])
+
+    def test_history_invalid_cursor(self):
+        response = self.client.get(reverse('cartApp:order_history'), {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_checkout_rows_share_one_order(self):
+        other = Merchandise.objects.create(name='Cap', price=20000, stock=5)
+        cart = Cart.objects.create(user=self.user)
+        CartItem.objects.create(cart=cart, product=self.product, quantity=1, selected=True)
+        CartItem.objects.create(cart=cart, product=other, quantity=2, selected=True)
+        self.client.post(reverse('cartApp:checkout'), {'address': 'Jl. Test', 'payment_method': 'gopay'})
+
+        results = self.client.get(reverse('cartApp:order_history')).json()['results']
+        self.assertEqual(len(results), 1)
+        self.assertEqual(results[0]['total'], 90000)
+
+    def test_order_detail(self):
+        token = self._order(self.user, 1, [(self.product, 'Jersey', 50000, 2), (None, 'Scarf', 15000, 1)])
+        response = self.client.get(reverse('cartApp:order_detail', args=[token]))
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data['total'], 115000)
+        self.assertEqual([item['product_name'] for item in data['items']], ['Jersey', 'Scarf'])
+        self.assertEqual(data['items'][0]['product_id'], str(self.product.pk))
+
+        other_token = self._order(self.other, 1, [(self.product, 'Jersey', 50000, 1)])
+        response = self.client.get(reverse('cartApp:order_detail', args=[other_token]))
+        self.assertEqual(response.status_code, 404)
@@ -19,4 +19,7 @@ urlpatterns = [
     path('toggle-all/', views.toggle_select_all, name='toggle_select_all'),
     path('checkout/', views.checkout_view, name='checkout'),
     path('buy-now/', views.buy_now_ajax, name='buy_now'),
+    path('orders/', views.order_history_json, name='order_history'),
+    path('orders/<uuid:order_token>/', views.order_detail_json, name='order_detail'),
+    path('proxy-image/', views.proxy_image, name='proxy_image'),
 ]
\ No newline at end of file
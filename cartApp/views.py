@@ -1,4 +1,4 @@
-from datetime import timezone
+from django.utils import timezone
 from django.shortcuts import render, get_object_or_404, redirect
 from django.http import HttpResponse, JsonResponse
 from django.views.decorators.http import require_POST
@@ -8,14 +8,20 @@ from django.urls import reverse
 from django.contrib.auth.decorators import login_required
 from django.core import serializers
 from functools import wraps
+from collections import defaultdict
 
 from merchandiseApp.models import Merchandise
-from .models import Cart, CartItem, Purchase
+from .models import Cart, CartItem, Purchase, PurchasedProduct
+from .csv_catalog import catalog as csv_catalog
+from .idempotency import idempotent
+from . import orders
 
 from django.conf import settings
-import csv, os, uuid, json
+import uuid, json
 from django.db.models import F
-import requests
+from django.db.models.functions import Now
+from main import image_proxy
+from main.pagination import InvalidCursor, get_page_size
 
 SHIPPING_FEE = getattr(settings, 'SHIPPING_FEE', 10000)
 SERVICE_FEE = getattr(settings, 'SERVICE_FEE', 3000)
@@ -38,6 +44,29 @@ def _is_json_request(request):
             'application/json' in content_type or
             request.GET.get('format') == 'json')
 
+def _cart_totals(cart):
+    summary = cart.summary()
+    return {'cart_subtotal': summary['subtotal'], 'total_items': summary['total_items'],
+            'selected_count': summary['selected_count']}
+
+def _reserve_stock(quantities):
+    """
+    Kurangi stok untuk {product_id: quantity} dengan satu UPDATE bersyarat per produk
+    (stock = stock - qty WHERE stock >= qty). Harus dipanggil di dalam transaction.atomic();
+    ValueError dilempar kalau stok tidak cukup sehingga transaksi di-rollback.
+    """
+    # urutan tetap supaya dua checkout yang berisi produk sama tidak saling deadlock
+    for product_id in sorted(quantities, key=str):
+        qty = quantities[product_id]
+        updated = Merchandise.objects.filter(pk=product_id, stock__gte=qty).update(
+            stock=F('stock') - qty, updated_at=Now())
+        if not updated:
+            row = Merchandise.objects.filter(pk=product_id).values_list('name', 'stock').first()
+            if row is None:
+                raise ValueError(f'Product {product_id} not found')
+            name, stock = row
+            raise ValueError(f'Not enough stock for {name}. Available: {stock}, Requested: {qty}')
+
 def _get_request_data(request):
     if request.content_type == 'application/json':
         try:
@@ -54,7 +83,7 @@ def cart_page(request):
     request.session.pop('buy_now', None)
     request.session.pop('last_order_token', None)
     request.session.pop('last_order_summary', None)
-    total_price = sum(item.line_total() for item in cart_items if item.selected)
+    summary = cart.summary()
 
     if _is_json_request(request):
         items_data = []
@@ -64,7 +93,7 @@ def cart_page(request):
                 'model': 'cartApp.cartitem',
                 'pk': item.id,
                 'fields': {
-                    'cart': item.cart.id,
+                    'cart': item.cart_id,
                     'product': str(item.product.id) if item.product else None,
                     'product_name': item.product_name or (item.product.name if item.product else 'Unknown Product'),
                     'product_price': item.product_price or (item.product.price if item.product else 0),
@@ -76,14 +105,15 @@ def cart_page(request):
             })
         return JsonResponse({
             'items': items_data,
-            'cart_subtotal': cart.subtotal(),
-            'total_items': cart.total_items(),
-            'selected_count': cart_items.filter(selected=True).count(),
-            'total_price': total_price
+            'cart_subtotal': summary['subtotal'],
+            'total_items': summary['total_items'],
+            'selected_count': summary['selected_count'],
+            'total_price': summary['subtotal']
         })
 
-    context = {'cart': cart, 'cart_items': cart_items, 'cart_count': cart_items.count(),
-               'total_price': total_price, 'selected_count': cart_items.filter(selected=True).count()}
+    context = {'cart': cart, 'cart_items': cart_items, 'cart_count': summary['item_count'],
+               'total_price': summary['subtotal'], 'selected_count': summary['selected_count'],
+               'cart_summary': summary}
     return render(request, 'cart.html', context)
 
 @csrf_exempt
@@ -148,8 +178,7 @@ def add_to_cart_ajax(request):
             'success': True, 
             'message': 'Added to cart', 
             'item_id': item.id,
-            'cart_subtotal': cart.subtotal(), 
-            'total_items': cart.total_items()
+            **_cart_totals(cart)
         })
     except (ValueError, Merchandise.DoesNotExist):
         pass
@@ -162,26 +191,17 @@ def add_to_cart_ajax(request):
     except Exception:
         return JsonResponse({'error': 'Invalid product_id'}, status=400)
 
-    csv_path = os.path.join(settings.BASE_DIR, 'merchandise.csv')
-    if not os.path.exists(csv_path):
+    try:
+        row = csv_catalog.get(idx)
+    except FileNotFoundError:
         return JsonResponse({'error': 'CSV not found'}, status=500)
-    with open(csv_path, newline='', encoding='utf-8') as f:
-        rows = list(csv.DictReader(f))
-    if idx < 0 or idx >= len(rows):
+    if row is None:
         return JsonResponse({'error': 'Product not found'}, status=404)
 
-    row = rows[idx]
-    name = row.get('name') or 'Unknown'
-    try:
-        price = int(float(row.get('price') or 0))
-    except:
-        price = 0
-    thumbnail = row.get('thumbnail') or ''
-    stock = row.get('stock') or row.get('Stock') or row.get('stok') or 0
-    try:
-        stock = int(stock)
-    except:
-        stock = 0
+    name = row.name or 'Unknown'
+    price = row.price
+    thumbnail = row.thumbnail
+    stock = row.stock
 
     item_qs = cart.items.filter(product_name=name)
     if item_qs.exists():
@@ -205,8 +225,7 @@ def add_to_cart_ajax(request):
         'success': True, 
         'message': 'Added to cart', 
         'item_id': item.id,
-        'cart_subtotal': cart.subtotal(), 
-        'total_items': cart.total_items()
+        **_cart_totals(cart)
     })
 
 @csrf_exempt
@@ -217,7 +236,7 @@ def update_cart_item_ajax(request, item_id):
     data = _get_request_data(request)
     action = data.get('action')
     cart = _get_cart_for_request(request)
-    item = get_object_or_404(CartItem, pk=item_id, cart=cart)
+    item = get_object_or_404(CartItem.objects.select_related('product'), pk=item_id, cart=cart)
 
     def get_item_stock(it):
         if it.product:
@@ -235,8 +254,7 @@ def update_cart_item_ajax(request, item_id):
             elif action == 'dec':
                 if item.quantity <= 1:
                     item.delete()
-                    return JsonResponse({'success': True, 'message': 'Deleted', 'quantity': 0,
-                                         'cart_subtotal': cart.subtotal(), 'total_items': cart.total_items()})
+                    return JsonResponse({'success': True, 'message': 'Deleted', 'quantity': 0, **_cart_totals(cart)})
                 CartItem.objects.filter(pk=item.pk).update(quantity=F('quantity') - 1)
                 item.refresh_from_db()
             elif action == 'set':
@@ -246,8 +264,7 @@ def update_cart_item_ajax(request, item_id):
                     return JsonResponse({'error': 'Invalid quantity'}, status=400)
                 if q <= 0:
                     item.delete()
-                    return JsonResponse({'success': True, 'message': 'Deleted', 'quantity': 0,
-                                         'cart_subtotal': cart.subtotal(), 'total_items': cart.total_items()})
+                    return JsonResponse({'success': True, 'message': 'Deleted', 'quantity': 0, **_cart_totals(cart)})
                 stock = get_item_stock(item)
                 if q > stock:
                     return JsonResponse({'error': 'Not enough stock'}, status=400)
@@ -259,7 +276,7 @@ def update_cart_item_ajax(request, item_id):
         return JsonResponse({'error': str(e)}, status=500)
 
     return JsonResponse({'success': True, 'message': 'Updated', 'quantity': item.quantity, 
-                         'line_total': item.line_total(), 'cart_subtotal': cart.subtotal(), 'total_items': cart.total_items()})
+                         'line_total': item.line_total(), **_cart_totals(cart)})
 
 @csrf_exempt
 @login_required
@@ -270,7 +287,7 @@ def toggle_select_ajax(request, item_id):
     item = get_object_or_404(CartItem, pk=item_id, cart=cart)
     item.selected = not item.selected
     item.save()
-    return JsonResponse({'success': True, 'message': 'Toggled', 'selected': item.selected, 'cart_subtotal': cart.subtotal()})
+    return JsonResponse({'success': True, 'message': 'Toggled', 'selected': item.selected, **_cart_totals(cart)})
 
 @csrf_exempt
 @login_required
@@ -281,7 +298,7 @@ def toggle_select_all(request):
     selected = data.get('selected') == 'true' or data.get('selected') == True
     cart = _get_cart_for_request(request)
     CartItem.objects.filter(cart=cart).update(selected=selected)
-    return JsonResponse({'success': True, 'message': 'All items toggled', 'selected': selected})
+    return JsonResponse({'success': True, 'message': 'All items toggled', 'selected': selected, **_cart_totals(cart)})
 
 @csrf_exempt
 @login_required
@@ -291,10 +308,11 @@ def delete_item_ajax(request, item_id):
     cart = _get_cart_for_request(request)
     item = get_object_or_404(CartItem, pk=item_id, cart=cart)
     item.delete()
-    return JsonResponse({'success': True, 'message': 'Deleted', 'cart_subtotal': cart.subtotal(), 'total_items': cart.total_items()})
+    return JsonResponse({'success': True, 'message': 'Deleted', **_cart_totals(cart)})
 
 @csrf_exempt
 @login_required
+@idempotent
 def checkout_view(request):
     cart = _get_cart_for_request(request)
     buy_now = request.session.get('buy_now', False)
@@ -351,17 +369,13 @@ def checkout_view(request):
         if not payment_method:
             return JsonResponse({'success': False, 'error': 'Payment method is required'}, status=400)
         
+        quantities = defaultdict(int)
+        for purchase in purchases:
+            if purchase.product_id:
+                quantities[purchase.product_id] += purchase.quantity
         try:
             with transaction.atomic():
-                for purchase in purchases:
-                    if purchase.product:
-                        product = Merchandise.objects.select_for_update().get(pk=purchase.product.id)
-                        if purchase.quantity > getattr(product, 'stock', 0):
-                            raise ValueError(f'Not enough stock for {product.name}. Available: {getattr(product, "stock", 0)}, Requested: {purchase.quantity}')
-                        product.stock = (product.stock or 0) - purchase.quantity
-                        if hasattr(product, 'sold'):
-                            product.sold = (product.sold or 0) + purchase.quantity
-                        product.save()
+                _reserve_stock(quantities)
         except ValueError as e:
             return JsonResponse({'success': False, 'error': str(e)}, status=400)
         except Exception as e:
@@ -405,73 +419,64 @@ def checkout_view(request):
     if not selected_items.exists():
         return JsonResponse({'success': False, 'error': 'No items selected for checkout'}, status=400)
 
+    # semua data pesanan disiapkan sebelum transaksi supaya lock stok dipegang sesingkat mungkin
+    selected_items = list(selected_items.select_related('product'))
+    order_token = uuid.uuid4()
+    ordered_at = timezone.now()
+    user = request.user if request.user.is_authenticated else None
+    quantities = defaultdict(int)
+    purchases = []
+    purchased_ids = []
+    purchased_summary_total = 0
+    purchased_items = []
+
+    for it in selected_items:
+        if it.product:
+            purchased_ids.append(str(it.product.id))
+            price = getattr(it.product, 'price', 0) or 0
+            product_obj = it.product
+            name = getattr(product_obj, 'name', '') or ''
+            quantities[product_obj.id] += it.quantity
+        else:
+            purchased_ids.append(f"csv:{it.product_name}")
+            price = it.product_price or 0
+            product_obj = None
+            name = it.product_name or ""
+
+        purchases.append(Purchase(
+            order_token=order_token,
+            user=user,
+            product=product_obj,
+            product_name=name,
+            product_price=price,
+            quantity=it.quantity,
+            created_at=ordered_at,
+        ))
+
+        purchased_summary_total += (price * it.quantity)
+        purchased_items.append({
+            'product_name': name,
+            'quantity': it.quantity,
+            'price': price,
+            'line_total': price * it.quantity
+        })
+
     try:
         with transaction.atomic():
-            product_items = [it for it in selected_items if it.product]
-            product_ids = [it.product.id for it in product_items]
-            products = Merchandise.objects.select_for_update().filter(id__in=product_ids)
-            prod_map = {p.id: p for p in products}
-            
-            for item in product_items:
-                p = prod_map.get(item.product.id)
-                if p is None:
-                    raise ValueError(f"Product {item.product_name} not found")
-                current_stock = getattr(p, 'stock', 0)
-                if item.quantity > current_stock:
-                    raise ValueError(f'Not enough stock for {p.name}. Available: {current_stock}, Requested: {item.quantity}')
-            
-            for item in product_items:
-                p = prod_map[item.product.id]
-                p.stock = (p.stock or 0) - item.quantity
-                if hasattr(p, 'sold'):
-                    p.sold = (p.sold or 0) + item.quantity
-                p.save()
-            
-            order_token = uuid.uuid4()
-            purchased_ids = []
-            purchased_summary_total = 0
-            purchased_items = []
-            
-            for it in list(selected_items):
-                if it.product:
-                    purchased_ids.append(str(it.product.id))
-                    price = getattr(it.product, 'price', 0) or 0
-                    product_obj = it.product
-                    name = getattr(product_obj, 'name', '') or ''
-                else:
-                    purchased_ids.append(f"csv:{it.product_name}")
-                    price = it.product_price or 0
-                    product_obj = None
-                    name = it.product_name or ""
-                
-                Purchase.objects.create(
-                    order_token=order_token, 
-                    user=request.user if request.user.is_authenticated else None,
-                    product=product_obj, 
-                    product_name=name, 
-                    product_price=price, 
-                    quantity=it.quantity
-                )
-                
-                purchased_summary_total += (price * it.quantity)
-                purchased_items.append({
-                    'product_name': name, 
-                    'quantity': it.quantity, 
-                    'price': price, 
-                    'line_total': price * it.quantity
-                })
-                it.delete()
-            
-            request.session['just_ordered'] = True
-            request.session['last_order_token'] = str(order_token)
-            request.session['last_order_products'] = purchased_ids
-            request.session['last_order_summary'] = {'total': int(purchased_summary_total), 'count': len(purchased_ids)}
-    
+            _reserve_stock(quantities)
+            Purchase.objects.bulk_create(purchases)
+            PurchasedProduct.record(purchases)  # bulk_create tidak lewat Purchase.save()
+            CartItem.objects.filter(pk__in=[it.pk for it in selected_items]).delete()
     except ValueError as e:
         return JsonResponse({'success': False, 'error': str(e)}, status=400)
     except Exception as e:
         return JsonResponse({'success': False, 'error': f'Checkout failed: {str(e)}'}, status=500)
 
+    request.session['just_ordered'] = True
+    request.session['last_order_token'] = str(order_token)
+    request.session['last_order_products'] = purchased_ids
+    request.session['last_order_summary'] = {'total': int(purchased_summary_total), 'count': len(purchased_ids)}
+
     grand_total = purchased_summary_total + SHIPPING_FEE + SERVICE_FEE
 
     if _is_json_request(request):
@@ -490,6 +495,7 @@ def checkout_view(request):
 
 @csrf_exempt
 @login_required
+@idempotent
 def buy_now_ajax(request):
     if request.method != 'POST':
         return JsonResponse({'success': False, 'error': 'Method not allowed'}, status=405)
@@ -553,7 +559,6 @@ def buy_now_ajax(request):
         pass
 
     # Try CSV-based product
-    csv_path = os.path.join(settings.BASE_DIR, 'merchandise.csv')
     try:
         idx = str(product_id_raw)
         if idx.startswith("csv_"):
@@ -562,26 +567,16 @@ def buy_now_ajax(request):
     except Exception:
         return JsonResponse({'success': False, 'message': 'product not found'}, status=404)
     
-    if not os.path.exists(csv_path):
+    try:
+        row = csv_catalog.get(idx)
+    except FileNotFoundError:
         return JsonResponse({'success': False, 'message': 'csv not found'}, status=500)
     
-    with open(csv_path, newline='', encoding='utf-8') as f:
-        rows = list(csv.DictReader(f))
-    
-    if idx < 0 or idx >= len(rows):
+    if row is None:
         return JsonResponse({'success': False, 'message': 'product not found'}, status=404)
     
-    row = rows[idx]
-    try:
-        price = int(float(row.get('price') or 0))
-    except:
-        price = 0
-    
-    stock = row.get('stock') or row.get('Stock') or row.get('stok') or 0
-    try:
-        stock = int(stock)
-    except:
-        stock = 0
+    price = row.price
+    stock = row.stock
     
     if qty > stock:
         return JsonResponse({'success': False, 'message': 'Not enough stock'}, status=400)
@@ -591,14 +586,14 @@ def buy_now_ajax(request):
         order_token=order_token, 
         user=request.user, 
         product=None,
-        product_name=row.get('name') or '', 
+        product_name=row.name, 
         product_price=price, 
         quantity=qty
     )
     
     request.session['just_ordered'] = True
     request.session['last_order_token'] = str(order_token)
-    request.session['last_order_products'] = [f"csv:{row.get('name')}"]
+    request.session['last_order_products'] = [f"csv:{row.name}"]
     request.session['last_order_summary'] = {'total': int(price * qty), 'count': 1}
     request.session['buy_now'] = True
     
@@ -607,7 +602,7 @@ def buy_now_ajax(request):
         'message': 'Buy now successful', 
         'order_token': str(order_token),
         'redirect_url': reverse('cartApp:checkout'),  # for web compatibility
-        'product_name': row.get('name') or '', 
+        'product_name': row.name, 
         'quantity': qty, 
         'total': int(price * qty)
     }, status=201)
@@ -759,23 +754,46 @@ def show_checkout_json(request):
         'is_buy_now': False
     })
 
+def _order_json(summary):
+    return {
+        'order_token': str(summary['order_token']),
+        'created_at': summary['created_at'].isoformat(),
+        'total': summary['total'] or 0,
+        'item_count': summary['item_count'] or 0,
+        'line_count': summary['line_count'],
+    }
+
+@login_required
+def order_history_json(request):
+    """Riwayat pesanan user (satu entry per order_token), terbaru dulu; ?cursor=&limit= untuk halaman."""
+    try:
+        rows, next_cursor = orders.order_history(
+            request.user, cursor=request.GET.get('cursor'), limit=get_page_size(request),
+        )
+    except InvalidCursor:
+        return JsonResponse({'error': 'Invalid cursor'}, status=400)
+    return JsonResponse({'results': [_order_json(row) for row in rows], 'next': next_cursor})
+
+@login_required
+def order_detail_json(request, order_token):
+    order = orders.order_detail(request.user, order_token)
+    if order is None:
+        return JsonResponse({'error': 'Order not found'}, status=404)
+    summary, purchases = order
+    data = _order_json(summary)
+    data['items'] = [{
+        'product_id': str(p.product_id) if p.product_id else None,
+        'product_name': p.product.name if p.product else p.product_name,
+        'price': p.product_price or (p.product.price if p.product else 0),
+        'quantity': p.quantity,
+        'line_total': p.line_total(),
+    } for p in purchases]
+    return JsonResponse(data)
+
 @csrf_exempt
 @login_required
 def toggle_select_item_ajax(request, item_id):
     return toggle_select_ajax(request, item_id)
 
 def proxy_image(request):
-    image_url = request.GET.get('url')
-    if not image_url:
-        return HttpResponse('No URL provided', status=400)
-    
-    try:
-        response = requests.get(image_url, timeout=10)
-        response.raise_for_status()
-        
-        return HttpResponse(
-            response.content,
-            content_type=response.headers.get('Content-Type', 'image/jpeg')
-        )
-    except requests.RequestException as e:
-        return HttpResponse(f'Error fetching image: {str(e)}', status=500)
\ No newline at end of file
+    return image_proxy.serve(request)
\ No newline at end of file
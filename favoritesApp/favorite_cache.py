@@ -0,0 +1,41 @@
+"""
+Map merchandise_id -> favorite_id per user di cache Django, dipakai check_favorite dan
+favorite_status supaya status favorit satu grid produk cukup diambil dari satu entry cache
+(atau satu query kalau belum ada di cache).
+
+Entry dibuang setiap ada tulis ke Favorite (signal di models.py, plus invalidate() manual
+setelah bulk_create), bukan diubah di tempat, supaya dua request bersamaan dari user yang
+sama tidak saling menimpa. Dengan cache bersama (Redis/Memcached) semua worker langsung
+melihat perubahan; dengan LocMem bawaan, FAVORITE_CACHE_TTL membatasi berapa lama worker
+lain bisa tertinggal.
+"""
+from django.conf import settings
+from django.core.cache import cache
+
+KEY = 'favoritesApp:favorite_ids:{user_id}'
+
+
+def _key(user_id):
+    return KEY.format(user_id=user_id)
+
+
+def favorite_ids(user_id):
+    """{merchandise_id: favorite_id} (keduanya string) untuk semua favorit user."""
+    key = _key(user_id)
+    ids = cache.get(key)
+    if ids is None:
+        from favoritesApp.models import Favorite
+        ids = {
+            str(merchandise_id): str(pk)
+            for merchandise_id, pk in Favorite.objects.filter(user_id=user_id).values_list('merchandise_id', 'pk')
+        }
+        cache.set(key, ids, getattr(settings, 'FAVORITE_CACHE_TTL', 60))
+    return ids
+
+
+def invalidate(user_id):
+    cache.delete(_key(user_id))
+
+
+def invalidate_many(user_ids):
+    cache.delete_many([_key(user_id) for user_id in user_ids])
@@ -7,10 +7,12 @@ dan pastikan created_at disimpan sebagai timezone-aware datetime
 Expected CSV header: id,user,merchandise,created_at
 Put the CSV file next to this script or set CSV_FILE path below.
 """
+import argparse
 import os
 import django
 import random
 import uuid
+from collections import Counter
 from pathlib import Path
 import sys
 from datetime import datetime
@@ -41,6 +43,8 @@ try:
     from django.contrib.auth import get_user_model
     from favoritesApp.models import Favorite
     from merchandiseApp.models import Merchandise
+    from favoritesApp import favorite_cache, leaderboard
+    from main.bulk_import import BulkImporter, RowError, read_csv
 except Exception as e:
     print(f"ERROR: Gagal impor model. {e}")
     sys.exit(1)
@@ -62,6 +66,13 @@ def parse_datetime(dt_str):
         return None
 
 
+def parse_uuid(val):
+    try:
+        return uuid.UUID(val)
+    except Exception:
+        return None
+
+
 def make_aware_if_needed(dt):
     """Convert naive datetime to aware using current timezone if USE_TZ=True."""
     if not dt:
@@ -75,173 +86,140 @@ def make_aware_if_needed(dt):
     return dt
 
 
-def get_or_create_user(username):
-    if not username:
-        return None
-    try:
-        user, created = User.objects.get_or_create(username=username)
-        if created:
-            try:
-                user.set_unusable_password()
-                user.save()
-            except Exception:
-                # ignore save issues for custom user models
-                pass
-        return user
-    except Exception as e:
-        print(f"[WARN] Gagal mendapatkan/membuat user '{username}': {e}")
-        return None
-
-
-def create_placeholder_merchandise(name):
+class FavoriteImporter(BulkImporter):
     """
-    Buat Merchandise placeholder dengan beberapa field safe.
-    Isi beberapa field umum: name, price, stock, thumbnail jika tersedia.
+    Favorite baru ditulis dengan ignore_conflicts pada (user, merchandise). User dan
+    placeholder Merchandise yang belum ada dikumpulkan saat membaca batch lalu dibuat
+    sekaligus sebelum favoritenya ditulis.
     """
-    if not name:
-        return None
-    name = name.strip()
-    # try find first
-    try:
-        m = Merchandise.objects.filter(name__iexact=name).first()
-        if m:
-            return m
-        m = Merchandise.objects.filter(name__icontains=name).first()
-        if m:
-            return m
-    except Exception:
-        pass
-
-    # prepare kwargs depending on model fields
-    create_kwargs = {'name': name}
-    try:
-        field_names = [f.name for f in Merchandise._meta.get_fields()]
-    except Exception:
-        field_names = []
-
-    # sensible defaults
-    if 'price' in field_names:
-        create_kwargs['price'] = random.randint(50000, 350000)
-    if 'stock' in field_names:
-        create_kwargs['stock'] = random.randint(1, 100)
-    if 'thumbnail' in field_names:
-        create_kwargs['thumbnail'] = '/static/image/no-thumbnail.png'
+    model = Favorite
+
+    def prefetch(self):
+        self.users = {u.username: u for u in User.objects.only('pk', 'username')}
+        self.merch_by_pk = {}
+        self.merch_by_name = {}
+        for merch in Merchandise.objects.only('pk', 'name').order_by('pk'):
+            self.merch_by_pk[merch.pk] = merch
+            self.merch_by_name.setdefault(merch.name.lower(), merch)
+        self.existing = {
+            (user_id, merch_id): pk
+            for pk, user_id, merch_id in Favorite.objects.values_list('pk', 'user_id', 'merchandise_id')
+        }
+        self.existing_ids = set(self.existing.values())
+        self.new_users = []
+        self.new_merchandise = []
+        self.created_count = 0
+        self.updated_created_at = 0
+        self.touched_users = set()
+
+    def get_user(self, username):
+        user = self.users.get(username)
+        if user is None:
+            user = User(username=username)
+            user.set_unusable_password()
+            self.users[username] = user
+            self.new_users.append(user)
+        return user
 
-    try:
-        merch = Merchandise.objects.create(**create_kwargs)
+    def find_merchandise(self, name):
+        possible_uuid = parse_uuid(name)
+        if possible_uuid in self.merch_by_pk:
+            return self.merch_by_pk[possible_uuid]
+        lowered = name.lower()
+        if lowered in self.merch_by_name:
+            return self.merch_by_name[lowered]
+        # fallback icontains, dicari di map yang sudah di-prefetch (bukan query per baris)
+        for merch_name, merch in self.merch_by_name.items():
+            if lowered in merch_name:
+                self.merch_by_name[lowered] = merch
+                return merch
+        merch = Merchandise(
+            name=name,
+            price=random.randint(50000, 350000),
+            stock=random.randint(1, 100),
+            thumbnail='/static/image/no-thumbnail.png',
+        )
+        self.merch_by_pk[merch.pk] = merch
+        self.merch_by_name[lowered] = merch
+        self.new_merchandise.append(merch)
         print(f"[MERCH CREATED] {merch.pk} - {merch.name}")
         return merch
-    except Exception as e:
-        print(f"[WARN] Gagal membuat placeholder Merchandise '{name}': {e}")
-        return None
 
-
-def import_favorites_from_csv(csv_path):
-    if not csv_path.exists():
+    def build(self, row):
+        user_name = row.get('user') or row.get('username') or ''
+        merch_val = row.get('merchandise') or row.get('merch') or ''
+        if not user_name:
+            raise RowError(f"user '{user_name}' tidak dapat dibuat/ditemukan.")
+        if not merch_val:
+            raise RowError(f"gagal membuat/menemukan merchandise untuk '{merch_val}'.")
+
+        favorite = Favorite(
+            id=parse_uuid(row.get('id') or '') or uuid.uuid4(),
+            user=self.get_user(user_name),
+            merchandise=self.find_merchandise(merch_val),
+        )
+        favorite.imported_created_at = make_aware_if_needed(parse_datetime(row.get('created_at') or row.get('created') or ''))
+        return favorite
+
+    def key(self, obj):
+        return (obj.user.username, obj.merchandise.pk)
+
+    def write(self, objs):
+        if self.new_users:
+            User.objects.bulk_create(self.new_users, batch_size=self.batch_size)
+            self.new_users = []
+        if self.new_merchandise:
+            Merchandise.objects.bulk_create(self.new_merchandise, batch_size=self.batch_size)
+            self.new_merchandise = []
+
+        new = []
+        for fav in objs:
+            # bulk_create tidak mengisi FK id dari objek yang baru saja dibuat di atas
+            fav.user_id, fav.merchandise_id = fav.user.pk, fav.merchandise.pk
+            existing = self.existing.get((fav.user_id, fav.merchandise_id))
+            if existing is None:
+                if fav.pk in self.existing_ids:
+                    fav.pk = uuid.uuid4()  # id dari CSV sudah dipakai favorite lain
+                new.append(fav)
+                self.existing_ids.add(fav.pk)
+                self.existing[(fav.user_id, fav.merchandise_id)] = fav.pk
+            else:
+                fav.pk = existing
+        Favorite.objects.bulk_create(new, batch_size=self.batch_size, ignore_conflicts=True)
+        self.created_count += len(new)
+        self.touched_users.update(fav.user_id for fav in new)
+        leaderboard.apply_change(Counter(fav.merchandise_id for fav in new))
+
+        # created_at auto_now_add selalu di-override saat insert, jadi tanggal dari CSV di-update terpisah
+        dated = []
+        for fav in objs:
+            if fav.imported_created_at:
+                fav.created_at = fav.imported_created_at
+                dated.append(fav)
+        Favorite.objects.bulk_update(dated, ['created_at'], batch_size=self.batch_size)
+        self.updated_created_at += len(dated)
+
+    def finish(self):
+        favorite_cache.invalidate_many(self.touched_users)
+
+
+def import_favorites_from_csv(csv_path, batch_size=None):
+    if not Path(csv_path).exists():
         print(f"ERROR: File '{csv_path}' tidak ditemukan. Pastikan path benar.")
-        return
-
-    created = 0
-    skipped = 0
-    updated_created_at = 0
-
-    with open(csv_path, mode='r', encoding='utf-8') as f:
-        header = f.readline().strip().split(',')
-        header = [h.strip().lower() for h in header]
-        for lineno, raw in enumerate(f, start=2):
-            line = raw.strip()
-            if not line:
-                continue
-            parts = [p.strip() for p in line.split(',')]
-            if len(parts) < 2:
-                print(f"[SKIP] baris {lineno}: format tidak lengkap -> {line}")
-                skipped += 1
-                continue
-
-            row = {}
-            for i, col in enumerate(header):
-                row[col] = parts[i] if i < len(parts) else ''
-
-            user_name = row.get('user') or row.get('username') or ''
-            merch_val = row.get('merchandise') or row.get('merch') or ''
-            id_val = row.get('id') or ''
-            created_at_val = row.get('created_at') or row.get('created') or ''
-
-            # user
-            user_obj = get_or_create_user(user_name)
-            if user_obj is None:
-                print(f"[SKIP] baris {lineno}: user '{user_name}' tidak dapat dibuat/ditemukan.")
-                skipped += 1
-                continue
-
-            # merchandise: try pk -> name -> create placeholder
-            merch_obj = None
-            if merch_val:
-                try:
-                    possible_uuid = uuid.UUID(merch_val)
-                    merch_obj = Merchandise.objects.filter(pk=possible_uuid).first()
-                except Exception:
-                    merch_obj = None
-
-            if merch_obj is None:
-                try:
-                    merch_obj = Merchandise.objects.filter(name__iexact=merch_val).first()
-                except Exception:
-                    merch_obj = None
-
-            if merch_obj is None:
-                merch_obj = create_placeholder_merchandise(merch_val)
-                if merch_obj is None:
-                    print(f"[SKIP] baris {lineno}: gagal membuat/menemukan merchandise untuk '{merch_val}'.")
-                    skipped += 1
-                    continue
-
-            # prepare favorite id (optional)
-            fav_uuid = None
-            if id_val:
-                try:
-                    fav_uuid = uuid.UUID(id_val)
-                except Exception:
-                    fav_uuid = None
-
-            # create or get favorite
-            try:
-                fav_kwargs = {'user': user_obj, 'merchandise': merch_obj}
-                favorite, created_new = Favorite.objects.get_or_create(**fav_kwargs, defaults={})
-                # try set id if provided and we just created the instance
-                if created_new and fav_uuid:
-                    try:
-                        Favorite.objects.filter(pk=favorite.pk).update(id=str(fav_uuid))
-                        favorite = Favorite.objects.get(pk=str(fav_uuid))
-                    except Exception:
-                        pass
-
-                # set created_at if provided (make aware if needed)
-                if created_at_val:
-                    dt = parse_datetime(created_at_val)
-                    if dt:
-                        dt = make_aware_if_needed(dt)
-                        try:
-                            Favorite.objects.filter(pk=favorite.pk).update(created_at=dt)
-                            updated_created_at += 1
-                        except Exception:
-                            pass
-
-                if created_new:
-                    created += 1
-                    print(f"[CREATED] baris {lineno}: Favorite {favorite.pk} (user={user_name}, merch={merch_obj.name})")
-                else:
-                    print(f"[EXIST] baris {lineno}: Favorite sudah ada (user={user_name}, merch={merch_obj.name})")
-            except Exception as e:
-                print(f"[ERROR] baris {lineno}: gagal membuat Favorite untuk user={user_name}, merch={merch_val}: {e}")
-                skipped += 1
-                continue
+        return None
+
+    importer = FavoriteImporter(batch_size=batch_size).run(read_csv(csv_path))
 
     print("=== Summary ===")
-    print(f"Favorites created: {created}")
-    print(f"Favorites updated created_at: {updated_created_at}")
-    print(f"Skipped/Failed: {skipped}")
+    print(f"Favorites created: {importer.created_count}")
+    print(f"Favorites updated created_at: {importer.updated_created_at}")
+    print(f"Skipped/Failed: {importer.skipped}")
+    return importer
 
 
 if __name__ == "__main__":
-    import_favorites_from_csv(CSV_FILE)
+    parser = argparse.ArgumentParser(description="Import favorites dari CSV.")
+    parser.add_argument('csv_path', nargs='?', default=CSV_FILE)
+    parser.add_argument('--batch-size', type=int, default=None)
+    args = parser.parse_args()
+    import_favorites_from_csv(args.csv_path, batch_size=args.batch_size)
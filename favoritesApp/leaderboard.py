@@ -0,0 +1,140 @@
+"""
+Jumlah favorit per merchandise (Merchandise.favorite_count) dan leaderboard top-K.
+
+favorite_count digeser dengan F() dalam transaksi yang sama dengan Favorite-nya
+(Favorite.save, receiver post_delete, dan FavoriteImporter), dan bisa dicocokkan ulang
+dengan reconcile(). Update F() ini sengaja tidak menyentuh updated_at; favorite_count
+juga tidak ikut di payload feed merchandise, jadi ETag feed tetap benar.
+
+Leaderboard disimpan di cache Django per scope ('all' dan per kategori) sebagai list
+(merchandise_id, favorite_count) terurut. Setelah commit, entry yang berubah ditambal di
+tempat: masuk/naik/turun di list, atau list dibuang kalau item yang turun mungkin sudah
+disalip produk di luar top-K. Tambalan memakai nilai absolut dari database, jadi tambalan
+yang hilang karena balapan antar-request hanya bertahan sampai perubahan berikutnya atau
+FAVORITE_LEADERBOARD_TTL habis (juga batas tertinggalnya worker lain dengan LocMem).
+"""
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from merchandiseApp.models import Merchandise
+
+LEADERBOARD_SIZE = 50
+ALL = 'all'
+KEY = 'favoritesApp:leaderboard:{scope}'
+
+
+def _key(scope):
+    return KEY.format(scope=scope)
+
+
+def _ttl():
+    return getattr(settings, 'FAVORITE_LEADERBOARD_TTL', 300)
+
+
+def _sort_key(entry):
+    # sama dengan ORDER BY favorite_count DESC, id DESC
+    return (entry[1], entry[0])
+
+
+def _load(scope):
+    merchandise = Merchandise.objects.filter(favorite_count__gt=0)
+    if scope != ALL:
+        merchandise = merchandise.filter(category=scope)
+    rows = merchandise.order_by('-favorite_count', '-id').values_list('pk', 'favorite_count')[:LEADERBOARD_SIZE]
+    return [(str(pk), count) for pk, count in rows]
+
+
+def top(category=None):
+    """List (merchandise_id, favorite_count) terurut untuk semua produk atau satu kategori."""
+    scope = category or ALL
+    entries = cache.get(_key(scope))
+    if entries is None:
+        entries = _load(scope)
+        cache.set(_key(scope), entries, _ttl())
+    return entries
+
+
+def _patch(entries, pk, count):
+    """Terapkan jumlah baru satu produk ke list top-K; None kalau list harus dimuat ulang."""
+    full = len(entries) >= LEADERBOARD_SIZE
+    floor = _sort_key(entries[-1]) if full else None
+    remaining = [entry for entry in entries if entry[0] != pk]
+    was_listed = len(remaining) != len(entries)
+    new = (pk, count)
+
+    if not full:
+        # list belum penuh berarti berisi semua produk dengan favorit > 0
+        if count > 0:
+            remaining.append(new)
+    elif was_listed:
+        # produk di luar list semuanya di bawah floor; kalau turun melewati floor, urutannya tidak diketahui
+        if _sort_key(new) < floor:
+            return None
+        remaining.append(new)
+    elif _sort_key(new) > floor:
+        remaining.append(new)
+    else:
+        return entries
+    remaining.sort(key=_sort_key, reverse=True)
+    return remaining[:LEADERBOARD_SIZE]
+
+
+def refresh(merchandise_ids):
+    """Tambal leaderboard yang sedang di-cache dengan jumlah terbaru produk-produk ini."""
+    rows = Merchandise.objects.filter(pk__in=merchandise_ids).values_list('pk', 'category', 'favorite_count')
+    changes = defaultdict(list)
+    for pk, category, count in rows:
+        changes[ALL].append((str(pk), count))
+        changes[category].append((str(pk), count))
+    for scope, updates in changes.items():
+        entries = cache.get(_key(scope))
+        if entries is None:
+            continue
+        for pk, count in updates:
+            entries = _patch(entries, pk, count)
+            if entries is None:
+                break
+        if entries is None:
+            cache.delete(_key(scope))
+        else:
+            cache.set(_key(scope), entries, _ttl())
+
+
+def invalidate():
+    cache.delete_many([_key(ALL)] + [_key(value) for value, _ in Merchandise.CATEGORY_CHOICES])
+
+
+def apply_change(deltas):
+    """Geser favorite_count dengan F(); deltas = {merchandise_id: perubahan}."""
+    by_delta = defaultdict(list)
+    for merchandise_id, delta in deltas.items():
+        if delta:
+            by_delta[delta].append(merchandise_id)
+    if not by_delta:
+        return
+    for delta, ids in by_delta.items():
+        Merchandise.objects.filter(pk__in=ids).update(favorite_count=F('favorite_count') + delta)
+    changed = [merchandise_id for ids in by_delta.values() for merchandise_id in ids]
+    transaction.on_commit(lambda: refresh(changed))
+
+
+def reconcile():
+    """Samakan favorite_count dengan isi tabel Favorite; mengembalikan jumlah produk yang diperbaiki."""
+    from favoritesApp.models import Favorite
+
+    actual = Coalesce(
+        Subquery(
+            Favorite.objects.filter(merchandise=OuterRef('pk')).order_by()
+            .values('merchandise').annotate(c=Count('pk')).values('c'),
+            output_field=IntegerField(),
+        ),
+        0,
+    )
+    fixed = Merchandise.objects.annotate(actual=actual).exclude(favorite_count=F('actual')).update(favorite_count=actual)
+    invalidate()
+    return fixed
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from favoritesApp import leaderboard
+
+
+class Command(BaseCommand):
+    help = "Cocokkan ulang Merchandise.favorite_count dengan tabel Favorite dan buang cache leaderboard."
+
+    def handle(self, *args, **options):
+        fixed = leaderboard.reconcile()
+        self.stdout.write(self.style.SUCCESS(f"favorite_count diperbaiki untuk {fixed} produk."))
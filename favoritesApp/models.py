@@ -1,7 +1,10 @@
 import uuid
-from django.db import models
+from django.db import models, transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 from django.contrib.auth import get_user_model
 from merchandiseApp.models import Merchandise
+from . import favorite_cache, leaderboard
 
 User = get_user_model()
 
@@ -17,3 +20,27 @@ class Favorite(models.Model):
 
     def __str__(self):
         return f"{self.user.username} ❤️ {self.merchandise.name}"
+
+    def save(self, *args, **kwargs):
+        # favorite_count ikut di-update dalam transaksi yang sama dengan favorite-nya
+        with transaction.atomic():
+            adding = self._state.adding
+            super().save(*args, **kwargs)
+            if adding:
+                leaderboard.apply_change({self.merchandise_id: 1})
+
+
+@receiver(post_delete, sender=Favorite)
+def _remove_deleted_favorite_from_count(sender, instance, **kwargs):
+    # remove_favorite, queryset.delete() dan cascade dari User
+    leaderboard.apply_change({instance.merchandise_id: -1})
+
+
+@receiver(post_save, sender=Favorite)
+@receiver(post_delete, sender=Favorite)
+def _invalidate_favorite_cache(sender, instance, **kwargs):
+    # bulk_create tidak mengirim signal; importer memanggil invalidate_many() sendiri.
+    # Diulang saat commit supaya entry yang sempat di-load request lain sebelum commit ikut dibuang.
+    user_id = instance.user_id
+    favorite_cache.invalidate(user_id)
+    transaction.on_commit(lambda: favorite_cache.invalidate(user_id))
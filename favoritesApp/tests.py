@@ -1,9 +1,14 @@
 # favoritesApp/tests.py
+from io import StringIO
+from unittest.mock import patch
+from django.core.cache import cache
+from django.core.management import call_command
 from django.test import TestCase, Client
 from django.contrib.auth import get_user_model
 from django.urls import reverse
 from merchandiseApp.models import Merchandise
 from .models import Favorite
+from . import leaderboard
 import json
 
 User = get_user_model()
@@ -377,6 +382,35 @@ class FavoriteViewTest(TestCase):
         data = json.loads(response.content)
         self.assertFalse(data['is_favorited'])
 
+    def test_favorite_status_batch(self):
+        """Test status banyak merchandise dalam satu request, dari cache setelah request pertama"""
+        cache.clear()
+        self.client.login(username='testuser', password='testpass123')
+        other = Merchandise.objects.create(name='Scarf', price=50000, category='others', description='x', stock=1)
+        favorite = Favorite.objects.create(user=self.user, merchandise=self.merchandise)
+        Favorite.objects.create(user=self.other_user, merchandise=other)
+        url = reverse('favoritesApp:status')
+        ids = f'{self.merchandise.pk},{other.pk}'
+
+        with self.assertNumQueries(3):  # session, user, favorites
+            data = self.client.get(url, {'ids': ids}).json()
+        self.assertEqual(data['favorites'][str(self.merchandise.pk)],
+                         {'is_favorited': True, 'favorite_id': str(favorite.id)})
+        self.assertFalse(data['favorites'][str(other.pk)]['is_favorited'])
+
+        with self.assertNumQueries(2):
+            self.client.get(url, {'ids': ids})
+
+        # add/remove langsung terlihat
+        self.client.post(reverse('favoritesApp:add'), {'merchandise_id': str(other.pk)})
+        self.assertTrue(self.client.get(url, {'ids': ids}).json()['favorites'][str(other.pk)]['is_favorited'])
+        self.client.post(reverse('favoritesApp:remove'), {'merchandise_id': str(self.merchandise.pk)})
+        data = self.client.get(reverse('favoritesApp:check', args=[self.merchandise.pk])).json()
+        self.assertFalse(data['is_favorited'])
+
+        self.assertEqual(self.client.get(url).status_code, 400)
+        self.assertEqual(self.client.get(url, {'ids': 'bukan-uuid'}).status_code, 400)
+
 
 class FavoriteIntegrationTest(TestCase):
     """Integration tests for favorites workflow"""
@@ -466,4 +500,80 @@ class FavoriteIntegrationTest(TestCase):
         self.assertEqual(len(data['favorites']), 1)
         
         # But there should be 2 total favorites in database
-        self.assertEqual(Favorite.objects.count(), 2)
\ No newline at end of file
+        self.assertEqual(Favorite.objects.count(), 2)
+
+
+class FavoriteLeaderboardTest(TestCase):
+    """Test favorite_count dan leaderboard"""
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.users = [User.objects.create_user(username=f'fan{i}', password='testpass123') for i in range(3)]
+        self.jersey = Merchandise.objects.create(name='Jersey', price=1, category='jersey', description='x', stock=1)
+        self.ball = Merchandise.objects.create(name='Ball', price=1, category='ball', description='x', stock=1)
+        self.scarf = Merchandise.objects.create(name='Scarf', price=1, category='others', description='x', stock=1)
+        self.url = reverse('favoritesApp:leaderboard')
+
+    def ranking(self, **params):
+        return [(r['name'], r['favorite_count']) for r in self.client.get(self.url, params).json()['results']]
+
+    def test_counts_follow_add_and_remove(self):
+        self.client.login(username='fan0', password='testpass123')
+        self.client.post(reverse('favoritesApp:add'), {'merchandise_id': str(self.ball.pk)})
+        self.client.post(reverse('favoritesApp:add'), {'merchandise_id': str(self.ball.pk)})  # sudah ada
+        Favorite.objects.create(user=self.users[1], merchandise=self.ball)
+        self.ball.refresh_from_db()
+        self.assertEqual(self.ball.favorite_count, 2)
+
+        self.client.post(reverse('favoritesApp:remove'), {'merchandise_id': str(self.ball.pk)})
+        self.users[1].delete()  # cascade
+        self.ball.refresh_from_db()
+        self.assertEqual(self.ball.favorite_count, 0)
+
+    def test_leaderboard_is_patched_incrementally(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            for user in self.users:
+                Favorite.objects.create(user=user, merchandise=self.jersey)
+            Favorite.objects.create(user=self.users[0], merchandise=self.ball)
+        self.assertEqual(self.ranking(), [('Jersey', 3), ('Ball', 1)])
+        self.assertEqual(self.ranking(category='ball'), [('Ball', 1)])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Favorite.objects.create(user=self.users[0], merchandise=self.scarf)
+            Favorite.objects.create(user=self.users[1], merchandise=self.scarf)
+            Favorite.objects.filter(merchandise=self.ball).delete()
+        # list yang sudah di-cache ditambal, hanya produk yang ditampilkan yang di-query
+        with self.assertNumQueries(1):
+            self.assertEqual(self.ranking(), [('Jersey', 3), ('Scarf', 2)])
+        self.assertEqual(self.ranking(category='ball'), [])
+        self.assertEqual(self.ranking(limit=1), [('Jersey', 3)])
+        self.assertEqual(self.client.get(self.url, {'category': 'bukan'}).status_code, 400)
+
+    def test_full_leaderboard_reloads_when_entry_drops_out(self):
+        with patch.object(leaderboard, 'LEADERBOARD_SIZE', 2):
+            with self.captureOnCommitCallbacks(execute=True):
+                for user in self.users:
+                    Favorite.objects.create(user=user, merchandise=self.jersey)
+                for user in self.users[:2]:
+                    Favorite.objects.create(user=user, merchandise=self.ball)
+                Favorite.objects.create(user=self.users[2], merchandise=self.scarf)
+            self.assertEqual([name for name, _ in self.ranking()], ['Jersey', 'Ball'])
+
+            with self.captureOnCommitCallbacks(execute=True):
+                Favorite.objects.filter(merchandise=self.ball).delete()
+            self.assertIsNone(cache.get(leaderboard._key(leaderboard.ALL)))
+            self.assertEqual(self.ranking(), [('Jersey', 3), ('Scarf', 1)])
+
+    def test_reconcile_command(self):
+        Favorite.objects.create(user=self.users[0], merchandise=self.jersey)
+        Merchandise.objects.filter(pk=self.jersey.pk).update(favorite_count=7)
+        Merchandise.objects.filter(pk=self.ball.pk).update(favorite_count=3)
+        out = StringIO()
+        call_command('reconcile_favorite_counts', stdout=out)
+        self.assertIn('2 produk', out.getvalue())
+        self.assertEqual(
+            dict(Merchandise.objects.values_list('name', 'favorite_count')),
+            {'Jersey': 1, 'Ball': 0, 'Scarf': 0},
+        )
+
@@ -10,4 +10,6 @@ urlpatterns = [
     path('remove/', views.remove_favorite, name='remove'), # POST -> hapus favorite
     path('json/', views.favorites_json, name='json'),   # GET -> list favorites sebagai JSON
     path('check/<uuid:merchandise_id>/', views.check_favorite, name='check'), # GET -> cek favorite
+    path('status/', views.favorite_status, name='status'), # GET -> cek banyak favorite sekaligus
+    path('leaderboard/', views.favorite_leaderboard, name='leaderboard'), # GET -> produk paling difavoritkan
 ]
\ No newline at end of file
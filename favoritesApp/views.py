@@ -5,7 +5,11 @@ from django.shortcuts import get_object_or_404, render
 from django.views.decorators.http import require_POST, require_http_methods
 from django.contrib.auth.decorators import login_required
 from django.views.decorators.csrf import csrf_exempt, ensure_csrf_cookie
+from django.db.models import Max
+from main.conditional import conditional_feed, table_version
+from main.pagination import get_page_size
 from .models import Favorite
+from . import favorite_cache, leaderboard
 from django.apps import apps
 
 
@@ -155,7 +159,14 @@ def remove_favorite(request):
     }, status=400)
 
 
+def _favorites_version(request):
+    # data merchandise ikut ditampilkan, jadi perubahan produk yang difavoritkan juga mengganti versi
+    return [table_version(Favorite.objects.filter(user=request.user), updated_field='created_at',
+                          merchandise_updated_at=Max('merchandise__updated_at'))]
+
+
 @login_required
+@conditional_feed(_favorites_version, per_user=True)
 def favorites_json(request):
     """
     Return favorites sebagai JSON dengan complete merchandise data.
@@ -221,29 +232,74 @@ def check_favorite(request, merchandise_id):
     """
     Check apakah merchandise tertentu sudah difavorite.
     """
-    print(f"[CHECK_FAVORITE] User: {request.user}, Merch ID: {merchandise_id}")
-    
+    favorite_id = favorite_cache.favorite_ids(request.user.pk).get(str(merchandise_id))
+    return JsonResponse({
+        'status': 'ok',
+        'is_favorited': favorite_id is not None,
+        'favorite_id': favorite_id,
+    })
+
+
+MAX_STATUS_IDS = 100
+
+
+@login_required
+@require_http_methods(["GET"])
+def favorite_status(request):
+    """
+    Status favorite untuk banyak merchandise sekaligus (satu grid produk), menggantikan
+    satu request check_favorite per kartu. ?ids=<uuid>,<uuid>,... (boleh juga ids diulang),
+    maksimal MAX_STATUS_IDS id.
+    """
+    raw_ids = [part for value in request.GET.getlist('ids') for part in value.split(',') if part.strip()]
+    if not raw_ids:
+        return JsonResponse({'status': 'error', 'message': 'ids required'}, status=400)
+    if len(raw_ids) > MAX_STATUS_IDS:
+        return JsonResponse({'status': 'error', 'message': f'max {MAX_STATUS_IDS} ids'}, status=400)
     try:
-        favorite = Favorite.objects.get(
-            user=request.user, 
-            merchandise_id=merchandise_id
-        )
-        print(f"[CHECK_FAVORITE] Found: {favorite.id}")
-        return JsonResponse({
-            'status': 'ok',
-            'is_favorited': True,
-            'favorite_id': str(favorite.id)
-        })
-    except Favorite.DoesNotExist:
-        print(f"[CHECK_FAVORITE] Not found")
-        return JsonResponse({
-            'status': 'ok',
-            'is_favorited': False,
-            'favorite_id': None
+        merchandise_ids = [str(UUID(value.strip())) for value in raw_ids]
+    except ValueError:
+        return JsonResponse({'status': 'error', 'message': 'invalid merchandise id (expect UUID)'}, status=400)
+
+    favorite_ids = favorite_cache.favorite_ids(request.user.pk)
+    return JsonResponse({
+        'status': 'ok',
+        'favorites': {
+            merchandise_id: {
+                'is_favorited': merchandise_id in favorite_ids,
+                'favorite_id': favorite_ids.get(merchandise_id),
+            }
+            for merchandise_id in merchandise_ids
+        },
+    })
+
+
+@require_http_methods(["GET"])
+def favorite_leaderboard(request):
+    """
+    Merchandise paling banyak difavoritkan, dari leaderboard yang di-cache (lihat leaderboard.py).
+    ?category=<kategori> untuk satu kategori, ?limit=<n> maksimal LEADERBOARD_SIZE.
+    """
+    category = request.GET.get('category') or None
+    Merchandise = MerchandiseModel()
+    if category and category not in dict(Merchandise.CATEGORY_CHOICES):
+        return JsonResponse({'status': 'error', 'message': 'invalid category'}, status=400)
+    limit = get_page_size(request, default=10, maximum=leaderboard.LEADERBOARD_SIZE)
+
+    entries = leaderboard.top(category)[:limit]
+    products = Merchandise.objects.in_bulk([merchandise_id for merchandise_id, _ in entries])
+    results = []
+    for merchandise_id, count in entries:
+        merch = products.get(UUID(merchandise_id))
+        if merch is None:
+            continue  # terhapus sejak leaderboard di-cache
+        results.append({
+            'rank': len(results) + 1,
+            'merchandise_id': merchandise_id,
+            'name': merch.name,
+            'price': merch.price,
+            'category': merch.category,
+            'thumbnail': merch.thumbnail,
+            'favorite_count': count,
         })
-    except Exception as e:
-        print(f"[CHECK_FAVORITE] Error: {str(e)}")
-        return JsonResponse({
-            'status': 'error',
-            'message': str(e)
-        }, status=500)
\ No newline at end of file
+    return JsonResponse({'status': 'ok', 'category': category, 'results': results})
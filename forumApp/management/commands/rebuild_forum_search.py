@@ -0,0 +1,16 @@
+from django.apps import apps
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from forumApp import search
+
+
+class Command(BaseCommand):
+    help = (
+        "Bangun ulang index full-text search forum (FTS5 di SQLite, REINDEX GIN di Postgres). "
+        "Di SQLite jalankan setelah VACUUM."
+    )
+
+    def handle(self, *args, **options):
+        search.get_backend(connection).rebuild(connection, apps)
+        self.stdout.write(self.style.SUCCESS(f"Index search forum dibangun ulang ({connection.vendor})."))
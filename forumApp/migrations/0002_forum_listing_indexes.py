@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-17 19:02
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('forumApp', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['post', 'created_at', 'id'], name='forumApp_co_post_id_fcc5ec_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='forumpost',
+            index=models.Index(fields=['created_at', 'id'], name='forumApp_fo_created_af0b47_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='forumpost',
+            index=models.Index(fields=['post_type', 'created_at', 'id'], name='forumApp_fo_post_ty_4f6fda_idx'),
+        ),
+    ]
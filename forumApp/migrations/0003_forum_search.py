@@ -0,0 +1,22 @@
+from django.db import migrations
+
+from forumApp import search
+
+
+def install_search(apps, schema_editor):
+    search.get_backend(schema_editor.connection).install(schema_editor, apps)
+
+
+def uninstall_search(apps, schema_editor):
+    search.get_backend(schema_editor.connection).uninstall(schema_editor, apps)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('forumApp', '0002_forum_listing_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(install_search, uninstall_search),
+    ]
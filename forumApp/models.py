@@ -1,6 +1,9 @@
-from django.db import models
+from django.db import models, connections
+from django.db.models.signals import post_migrate
+from django.dispatch import receiver
 import uuid
 from django.contrib.auth.models import User
+from main import view_counter
 
 class ForumPost(models.Model):
     POST_TYPE = [
@@ -18,13 +21,22 @@ class ForumPost(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     views = models.IntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['created_at', 'id']),
+            models.Index(fields=['post_type', 'created_at', 'id']),
+        ]
     
     def __str__(self):
         return self.title
     
+    @property
+    def total_views(self):
+        return self.views + view_counter.pending(ForumPost, self.pk, 'views')
+
     def increment_views(self):
-        self.views += 1
-        self.save()
+        self.views += view_counter.increment(ForumPost, self.pk, 'views')
     
 class Comment(models.Model):
     
@@ -36,6 +48,20 @@ class Comment(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)    
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['post', 'created_at', 'id']),
+        ]
+
     def __str__(self):
         return f"{self.author.username} in {self.post.title}: {self.content[:15]}"
-    
+
+
+@receiver(post_migrate)
+def repair_search_index(sender, using='default', apps=None, **kwargs):
+    # tabel yang dibuat ulang oleh migrasi SQLite kehilangan trigger search; lihat forumApp/search.py
+    if sender.name != 'forumApp' or apps is None:
+        return
+    from forumApp import search
+    connection = connections[using]
+    search.get_backend(connection).ensure_installed(connection, apps)
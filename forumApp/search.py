@@ -0,0 +1,228 @@
+"""
+Full-text search untuk thread (judul + isi) dan komentar forum.
+
+Backend dipilih dari vendor database:
+- postgresql: kolom tsvector search_vector (generated column; judul berbobot A, isi B)
+  dengan index GIN, dicocokkan dengan plainto_tsquery dan diurutkan dengan ts_rank.
+- sqlite: tabel virtual FTS5 external-content <tabel>_fts yang disinkronkan trigger
+  dan diurutkan dengan bm25 (bobot kolom mengikuti bobot default ts_rank).
+
+Index dijaga oleh database sendiri, jadi bulk_create dari script import dan
+generate_synthetic_data ikut ter-index. Konfigurasi 'simple' / unicode61 dipakai
+karena isi forum campuran Indonesia-Inggris (tanpa stemming). Semua kata di query
+harus muncul (AND).
+"""
+import re
+
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVectorField
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection as default_connection
+from django.db.models import F
+from django.db.models.expressions import RawSQL
+
+from main.pagination import InvalidCursor, decode_cursor, encode_cursor, keyset_paginate
+
+SEARCH_CONFIG = 'simple'
+MAX_TERMS = 10
+
+# model yang di-index beserta kolom teks dan bobotnya
+DOCUMENTS = {
+    'forumApp.ForumPost': (('title', 'A'), ('content', 'B')),
+    'forumApp.Comment': (('content', 'B'),),
+}
+# bobot default ts_rank, dipakai juga untuk bm25 supaya urutan kedua backend mirip
+WEIGHTS = {'A': 1.0, 'B': 0.4, 'C': 0.2, 'D': 0.1}
+
+
+def terms(text):
+    """Kata-kata di query; tanda baca dibuang supaya input bebas tidak jadi sintaks query."""
+    return re.findall(r'\w+', (text or '').lower())[:MAX_TERMS]
+
+
+def _documents(apps):
+    for label, columns in DOCUMENTS.items():
+        yield apps.get_model(label), columns
+
+
+class PostgresBackend:
+    def install(self, schema_editor, apps):
+        for model, columns in _documents(apps):
+            table = schema_editor.quote_name(model._meta.db_table)
+            vector = ' || '.join(
+                f"setweight(to_tsvector('{SEARCH_CONFIG}'::regconfig, coalesce({schema_editor.quote_name(column)}, '')), '{weight}')"
+                for column, weight in columns
+            )
+            schema_editor.execute(
+                f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS search_vector tsvector "
+                f"GENERATED ALWAYS AS ({vector}) STORED"
+            )
+            schema_editor.execute(
+                f"CREATE INDEX IF NOT EXISTS {self._index_name(model)} ON {table} USING gin (search_vector)"
+            )
+
+    def uninstall(self, schema_editor, apps):
+        for model, _ in _documents(apps):
+            schema_editor.execute(f"DROP INDEX IF EXISTS {self._index_name(model)}")
+            schema_editor.execute(
+                f"ALTER TABLE {schema_editor.quote_name(model._meta.db_table)} DROP COLUMN IF EXISTS search_vector"
+            )
+
+    def ensure_installed(self, connection, apps):
+        # generated column dan index GIN tidak hilang saat ALTER TABLE, tidak perlu diperbaiki
+        pass
+
+    def rebuild(self, connection, apps):
+        with connection.cursor() as cursor:
+            for model, _ in _documents(apps):
+                cursor.execute(f"REINDEX INDEX {self._index_name(model)}")
+
+    def search(self, queryset, words, cursor=None, limit=20):
+        query = SearchQuery(' '.join(words), config=SEARCH_CONFIG)
+        table = default_connection.ops.quote_name(queryset.model._meta.db_table)
+        # kolom tidak didaftarkan di model supaya tsvector tidak ikut ter-SELECT di query lain
+        document = RawSQL(f'{table}.search_vector', [], output_field=SearchVectorField())
+        queryset = queryset.alias(document=document).filter(document=query).annotate(
+            rank=SearchRank(F('document'), query),
+        )
+        return keyset_paginate(queryset, ('-rank', '-id'), cursor=cursor, limit=limit)
+
+    def _index_name(self, model):
+        return f'{model._meta.db_table.lower()}_search_gin'
+
+
+class SQLiteBackend:
+    def install(self, schema_editor, apps):
+        for model, columns in _documents(apps):
+            for statement in self._schema(model, [column for column, _ in columns]):
+                schema_editor.execute(statement)
+            schema_editor.execute(f'INSERT INTO "{self._fts(model)}"("{self._fts(model)}") VALUES (\'rebuild\')')
+
+    def uninstall(self, schema_editor, apps):
+        for model, _ in _documents(apps):
+            fts = self._fts(model)
+            for suffix in ('ai', 'ad', 'au'):
+                schema_editor.execute(f'DROP TRIGGER IF EXISTS "{fts}_{suffix}"')
+            schema_editor.execute(f'DROP TABLE IF EXISTS "{fts}"')
+
+    def ensure_installed(self, connection, apps):
+        """
+        Migrasi SQLite yang mengubah tabel forum membuat ulang tabelnya (trigger ikut hilang
+        dan rowid berubah); pasang lagi trigger dan bangun ulang index kalau itu terjadi.
+        """
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT type, name FROM sqlite_master WHERE type IN ('table', 'trigger')")
+            existing = {name for _, name in cursor.fetchall()}
+        with connection.schema_editor() as schema_editor:
+            for model, columns in _documents(apps):
+                fts = self._fts(model)
+                if fts not in existing:
+                    continue  # migrasi search belum dijalankan
+                if all(f'{fts}_{suffix}' in existing for suffix in ('ai', 'ad', 'au')):
+                    continue
+                for statement in self._schema(model, [column for column, _ in columns]):
+                    schema_editor.execute(statement)
+                schema_editor.execute(f'INSERT INTO "{fts}"("{fts}") VALUES (\'rebuild\')')
+
+    def rebuild(self, connection, apps):
+        # perlu juga setelah VACUUM, yang boleh mengubah rowid tabel tanpa INTEGER PRIMARY KEY
+        with connection.cursor() as cursor:
+            for model, _ in _documents(apps):
+                cursor.execute(f'INSERT INTO "{self._fts(model)}"("{self._fts(model)}") VALUES (\'rebuild\')')
+
+    def search(self, queryset, words, cursor=None, limit=20):
+        model = queryset.model
+        fts = self._fts(model)
+        table = model._meta.db_table
+        weights = ', '.join(str(WEIGHTS[weight]) for _, weight in DOCUMENTS[model._meta.label])
+        match = ' '.join(f'"{word}"' for word in words)
+
+        # filter queryset (mis. post_type) diterapkan sebelum LIMIT, supaya halaman tidak
+        # kehilangan hit yang baru tersaring setelahnya
+        params = [match]
+        filtered = ''
+        if queryset.query.where:
+            subquery, subquery_params = queryset.order_by().values('pk').query.sql_with_params()
+            filtered = f' AND rowid IN (SELECT rowid FROM "{table}" WHERE "{model._meta.pk.column}" IN ({subquery}))'
+            params += subquery_params
+
+        # bm25 makin kecil makin relevan; cursor = (skor, rowid) baris terakhir
+        after = ''
+        if cursor:
+            score, rowid = decode_cursor(cursor, 2)
+            if not isinstance(score, (int, float)) or not isinstance(rowid, int):
+                raise InvalidCursor('Invalid cursor')
+            after = 'WHERE score > %s OR (score = %s AND rowid > %s)'
+            params += [score, score, rowid]
+        params.append(limit + 1)
+        # urutkan dan potong di dalam FTS dulu, baru join ke tabel asli untuk halaman itu saja
+        sql = (
+            f'SELECT t."{model._meta.pk.column}", s.rowid, s.score FROM ('
+            f'SELECT rowid, score FROM ('
+            f'SELECT rowid, bm25("{fts}", {weights}) AS score FROM "{fts}" WHERE "{fts}" MATCH %s{filtered}'
+            f') {after} ORDER BY score, rowid LIMIT %s'
+            f') s JOIN "{table}" t ON t.rowid = s.rowid ORDER BY s.score, s.rowid'
+        )
+        with default_connection.cursor() as db_cursor:
+            db_cursor.execute(sql, params)
+            hits = db_cursor.fetchall()
+
+        next_cursor = None
+        if len(hits) > limit:
+            hits = hits[:limit]
+            next_cursor = encode_cursor([hits[-1][2], hits[-1][1]])
+
+        pks = [model._meta.pk.to_python(pk) for pk, _, _ in hits]
+        objects = queryset.in_bulk(pks)
+        rows = []
+        for pk, (_, _, score) in zip(pks, hits):
+            obj = objects.get(pk)
+            if obj is not None:  # terhapus di antara dua query
+                obj.rank = -score
+                rows.append(obj)
+        return rows, next_cursor
+
+    def _fts(self, model):
+        return f'{model._meta.db_table}_fts'
+
+    def _schema(self, model, columns):
+        table = model._meta.db_table
+        fts = self._fts(model)
+        names = ', '.join(f'"{column}"' for column in columns)
+        new = ', '.join(f'new."{column}"' for column in columns)
+        old = ', '.join(f'old."{column}"' for column in columns)
+        return [
+            f'CREATE VIRTUAL TABLE IF NOT EXISTS "{fts}" USING fts5({names}, content="{table}", '
+            f"tokenize='unicode61 remove_diacritics 2')",
+            f'CREATE TRIGGER IF NOT EXISTS "{fts}_ai" AFTER INSERT ON "{table}" BEGIN '
+            f'INSERT INTO "{fts}"(rowid, {names}) VALUES (new.rowid, {new}); END',
+            f'CREATE TRIGGER IF NOT EXISTS "{fts}_ad" AFTER DELETE ON "{table}" BEGIN '
+            f'INSERT INTO "{fts}"("{fts}", rowid, {names}) VALUES (\'delete\', old.rowid, {old}); END',
+            f'CREATE TRIGGER IF NOT EXISTS "{fts}_au" AFTER UPDATE OF {names} ON "{table}" BEGIN '
+            f'INSERT INTO "{fts}"("{fts}", rowid, {names}) VALUES (\'delete\', old.rowid, {old}); '
+            f'INSERT INTO "{fts}"(rowid, {names}) VALUES (new.rowid, {new}); END',
+        ]
+
+
+BACKENDS = {
+    'postgresql': PostgresBackend,
+    'sqlite': SQLiteBackend,
+}
+
+
+def get_backend(connection=None):
+    vendor = (connection or default_connection).vendor
+    try:
+        return BACKENDS[vendor]()
+    except KeyError:
+        raise ImproperlyConfigured(f"Forum search belum mendukung database {vendor}")
+
+
+def search(queryset, text, cursor=None, limit=20):
+    """
+    Satu halaman hasil search untuk queryset ForumPost/Comment, paling relevan dulu.
+    Mengembalikan (rows, next_cursor); setiap row punya atribut rank (makin besar makin relevan).
+    """
+    words = terms(text)
+    if not words:
+        return [], None
+    return get_backend().search(queryset, words, cursor=cursor, limit=limit)
@@ -7,6 +7,8 @@ from unittest.mock import patch, MagicMock
 import json
 import uuid
 from forumApp.models import ForumPost, Comment
+from main import pubsub, view_counter
+from main.pagination import encode_cursor
 
 # Mock Profile and its DoesNotExist exception for testing create_forum logic
 class ProfileDoesNotExist(Exception): pass
@@ -73,6 +75,39 @@ class ForumAppTest(TestCase):
         # Logged out, is_author should be false
         self.assertFalse(data[0]['is_author'])
 
+    def test_show_json_single_query_and_reply_count(self):
+        for i in range(3):
+            post = ForumPost.objects.create(title=f"Thread {i}", content="Isi", author=self.user_other)
+            Comment.objects.create(post=post, author=self.user_normal, content="x" * 60)
+
+        # satu query listing, tidak bergantung jumlah thread
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('forumApp:show_json'))
+        data = response.json()
+        self.assertEqual(len(data), 4)
+
+        personal = next(d for d in data if d['id'] == str(self.thread_personal.id))
+        self.assertEqual(personal['replies'], 2)
+        latest = next(d for d in data if d['title'] == "Thread 2")
+        self.assertEqual(latest['latest_post'], f"normal_user: {'x' * 45}")
+
+    def test_show_json_cursor_pagination(self):
+        for i in range(4):
+            ForumPost.objects.create(title=f"Thread {i}", content="Isi", author=self.user_other)
+        url = reverse('forumApp:show_json')
+
+        first = self.client.get(url, {'limit': 3})
+        self.assertEqual(len(first.json()), 3)
+        cursor = first['X-Next-Cursor']
+
+        second = self.client.get(url, {'limit': 3, 'cursor': cursor})
+        self.assertEqual(len(second.json()), 2)
+        self.assertNotIn('X-Next-Cursor', second)
+
+        ids = [d['id'] for d in first.json() + second.json()]
+        self.assertEqual(len(set(ids)), 5)
+        self.assertEqual(self.client.get(url, {'cursor': 'rusak'}).status_code, 400)
+
     def test_show_json_by_id_404(self):
         response_404 = self.client.get(reverse('forumApp:show_json_by_id', args=[uuid.uuid4()]))
         self.assertEqual(response_404.status_code, 404)
@@ -87,12 +122,14 @@ class ForumAppTest(TestCase):
         
         # First POST increments
         self.client.post(reverse('forumApp:increment_views', args=[thread_id]))
+        view_counter.flush()
         views_after_first = ForumPost.objects.get(pk=thread_id).views
         self.assertEqual(views_after_first, 1)
         
         # Second POST in same session returns 200 but doesn't increment DB
         response = self.client.post(reverse('forumApp:increment_views', args=[thread_id]))
         self.assertEqual(response.status_code, 200)
+        view_counter.flush()
         self.assertEqual(ForumPost.objects.get(pk=thread_id).views, 1)
         self.assertIn('View already counted', response.json()['message'])
         
@@ -157,6 +194,65 @@ class ForumAppTest(TestCase):
     # --- COMMENT CRUD TESTS ---
     
     # get_comments
+    def test_search_threads_ranked_and_paginated(self):
+        url = reverse('forumApp:search')
+        in_title = ForumPost.objects.create(title="Drama penalti final", content="Isi biasa", author=self.user_other)
+        in_content = ForumPost.objects.create(title="Rekap laga", content="Ada penalti di babak kedua", author=self.user_other)
+        ForumPost.objects.create(title="Tiket stadion", content="Antre panjang", author=self.user_other)
+
+        data = self.client.get(url, {'q': 'Penalti!'}).json()
+        self.assertEqual([r['id'] for r in data['results']], [str(in_title.id), str(in_content.id)])
+        self.assertGreater(data['results'][0]['rank'], data['results'][1]['rank'])
+        self.assertIsNone(data['next'])
+
+        first = self.client.get(url, {'q': 'penalti', 'limit': 1}).json()
+        second = self.client.get(url, {'q': 'penalti', 'limit': 1, 'cursor': first['next']}).json()
+        self.assertEqual([first['results'][0]['id'], second['results'][0]['id']], [str(in_title.id), str(in_content.id)])
+        self.assertIsNone(second['next'])
+
+        # semua kata harus muncul; index ikut berubah saat thread diedit/dihapus
+        self.assertEqual(self.client.get(url, {'q': 'penalti tiket'}).json()['results'], [])
+        in_content.content = "Tidak ada apa-apa"
+        in_content.save()
+        in_title.delete()
+        self.assertEqual(self.client.get(url, {'q': 'penalti'}).json()['results'], [])
+
+        self.assertEqual(self.client.get(url, {'q': ' ?! '}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'q': 'penalti', 'type': 'users'}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'q': 'penalti', 'cursor': 'rusak'}).status_code, 400)
+
+    def test_search_threads_filtered_by_post_type_across_pages(self):
+        url = reverse('forumApp:search')
+        for i in range(5):
+            ForumPost.objects.create(title=f"Penalti {i}", content="Isi", author=self.user_other, post_type='personal')
+        official = [
+            ForumPost.objects.create(title=f"Penalti resmi {i}", content="Isi", author=self.user_other, post_type='official')
+            for i in range(3)
+        ]
+
+        seen = []
+        params = {'q': 'penalti', 'post_type': 'official', 'limit': 2}
+        while True:
+            data = self.client.get(url, params).json()
+            self.assertTrue(data['results'])  # tidak ada halaman kosong yang masih punya next
+            seen += [r['id'] for r in data['results']]
+            if not data['next']:
+                break
+            params['cursor'] = data['next']
+        self.assertEqual(sorted(seen), sorted(str(t.id) for t in official))
+
+    def test_search_comments(self):
+        Comment.objects.bulk_create([
+            Comment(post=self.thread_personal, author=self.user_other, content="Gol indah dari luar kotak"),
+        ])
+        self.client.force_login(self.user_normal)
+        response = self.client.get(reverse('forumApp:search'), {'q': 'gol', 'type': 'comments'})
+        results = response.json()['results']
+        self.assertEqual(len(results), 1)
+        self.assertEqual(results[0]['thread_id'], str(self.thread_personal.id))
+        self.assertEqual(results[0]['thread_title'], "Personal Thread")
+        self.assertFalse(results[0]['is_author'])
+
     def test_get_comments_success_and_404(self):
         response = self.client.get(reverse('forumApp:get_comments', args=[self.thread_personal.id]))
         self.assertEqual(response.status_code, 200)
@@ -168,6 +264,65 @@ class ForumAppTest(TestCase):
         response_404 = self.client.get(reverse('forumApp:get_comments', args=[uuid.uuid4()]))
         self.assertEqual(response_404.status_code, 404)
 
+    def test_get_comments_cursor_and_since(self):
+        url = reverse('forumApp:get_comments', args=[self.thread_personal.id])
+        for i in range(3):
+            Comment.objects.create(post=self.thread_personal, author=self.user_other, content=f"Extra {i}")
+
+        with self.assertNumQueries(3):  # cek thread, satu halaman, hitung total
+            first = self.client.get(url, {'limit': 3})
+        self.assertEqual([c['content'] for c in first.json()], ["Extra 2", "Extra 1", "Extra 0"])
+        self.assertEqual(first['X-Total-Count'], '5')
+        older = self.client.get(url, {'limit': 3, 'cursor': first['X-Next-Cursor']})
+        self.assertEqual([c['content'] for c in older.json()], ["Comment 2 content", "Comment 1 content"])
+        self.assertNotIn('X-Next-Cursor', older)
+
+        latest = first['X-Latest-Cursor']
+        nothing_new = self.client.get(url, {'since': latest})
+        self.assertEqual(nothing_new.json(), [])
+        self.assertEqual(nothing_new['X-Latest-Cursor'], latest)
+
+        Comment.objects.create(post=self.thread_personal, author=self.user_normal, content="New 1")
+        Comment.objects.create(post=self.thread_personal, author=self.user_normal, content="New 2")
+        new = self.client.get(url, {'since': latest})
+        self.assertEqual([c['content'] for c in new.json()], ["New 1", "New 2"])
+        self.assertEqual(self.client.get(url, {'since': new['X-Latest-Cursor']}).json(), [])
+        self.assertEqual(self.client.get(url, {'since': 'rusak'}).status_code, 400)
+
+    async def test_comment_stream_replays_missed_and_pushes_new(self):
+        url = reverse('forumApp:comment_stream', args=[self.thread_personal.id])
+        last_seen = encode_cursor([self.comment1.created_at, self.comment1.id])
+        response = await self.async_client.get(url, headers={'Last-Event-ID': last_seen})
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        stream = response.streaming_content
+        try:
+            self.assertEqual(await anext(stream), b'retry: 3000\n\n')
+            replayed = (await anext(stream)).decode()
+            self.assertIn('event: comment', replayed)
+            self.assertIn('"Comment 2 content"', replayed)
+
+            pubsub.publish(f'forum-thread:{self.thread_personal.id}', {
+                'id': 'cursor-baru', 'author_id': self.user_normal.id,
+                'comment': {'id': 'x', 'content': 'Live!', 'author': 'normal_user'},
+            })
+            pushed = (await anext(stream)).decode()
+            self.assertTrue(pushed.startswith('id: cursor-baru\n'))
+            self.assertIn('"is_author": false', pushed)
+        finally:
+            await stream.aclose()
+
+    def test_comment_stream_requires_asgi_and_publishes_on_create(self):
+        url = reverse('forumApp:comment_stream', args=[self.thread_personal.id])
+        self.assertEqual(self.client.get(url).status_code, 501)
+
+        self.client.force_login(self.user_normal)
+        with patch('forumApp.views.pubsub.publish') as publish, self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('forumApp:create_comment', args=[self.thread_personal.id]),
+                             data=json.dumps({'content': 'Halo live'}), content_type='application/json')
+        channel, event = publish.call_args.args
+        self.assertEqual(channel, f'forum-thread:{self.thread_personal.id}')
+        self.assertEqual(event['comment']['content'], 'Halo live')
+
     # create_comment
     def test_create_comment_invalid_cases(self):
         self.client.force_login(self.user_normal)
@@ -231,4 +386,4 @@ class ForumAppTest(TestCase):
     def test_forum_post_model_str_and_increment(self):
         self.assertEqual(str(self.thread_personal), "Personal Thread")
         self.thread_personal.increment_views()
-        self.assertEqual(self.thread_personal.views, 1)
+        self.assertEqual(self.thread_personal.total_views, 1)
@@ -1,16 +1,18 @@
 from django.urls import path
-from forumApp.views import show_landing_page, show_json, show_json_by_id, create_forum, get_comments, create_comment, show_thread_detail, edit_thread, delete_thread, edit_comment, delete_comment, increment_views, create_forum_flutter
+from forumApp.views import show_landing_page, show_json, show_json_by_id, create_forum, get_comments, create_comment, show_thread_detail, edit_thread, delete_thread, edit_comment, delete_comment, increment_views, create_forum_flutter, comment_stream, search_forum
 app_name = 'forumApp'
 
 urlpatterns = [
     path('', show_landing_page, name='show_landing_page'),
     path('json/', show_json, name="show_json"),
     path('json/<str:id>/', show_json_by_id, name="show_json_by_id"),    
+    path('search/', search_forum, name='search'),
     path('create/', create_forum, name='create_forum'),
     path('create_flutter/', create_forum_flutter, name='create_forum_flutter'),
     
     path('<str:thread_id>/comments/', get_comments, name='get_comments'),
     path('<str:thread_id>/comments/create/', create_comment, name='create_comment'),
+    path('<str:thread_id>/comments/stream/', comment_stream, name='comment_stream'),
     path('comment/edit/<str:comment_id>/', edit_comment, name='edit_comment'),
     path('comment/delete/<str:comment_id>/', delete_comment, name='delete_comment'),
     
@@ -2,12 +2,21 @@ from django.shortcuts import render, redirect, get_object_or_404
 from forumApp.models import ForumPost, Comment
 from main.models import Profile
 from django.contrib.auth.decorators import login_required
-from django.http import HttpResponse, HttpResponseRedirect, JsonResponse
+from django.http import HttpResponse, HttpResponseRedirect, JsonResponse, StreamingHttpResponse
+from django.core.exceptions import ValidationError
+from django.core.handlers.asgi import ASGIRequest
+from django.db import transaction
+from asgiref.sync import sync_to_async
 from django.views.decorators.csrf import csrf_exempt
 from django.core import serializers
-from django.db.models import F 
+from django.db.models import IntegerField, OuterRef, Subquery, Count
+from django.db.models.functions import Coalesce, Substr
+import asyncio
 import json
 from django.utils.html import strip_tags
+from main.pagination import InvalidCursor, encode_cursor, get_page_size, keyset_paginate
+from main import pubsub
+from forumApp import search
 
 def show_landing_page(request):
     filter_type = request.GET.get("filter", "all")
@@ -95,18 +104,14 @@ def increment_views(request, thread_id):
             return JsonResponse({'message': 'View already counted for this session.'}, status=200)
         
         try:
-            forum_post = get_object_or_404(ForumPost, pk=thread_id)
-            
-            forum_post.views = F('views') + 1
-            forum_post.save(update_fields=['views'])
+            forum_post = get_object_or_404(ForumPost.objects.only('id', 'views'), pk=thread_id)
+            forum_post.increment_views()
             
             viewed_threads.append(thread_id)
             request.session[session_key] = viewed_threads
             request.session.modified = True
-            
-            forum_post.refresh_from_db()
 
-            return JsonResponse({'message': 'View count incremented.', 'new_views': forum_post.views}, status=200)
+            return JsonResponse({'message': 'View count incremented.', 'new_views': forum_post.total_views}, status=200)
 
         except ForumPost.DoesNotExist:
             return JsonResponse({"error": "Thread not found."}, status=404)
@@ -116,15 +121,38 @@ def increment_views(request, thread_id):
     return JsonResponse({"error": "Invalid request method."}, status=405)
 
 
+# tanpa conditional_feed: versi seluruh tabel membuat setiap halaman O(N), sedangkan
+# satu halaman keyset sendiri hanya satu query
 def show_json(request):
     user_id = request.user.id if request.user.is_authenticated else None
-    forum_list = ForumPost.objects.all().prefetch_related('comments') 
+
+    # jumlah reply dan komentar terakhir diambil lewat subquery, jadi satu query untuk satu halaman
+    comments = Comment.objects.filter(post=OuterRef('pk')).order_by()
+    latest_comment = comments.order_by('-created_at', '-id')
+    forum_list = ForumPost.objects.select_related('author').annotate(
+        reply_count=Coalesce(
+            Subquery(comments.values('post').annotate(c=Count('id')).values('c'), output_field=IntegerField()),
+            0,
+        ),
+        latest_comment_author=Subquery(latest_comment.values('author__username')[:1]),
+        latest_comment_snippet=Subquery(latest_comment.annotate(snippet=Substr('content', 1, 45)).values('snippet')[:1]),
+    )
+
+    post_type = request.GET.get('type')
+    if post_type in ('official', 'personal'):
+        forum_list = forum_list.filter(post_type=post_type)
+
+    try:
+        forum_list, next_cursor = keyset_paginate(
+            forum_list, ('-created_at', '-id'),
+            cursor=request.GET.get('cursor'),
+            limit=get_page_size(request),
+        )
+    except InvalidCursor:
+        return JsonResponse({'error': 'Invalid cursor'}, status=400)
     
     data = []
     for forum in forum_list:
-        latest_comment = forum.comments.order_by('-created_at').first()
-        comment_count = forum.comments.count()
-        
         data.append({
             'id': str(forum.id),
             'title': forum.title,
@@ -133,16 +161,19 @@ def show_json(request):
             'author': forum.author.username,
             'author_id': forum.author.id,
             'post_type': forum.post_type,
-            'views': forum.views, 
+            'views': forum.total_views, 
             'created_at': forum.created_at.isoformat() if forum.created_at else None,
             'updated_at': forum.updated_at.isoformat() if forum.updated_at else None,
             'is_author': forum.author.id == user_id, 
-            'replies': comment_count,
-            'latest_post': f"{latest_comment.author.username}: {latest_comment.content[:45]}" if latest_comment else None,
+            'replies': forum.reply_count,
+            'latest_post': f"{forum.latest_comment_author}: {forum.latest_comment_snippet}" if forum.latest_comment_author else None,
         })
 
-    data.reverse()
-    return JsonResponse(data, safe=False)
+    # body tetap berupa list supaya client lama tidak rusak, cursor halaman berikutnya ada di header
+    response = JsonResponse(data, safe=False)
+    if next_cursor:
+        response['X-Next-Cursor'] = next_cursor
+    return response
 
 def show_json_by_id(request, id):
     user_id = request.user.id if request.user.is_authenticated else None
@@ -156,7 +187,7 @@ def show_json_by_id(request, id):
             'author': forum.author.username,
             'author_id': forum.author.id,
             'post_type': forum.post_type,
-            'views': forum.views, 
+            'views': forum.total_views, 
             'created_at': forum.created_at.isoformat() if forum.created_at else None,
             'updated_at': forum.updated_at.isoformat() if forum.updated_at else None,
             'is_author': forum.author.id == user_id, 
@@ -165,35 +196,195 @@ def show_json_by_id(request, id):
     except ForumPost.DoesNotExist:
         return JsonResponse({'detail': 'Not found'}, status=404)
     
+SEARCH_SNIPPET_LENGTH = 200
+
+def search_forum(request):
+    """
+    Full-text search thread (judul + isi) atau komentar, paling relevan dulu; lihat forumApp/search.py.
+    ?q=<kata kunci>&type=threads|comments&cursor=<next>&limit=<n>, thread bisa difilter ?post_type=.
+    """
+    user_id = request.user.id if request.user.is_authenticated else None
+    text = request.GET.get('q', '')
+    if not search.terms(text):
+        return JsonResponse({'error': 'Parameter q wajib diisi'}, status=400)
+
+    kind = request.GET.get('type', 'threads')
+    if kind == 'threads':
+        queryset = ForumPost.objects.select_related('author')
+        post_type = request.GET.get('post_type')
+        if post_type in ('official', 'personal'):
+            queryset = queryset.filter(post_type=post_type)
+    elif kind == 'comments':
+        queryset = Comment.objects.select_related('author', 'post')
+    else:
+        return JsonResponse({'error': 'type harus threads atau comments'}, status=400)
+
+    try:
+        rows, next_cursor = search.search(
+            queryset, text, cursor=request.GET.get('cursor'), limit=get_page_size(request),
+        )
+    except InvalidCursor:
+        return JsonResponse({'error': 'Invalid cursor'}, status=400)
+
+    results = []
+    for row in rows:
+        if kind == 'threads':
+            item = {
+                'id': str(row.id),
+                'title': row.title,
+                'content': row.content[:SEARCH_SNIPPET_LENGTH],
+                'author': row.author.username,
+                'post_type': row.post_type,
+                'created_at': row.created_at.isoformat() if row.created_at else None,
+                'is_author': row.author_id == user_id,
+            }
+        else:
+            item = _serialize_comment(row, user_id)
+            item['thread_id'] = str(row.post_id)
+            item['thread_title'] = row.post.title
+        item['rank'] = row.rank
+        results.append(item)
+    return JsonResponse({'results': results, 'next': next_cursor})
+
 def show_thread_detail(request, thread_id):
     context = {
         'thread_id': str(thread_id)
     }
     return render(request, "forumDetails.html", context)
     
+def _serialize_comment(comment, user_id):
+    return {
+        'id': str(comment.id),
+        'content': comment.content,
+        'image': comment.image,
+        'author': comment.author.username,
+        'created_at': comment.created_at.isoformat() if comment.created_at else None,
+        'is_author': comment.author_id == user_id,
+    }
+
 def get_comments(request, thread_id):
+    """
+    Komentar satu thread, terbaru dulu, dengan cursor pagination lewat index (post, created_at, id).
+    - ?cursor=<X-Next-Cursor> : halaman komentar yang lebih lama.
+    - ?since=<X-Latest-Cursor> : hanya komentar yang lebih baru dari cursor itu, urut dari
+      yang paling lama supaya client bisa menambahkannya satu per satu; X-Next-Cursor ada
+      kalau masih ada komentar baru yang belum terkirim.
+    Header X-Latest-Cursor menandai komentar terbaru yang sudah dikirim (untuk poll berikutnya).
+    """
+    if not ForumPost.objects.filter(pk=thread_id).exists():
+        return JsonResponse({'error': 'Thread not found'}, status=404)
+
+    comments = Comment.objects.filter(post_id=thread_id).select_related('author')
+    since = request.GET.get('since')
     try:
-        thread = ForumPost.objects.get(pk=thread_id)
-        comments = Comment.objects.filter(post=thread).select_related('author').order_by('created_at')
-        
-        user_id = request.user.id if request.user.is_authenticated else None
-
-        data = [
-            {
-                'id': str(comment.id),
-                'content': comment.content,
-                'image': comment.image,
-                'author': comment.author.username,
-                'created_at': comment.created_at.isoformat() if comment.created_at else None,
-                'is_author': comment.author.id == user_id,
-            }
-            for comment in comments
-        ]
-        data.reverse()
-        return JsonResponse(data, safe=False)
-    except ForumPost.DoesNotExist:
+        if since:
+            page, next_cursor = keyset_paginate(comments, ('created_at', 'id'), cursor=since, limit=get_page_size(request))
+            latest = page[-1] if page else None
+        else:
+            cursor = request.GET.get('cursor')
+            page, next_cursor = keyset_paginate(comments, ('-created_at', '-id'), cursor=cursor, limit=get_page_size(request))
+            latest = page[0] if page and not cursor else None
+    except InvalidCursor:
+        return JsonResponse({'error': 'Invalid cursor'}, status=400)
+
+    user_id = request.user.id if request.user.is_authenticated else None
+    response = JsonResponse([_serialize_comment(comment, user_id) for comment in page], safe=False)
+    if next_cursor:
+        response['X-Next-Cursor'] = next_cursor
+    if latest is not None:
+        response['X-Latest-Cursor'] = encode_cursor([latest.created_at, latest.id])
+    elif since:
+        response['X-Latest-Cursor'] = since
+    if not since and not request.GET.get('cursor'):
+        response['X-Total-Count'] = str(comments.count())
+    return response
+
+COMMENT_STREAM_HEARTBEAT = 25      # detik; komentar SSE supaya proxy tidak menutup koneksi idle
+COMMENT_STREAM_MAX_DURATION = 300  # detik; client reconnect dengan Last-Event-ID dan mengejar dari DB
+
+def _thread_channel(thread_id):
+    return f'forum-thread:{thread_id}'
+
+def _comment_event(comment):
+    # is_author dihitung per subscriber, jadi yang dikirim lewat pub/sub adalah author_id
+    data = _serialize_comment(comment, None)
+    del data['is_author']
+    return {
+        'id': encode_cursor([comment.created_at, comment.id]),
+        'author_id': comment.author_id,
+        'comment': data,
+    }
+
+def _format_sse(event, user_id):
+    data = {**event['comment'], 'is_author': event['author_id'] == user_id}
+    return f"id: {event['id']}\nevent: comment\ndata: {json.dumps(data)}\n\n"
+
+def _comment_events_since(thread_id, since):
+    events = []
+    comments = Comment.objects.filter(post_id=thread_id).select_related('author')
+    cursor = since
+    while cursor:
+        page, cursor = keyset_paginate(comments, ('created_at', 'id'), cursor=cursor, limit=100)
+        events.extend(_comment_event(comment) for comment in page)
+    return events
+
+async def _comment_stream(thread_id, user_id, since):
+    subscription = pubsub.subscribe(_thread_channel(thread_id))
+    try:
+        yield "retry: 3000\n\n"
+        # subscribe dulu baru mengejar dari DB, jadi tidak ada komentar yang jatuh di antaranya
+        replayed = set()
+        if since:
+            try:
+                missed = await sync_to_async(_comment_events_since)(thread_id, since)
+            except InvalidCursor:
+                missed = []
+            for event in missed:
+                replayed.add(event['id'])
+                yield _format_sse(event, user_id)
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + COMMENT_STREAM_MAX_DURATION
+        while True:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                event = await subscription.get(timeout=min(COMMENT_STREAM_HEARTBEAT, remaining))
+            except asyncio.TimeoutError:
+                yield ": ping\n\n"
+                continue
+            if event['id'] not in replayed:
+                yield _format_sse(event, user_id)
+            if subscription.overflowed and subscription.queue.empty():
+                break  # tertinggal; client reconnect dan mengejar lewat Last-Event-ID
+    finally:
+        pubsub.unsubscribe(subscription)
+
+async def comment_stream(request, thread_id):
+    """
+    Stream SSE komentar baru di satu thread. Id setiap event adalah cursor yang sama
+    dengan ?since= di get_comments, jadi reconnect otomatis EventSource (Last-Event-ID)
+    mengejar komentar yang terlewat. Butuh server ASGI (trophythreads.asgi); di WSGI
+    dijawab 501 dan client kembali ke polling get_comments?since=.
+    """
+    if not isinstance(request, ASGIRequest):
+        return JsonResponse({'error': 'Streaming requires an ASGI server.'}, status=501)
+    try:
+        exists = await ForumPost.objects.filter(pk=thread_id).aexists()
+    except ValidationError:
+        exists = False
+    if not exists:
         return JsonResponse({'error': 'Thread not found'}, status=404)
-    
+
+    user = await request.auser()
+    user_id = user.id if user.is_authenticated else None
+    since = request.headers.get('Last-Event-ID') or request.GET.get('since')
+    response = StreamingHttpResponse(_comment_stream(thread_id, user_id, since), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # nginx: jangan buffer stream
+    return response
+
 @csrf_exempt
 @login_required
 def create_comment(request, thread_id):
@@ -215,6 +406,9 @@ def create_comment(request, thread_id):
                 content=content,
                 image=image,
             )
+            # tab lain yang membuka thread ini menerima komentar lewat stream SSE setelah commit
+            event = _comment_event(comment)
+            transaction.on_commit(lambda: pubsub.publish(_thread_channel(thread.pk), event))
 
             return JsonResponse({
                 "message": "Comment created successfully!",
@@ -4,85 +4,90 @@ import sys
 
 # Setup Django environment
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'trophythreads.settings') 
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'trophythreads.settings')
 django.setup()
 
-import csv
+import argparse
+import uuid
 from merchandiseApp.models import Merchandise
+from main.bulk_import import BulkImporter, RowError, read_csv
 from main.models import Profile
 from django.contrib.auth.models import User
 
-def import_merchandise_data(csv_file_path):
+
+def get_seller():
+    profile = Profile.objects.select_related('user').filter(role__in=['admin', 'seller']).first()
+    if profile:
+        return profile.user
+
+    user, created = User.objects.get_or_create(
+        username='merchandise_seller',
+        defaults={
+            'email': 'seller@example.com',
+            'first_name': 'Merchandise',
+            'last_name': 'Seller'
+        }
+    )
+    if created:
+        user.set_password('password123')
+        user.save()
+
+    profile, _ = Profile.objects.get_or_create(user=user, defaults={'role': 'seller'})
+    print(f"Created default seller profile: {profile}")
+    return user
+
+
+class MerchandiseImporter(BulkImporter):
+    """Upsert merchandise berdasarkan nama: nama yang sudah ada di-update, bukan dilewati."""
+    model = Merchandise
+    unique_fields = ['id']
+    update_fields = ['price', 'category', 'stock', 'thumbnail', 'description', 'updated_at']
+
+    def __init__(self, seller, **kwargs):
+        super().__init__(**kwargs)
+        self.seller = seller
+
+    def prefetch(self):
+        self.ids_by_name = {}
+        for pk, name in Merchandise.objects.order_by('pk').values_list('pk', 'name'):
+            self.ids_by_name.setdefault(name, pk)
+
+    def build(self, row):
+        name = row['name']
+        if not name:
+            raise RowError("Nama kosong")
+        thumbnail = row.get('thumbnail', '')
+        pk = self.ids_by_name.setdefault(name, uuid.uuid4())
+        return Merchandise(
+            id=pk,
+            user=self.seller,
+            name=name,
+            price=int(row['price']) if row['price'] else 0,
+            category=row['category'].lower(),
+            stock=int(row['stock']) if row['stock'] else 0,
+            thumbnail=thumbnail if thumbnail else None,
+            description=row.get('description', ''),
+        )
+
+    def key(self, obj):
+        return obj.name
+
+
+def import_merchandise_data(csv_file_path, batch_size=None, dry_run=False):
     print("Memulai import data merchandise...")
-    
+
     try:
-        profile = Profile.objects.filter(role__in=['admin', 'seller']).first()
-        if not profile:
-            user, created = User.objects.get_or_create(
-                username='merchandise_seller',
-                defaults={
-                    'email': 'seller@example.com',
-                    'first_name': 'Merchandise',
-                    'last_name': 'Seller'
-                }
-            )
-            if created:
-                user.set_password('password123')
-                user.save()
-            
-            profile = Profile.objects.create(user=user, role='seller')
-            print(f"Created default seller profile: {profile}")
+        seller = get_seller()
     except Exception as e:
         print(f"Error getting profile: {e}")
-        return
-
-    success_count = 0
-    error_count = 0
-
-    with open(csv_file_path, 'r', encoding='utf-8') as file:
-        reader = csv.DictReader(file)
-        
-        for row_num, row in enumerate(reader, 2):
-            try:
-                name = row['name'].strip()
-                price = int(row['price']) if row['price'].strip() else 0
-                category = row['category'].strip().lower()
-                stock = int(row['stock']) if row['stock'].strip() else 0
-                thumbnail = row['thumbnail'].strip()
-                description = row['description'].strip()
-
-                if not name:
-                    print(f"Row {row_num}: Skip - Nama kosong")
-                    error_count += 1
-                    continue
-
-                # Cek duplikat
-                if Merchandise.objects.filter(name=name).exists():
-                    print(f"Row {row_num}: Skip - '{name}' sudah ada")
-                    error_count += 1
-                    continue
-
-                # Buat merchandise
-                merchandise = Merchandise(
-                    user=profile,
-                    name=name,
-                    price=price,
-                    category=category,
-                    stock=stock,
-                    thumbnail=thumbnail if thumbnail else None,
-                    description=description
-                )
-                
-                merchandise.save()
-                success_count += 1
-                print(f"✓ Row {row_num}: '{name}' - Rp{price:,}")
-
-            except Exception as e:
-                print(f"✗ Row {row_num}: Error - {e}")
-                error_count += 1
-
-    print(f"\n✅ Import selesai! Berhasil: {success_count}, Gagal: {error_count}")
+        return None
+
+    return MerchandiseImporter(seller, batch_size=batch_size, dry_run=dry_run).run(read_csv(csv_file_path))
 
 if __name__ == '__main__':
-    csv_file_path = 'merchandise.csv' 
-    import_merchandise_data(csv_file_path)
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Import merchandise dari CSV.")
+    parser.add_argument('csv_file_path', nargs='?', default='merchandise.csv')
+    parser.add_argument('--batch-size', type=int, default=None)
+    parser.add_argument('--dry-run', action='store_true')
+    args = parser.parse_args()
+    import_merchandise_data(args.csv_file_path, batch_size=args.batch_size, dry_run=args.dry_run)
@@ -0,0 +1,134 @@
+"""
+Kerangka import CSV massal yang dipakai script import_* di setiap app.
+
+Baris dibaca secara streaming, lookup (user, produk, negara, baris yang sudah ada)
+di-prefetch sekali di awal menjadi dict, lalu hasilnya ditulis per batch dengan
+bulk_create. Importer yang menentukan unique_fields + update_fields menulis dengan
+upsert (bulk_create(update_conflicts=True)), jadi menjalankan ulang import yang sama
+memperbarui baris lama alih-alih membuat duplikat. Progres dan error dicetak selama
+import berjalan, tidak ditunggu sampai selesai.
+"""
+import csv
+import sys
+import time
+
+from django.db import transaction
+
+
+class RowError(Exception):
+    """Baris tidak valid; baris dilewati dan alasannya dilaporkan."""
+
+
+def read_csv(path, encoding='utf-8'):
+    """Generator (nomor_baris, dict) dari file CSV; nomor baris dihitung dari header = 1."""
+    with open(path, newline='', encoding=encoding) as f:
+        for line_no, row in enumerate(csv.DictReader(f), start=2):
+            # kolom berlebih (key None dari DictReader) diabaikan
+            yield line_no, {k.strip().lower(): (v or '').strip() for k, v in row.items() if k is not None}
+
+
+class BulkImporter:
+    model = None
+    batch_size = 1000
+    # upsert kalau diisi: baris dengan unique_fields yang sama di-update pada update_fields
+    unique_fields = None
+    update_fields = None
+    progress_every = 10000
+    max_reported_errors = 50
+
+    def __init__(self, batch_size=None, stdout=None, dry_run=False):
+        if batch_size:
+            self.batch_size = batch_size
+        self.stdout = stdout or sys.stdout
+        self.dry_run = dry_run
+        self.read = 0
+        self.written = 0
+        self.skipped = 0
+        self.duplicates = 0
+
+    # --- hook untuk subclass ---------------------------------------------------------
+
+    def prefetch(self):
+        """Bangun lookup map, masing-masing dengan satu query."""
+
+    def build(self, row):
+        """Ubah satu baris CSV menjadi instance model. Lempar RowError untuk melewati baris."""
+        raise NotImplementedError
+
+    def key(self, obj):
+        """
+        Identitas baris di dalam batch; baris dengan key sama digabung (yang terakhir menang),
+        karena upsert Postgres menolak dua baris yang konflik di satu statement.
+        """
+        return id(obj)
+
+    def write(self, objs):
+        if self.update_fields:
+            self.model.objects.bulk_create(
+                objs, batch_size=self.batch_size, update_conflicts=True,
+                unique_fields=self.unique_fields, update_fields=self.update_fields,
+            )
+        else:
+            self.model.objects.bulk_create(objs, batch_size=self.batch_size, ignore_conflicts=True)
+
+    def finish(self):
+        """Dipanggil sekali setelah semua batch ditulis."""
+
+    # --- runner ----------------------------------------------------------------------
+
+    def log(self, message):
+        self.stdout.write(message + '\n')
+        self.stdout.flush()
+
+    def error(self, line_no, reason):
+        self.skipped += 1
+        if self.skipped <= self.max_reported_errors:
+            self.log(f"[SKIP] baris {line_no}: {reason}")
+        elif self.skipped == self.max_reported_errors + 1:
+            self.log("[SKIP] ... error berikutnya tidak dicetak satu per satu")
+
+    def run(self, rows):
+        started = time.monotonic()
+        self.prefetch()
+        batch = {}
+        for line_no, row in rows:
+            self.read += 1
+            try:
+                obj = self.build(row)
+            except RowError as e:
+                self.error(line_no, e)
+                continue
+            except (KeyError, TypeError, ValueError) as e:
+                self.error(line_no, f"data tidak valid ({e!r})")
+                continue
+            key = self.key(obj)
+            if key in batch:
+                self.duplicates += 1
+            batch[key] = obj
+            if len(batch) >= self.batch_size:
+                self._flush(batch)
+                batch = {}
+            if self.read % self.progress_every == 0:
+                self._progress(started)
+        if batch:
+            self._flush(batch)
+        if not self.dry_run:
+            self.finish()
+        self._progress(started, done=True)
+        return self
+
+    def _flush(self, batch):
+        objs = list(batch.values())
+        if not self.dry_run:
+            with transaction.atomic():
+                self.write(objs)
+        self.written += len(objs)
+
+    def _progress(self, started, done=False):
+        elapsed = max(time.monotonic() - started, 1e-9)
+        prefix = "Selesai" if done else "Progres"
+        dry = " [DRY RUN]" if self.dry_run else ""
+        self.log(
+            f"{prefix}{dry}: {self.read} baris dibaca, {self.written} ditulis, {self.skipped} dilewati, "
+            f"{self.duplicates} duplikat digabung ({self.read / elapsed:,.0f} baris/detik)"
+        )
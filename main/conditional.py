@@ -0,0 +1,69 @@
+"""
+Conditional GET untuk feed JSON yang sering di-poll aplikasi Flutter.
+
+Setiap feed punya fungsi versi murah (biasanya satu query agregat: jumlah baris,
+max(updated_at), total views) yang dijalankan sebelum query utama. Kalau versinya
+cocok dengan If-None-Match dari client, view langsung dijawab 304 tanpa query utama
+dan tanpa serialisasi.
+
+Sengaja tanpa Last-Modified: menghapus baris tidak menaikkan max(updated_at), jadi
+If-Modified-Since bisa menjawab 304 untuk payload yang sudah berubah. ETag memuat
+jumlah baris sehingga aman terhadap delete.
+"""
+import hashlib
+from functools import wraps
+
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import quote_etag
+
+
+def table_version(queryset, updated_field='updated_at', **extra):
+    """
+    Versi satu tabel dalam satu query: jumlah baris, max(updated_field), dan agregat
+    tambahan (mis. Sum('views') untuk counter yang di-update tanpa menyentuh updated_at).
+    """
+    aggregates = {'count': Count('pk'), **extra}
+    if updated_field:
+        aggregates['last_modified'] = Max(updated_field)
+    return queryset.order_by().aggregate(**aggregates)
+
+
+def _to_etag(parts):
+    digest = hashlib.sha1(repr(parts).encode('utf-8')).hexdigest()[:32]
+    # weak ETag: body JSON bisa berbeda byte-per-byte walaupun isinya sama
+    return 'W/' + quote_etag(digest)
+
+
+def conditional_feed(version_func, per_user=False):
+    """
+    Decorator untuk view GET read-only. version_func(request) mengembalikan list dict
+    hasil table_version() (atau dict versi lain); ETag dibangun dari semuanya plus
+    user id dan query string. Jangan dipasang di endpoint berhalaman: versi yang
+    mengagregasi seluruh tabel membuat setiap halaman O(N).
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view(request, *args, **kwargs)
+
+            parts = list(version_func(request))
+            key = [request.GET.urlencode()]
+            if per_user:
+                key.append(request.user.pk)
+            etag = _to_etag((key, parts))
+
+            response = get_conditional_response(request, etag=etag)
+            if response is None:
+                response = view(request, *args, **kwargs)
+                if response.status_code != 200:
+                    return response
+            response.headers.setdefault('ETag', etag)
+            # client boleh menyimpan, tapi wajib revalidasi setiap kali poll
+            response.headers.setdefault('Cache-Control', 'private, no-cache' if per_user else 'no-cache')
+            if per_user:
+                patch_vary_headers(response, ('Cookie',))
+            return response
+        return wrapper
+    return decorator
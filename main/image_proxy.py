@@ -0,0 +1,288 @@
+"""
+Proxy gambar (flag negara, thumbnail merchandise) untuk Flutter dengan cache di disk.
+
+- Isi gambar disimpan content-addressed di <cache>/blobs/<sha256>, jadi URL berbeda
+  dengan gambar yang sama hanya disimpan sekali. <cache>/urls/<sha256(url)>.json
+  mencatat blob, content type, dan kapan entry harus direvalidasi.
+- Umur entry mengikuti Cache-Control / Expires dari upstream (no-store tidak disimpan);
+  entry yang kedaluwarsa direvalidasi dengan If-None-Match / If-Modified-Since, dan
+  kalau upstream sedang error gambar lama tetap dipakai.
+- Total ukuran blob dibatasi IMAGE_PROXY_CACHE_MAX_BYTES; blob yang paling lama tidak
+  dipakai (mtime di-touch setiap hit) dibuang lebih dulu.
+- Miss untuk URL yang sama di satu proses hanya memicu satu request upstream; request
+  lain menunggu lalu membaca hasil cache-nya.
+"""
+import email.utils
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+from collections import namedtuple
+from urllib.parse import urlparse
+
+import requests
+from django.conf import settings
+from django.http import FileResponse, HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_cache_control
+from django.utils.http import parse_etags
+
+CachedImage = namedtuple('CachedImage', ['path', 'digest', 'content_type', 'temporary'])
+
+CHUNK_SIZE = 64 * 1024
+
+
+class ImageProxyError(Exception):
+    pass
+
+
+class InvalidImageUrl(ImageProxyError):
+    pass
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def _cache_dir():
+    return _setting('IMAGE_PROXY_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'trophythreads-image-cache'))
+
+
+def _blob_path(digest):
+    return os.path.join(_cache_dir(), 'blobs', digest)
+
+
+def _entry_path(url):
+    return os.path.join(_cache_dir(), 'urls', hashlib.sha256(url.encode('utf-8')).hexdigest() + '.json')
+
+
+# --- single-flight -----------------------------------------------------------
+
+_locks_guard = threading.Lock()
+_url_locks = {}  # url -> [lock, jumlah pemakai]
+
+
+class _url_lock:
+    def __init__(self, url):
+        self.url = url
+
+    def __enter__(self):
+        with _locks_guard:
+            entry = _url_locks.setdefault(self.url, [threading.Lock(), 0])
+            entry[1] += 1
+        entry[0].acquire()
+
+    def __exit__(self, *exc):
+        with _locks_guard:
+            entry = _url_locks[self.url]
+            entry[0].release()
+            entry[1] -= 1
+            if not entry[1]:
+                del _url_locks[self.url]
+
+
+# --- header upstream -----------------------------------------------------------
+
+def _freshness(headers):
+    """Detik entry boleh dipakai tanpa revalidasi, atau None kalau tidak boleh disimpan."""
+    cache_control = headers.get('Cache-Control', '').lower()
+    if 'no-store' in cache_control or 'private' in cache_control:
+        return None
+    if 'no-cache' in cache_control:
+        return 0
+    match = re.search(r'(?:s-maxage|max-age)\s*=\s*(\d+)', cache_control)
+    if match:
+        return int(match.group(1))
+    expires = headers.get('Expires')
+    if expires:
+        try:
+            parsed = email.utils.parsedate_to_datetime(expires)
+        except (TypeError, ValueError):
+            return 0  # Expires yang tidak valid berarti sudah kedaluwarsa
+        return max(0, int(parsed.timestamp() - time.time()))
+    return _setting('IMAGE_PROXY_DEFAULT_TTL', 24 * 60 * 60)
+
+
+# --- penyimpanan -----------------------------------------------------------------
+
+def _read_entry(url):
+    try:
+        with open(_entry_path(url), encoding='utf-8') as f:
+            entry = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not os.path.exists(_blob_path(entry.get('blob', ''))):
+        return None  # blob sudah di-evict
+    return entry
+
+
+def _atomic_write(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        json.dump(data, f)
+    os.replace(tmp, path)
+
+
+def _touch(digest):
+    try:
+        os.utime(_blob_path(digest))
+    except OSError:
+        pass
+
+
+def _download(response):
+    """Stream body upstream ke file sementara sambil di-hash. Mengembalikan (digest, tmp_path)."""
+    blobs = os.path.join(_cache_dir(), 'blobs')
+    os.makedirs(blobs, exist_ok=True)
+    limit = _setting('IMAGE_PROXY_MAX_IMAGE_BYTES', 10 * 1024 * 1024)
+    sha = hashlib.sha256()
+    size = 0
+    fd, tmp = tempfile.mkstemp(dir=blobs, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            for chunk in response.iter_content(CHUNK_SIZE):
+                size += len(chunk)
+                if size > limit:
+                    raise ImageProxyError('Image too large')
+                sha.update(chunk)
+                f.write(chunk)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+    return sha.hexdigest(), tmp
+
+
+def _evict():
+    blobs = os.path.join(_cache_dir(), 'blobs')
+    limit = _setting('IMAGE_PROXY_CACHE_MAX_BYTES', 256 * 1024 * 1024)
+    files = []
+    total = 0
+    with os.scandir(blobs) as it:
+        for item in it:
+            if item.name.endswith('.tmp') or not item.is_file():
+                continue
+            stat = item.stat()
+            files.append((stat.st_mtime, stat.st_size, item.path))
+            total += stat.st_size
+    # entry url yang menunjuk ke blob yang dihapus dianggap miss saat dibaca
+    for _, size, path in sorted(files):
+        if total <= limit:
+            break
+        try:
+            os.unlink(path)
+            total -= size
+        except OSError:
+            pass
+
+
+# --- fetch -----------------------------------------------------------------------
+
+def _validate(url):
+    parsed = urlparse(url)
+    if parsed.scheme not in ('http', 'https') or not parsed.netloc:
+        raise InvalidImageUrl('Invalid URL')
+
+
+def _fetch(url, entry):
+    headers = {}
+    if entry:
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+    timeout = _setting('IMAGE_PROXY_TIMEOUT', 10)
+    with requests.get(url, headers=headers, timeout=timeout, stream=True) as response:
+        if entry and response.status_code == 304:
+            freshness = _freshness(response.headers)
+            entry['expires'] = time.time() + (freshness or 0)
+            _atomic_write(_entry_path(url), entry)
+            return entry, None
+        response.raise_for_status()
+        if response.status_code != 200:
+            raise ImageProxyError(f'Unexpected upstream status {response.status_code}')
+        digest, tmp = _download(response)
+        freshness = _freshness(response.headers)
+        new_entry = {
+            'blob': digest,
+            'content_type': response.headers.get('Content-Type', 'image/jpeg'),
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+            'expires': time.time() + (freshness or 0),
+        }
+    if freshness is None or os.path.getsize(tmp) > _setting('IMAGE_PROXY_CACHE_MAX_BYTES', 256 * 1024 * 1024):
+        return new_entry, tmp  # no-store atau lebih besar dari cache: dipakai sekali lalu dibuang
+    os.replace(tmp, _blob_path(digest))
+    _atomic_write(_entry_path(url), new_entry)
+    _evict()
+    return new_entry, None
+
+
+def _cached(entry):
+    _touch(entry['blob'])
+    return CachedImage(_blob_path(entry['blob']), entry['blob'], entry['content_type'], False)
+
+
+def get_image(url):
+    """
+    Ambil gambar lewat cache. Kalau upstream melarang caching, CachedImage.temporary
+    bernilai True dan pemanggil wajib menghapus file di CachedImage.path.
+    """
+    _validate(url)
+    entry = _read_entry(url)
+    if entry and entry['expires'] > time.time():
+        return _cached(entry)
+
+    with _url_lock(url):
+        # request lain mungkin sudah mengisi cache selagi kita menunggu
+        entry = _read_entry(url)
+        if entry and entry['expires'] > time.time():
+            return _cached(entry)
+        try:
+            entry, tmp = _fetch(url, entry)
+        except (requests.RequestException, ImageProxyError):
+            if entry:
+                return _cached(entry)  # upstream bermasalah, pakai gambar lama
+            raise
+        if tmp:
+            return CachedImage(tmp, entry['blob'], entry['content_type'], True)
+        return _cached(entry)
+
+
+def serve(request, _retry=True):
+    """View bersama untuk endpoint proxy-image: ?url=<gambar upstream>."""
+    image_url = request.GET.get('url')
+    if not image_url:
+        return HttpResponse('No URL provided', status=400)
+    try:
+        image = get_image(image_url)
+    except InvalidImageUrl:
+        return HttpResponse('Invalid URL', status=400)
+    except (ImageProxyError, requests.RequestException) as e:
+        return HttpResponse(f'Error fetching image: {str(e)}', status=500)
+
+    etag = f'"{image.digest}"'
+    if image.temporary:
+        with open(image.path, 'rb') as f:
+            response = HttpResponse(f.read(), content_type=image.content_type)
+        os.unlink(image.path)
+        response['ETag'] = etag
+        patch_cache_control(response, no_store=True)
+        return response
+
+    if etag in parse_etags(request.headers.get('If-None-Match', '')):
+        response = HttpResponseNotModified()
+    else:
+        try:
+            f = open(image.path, 'rb')
+        except FileNotFoundError:
+            # blob baru saja di-evict oleh request lain, ambil ulang sekali lewat cache
+            if _retry:
+                return serve(request, _retry=False)
+            return HttpResponse('Error fetching image: cache entry evicted', status=500)
+        response = FileResponse(f, content_type=image.content_type)
+    response['ETag'] = etag
+    patch_cache_control(response, public=True, max_age=_setting('IMAGE_PROXY_MAX_AGE', 7 * 24 * 60 * 60))
+    return response
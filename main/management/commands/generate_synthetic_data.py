@@ -0,0 +1,229 @@
+import datetime
+import random
+import uuid
+from collections import Counter
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from cartApp.models import Purchase, PurchasedProduct
+from favoritesApp import favorite_cache, leaderboard
+from favoritesApp.models import Favorite
+from forumApp.models import Comment, ForumPost
+from InformasiPertandingan import country_cache
+from InformasiPertandingan.models import Country, Informasi, rebuild_match_stats
+from main.models import Profile
+from merchandiseApp.models import Merchandise
+from reviewproduct.models import ProductRatingSummary, Review
+
+USER_PREFIX = 'bench_user_'
+COUNTRY_PREFIX = 'Bench Country '
+BATCH_SIZE = 1000
+# kosakata teks thread/komentar supaya index full-text search punya distribusi kata yang realistis
+FORUM_WORDS = (
+    'gol', 'penalti', 'kartu', 'merah', 'kuning', 'wasit', 'offside', 'tendangan', 'bebas', 'sudut',
+    'kiper', 'bek', 'gelandang', 'striker', 'pelatih', 'taktik', 'formasi', 'juara', 'final', 'semifinal',
+    'grup', 'klasemen', 'piala', 'dunia', 'timnas', 'suporter', 'stadion', 'jersey', 'tiket', 'transfer',
+    'cedera', 'assist', 'hattrick', 'var', 'babak', 'pertama', 'kedua', 'menang', 'kalah', 'seri',
+)
+
+# jumlah baris per scale=1; setiap opsi bisa di-override satu per satu
+DEFAULT_SIZES = {
+    'users': 200,
+    'merchandise': 1000,
+    'purchases': 5000,
+    'reviews': 2000,
+    'favorites': 3000,
+    'threads': 1000,
+    'comments': 10000,
+    'countries': 50,
+    'matches': 2000,
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Buat dataset sintetis (user, merchandise, purchase, review, favorite, thread, komentar, "
+        "match) untuk benchmark. Semua user bernama bench_user_*, jadi --clear bisa menghapusnya lagi."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', type=float, default=1.0,
+                            help="Pengali untuk semua ukuran default.")
+        parser.add_argument('--seed', type=int, default=42,
+                            help="Seed random supaya dataset bisa direproduksi.")
+        parser.add_argument('--clear', action='store_true',
+                            help="Hapus data sintetis sebelumnya sebelum membuat yang baru.")
+        for name, size in DEFAULT_SIZES.items():
+            parser.add_argument(f'--{name}', type=int, default=None,
+                                help=f"Jumlah {name} (default {size} x scale).")
+
+    def handle(self, *args, **options):
+        sizes = {
+            name: options[name] if options[name] is not None else int(size * options['scale'])
+            for name, size in DEFAULT_SIZES.items()
+        }
+        self.rng = random.Random(options['seed'])
+        self.created = {}
+
+        if options['clear']:
+            self._clear()
+
+        with transaction.atomic():
+            users = self._users(sizes['users'])
+            if not users:
+                self.stdout.write(self.style.WARNING("Tidak ada user, dataset tidak dibuat."))
+                return
+            merchandise = self._merchandise(sizes['merchandise'], users)
+            purchases = self._purchases(sizes['purchases'], users, merchandise)
+            self._reviews(sizes['reviews'], purchases)
+            self._favorites(sizes['favorites'], users, merchandise)
+            threads = self._threads(sizes['threads'], users)
+            self._comments(sizes['comments'], users, threads)
+            countries = self._countries(sizes['countries'])
+            self._matches(sizes['matches'], users, countries)
+            # review dan match dibuat lewat bulk_create, ringkasan rating dan statistik tim dihitung ulang sekaligus
+            ProductRatingSummary.rebuild([m.pk for m in merchandise])
+            rebuild_match_stats()
+
+        self.stdout.write(self.style.SUCCESS(
+            "Dataset sintetis dibuat: " + ", ".join(f"{name}={self.created.get(name, 0)}" for name in DEFAULT_SIZES)
+        ))
+
+    # --- helpers ------------------------------------------------------------------
+
+    def _uuid(self):
+        return uuid.UUID(int=self.rng.getrandbits(128), version=4)
+
+    def _bulk(self, name, model, objects):
+        model.objects.bulk_create(objects, batch_size=BATCH_SIZE)
+        self.created[name] = len(objects)
+        return objects
+
+    def _clear(self):
+        users = User.objects.filter(username__startswith=USER_PREFIX)
+        Purchase.objects.filter(user__in=users).delete()
+        deleted, _ = users.delete()  # merchandise, review, favorite, thread, match ikut ter-cascade
+        Country.objects.filter(name__startswith=COUNTRY_PREFIX).delete()
+        self.stdout.write(f"Data sintetis lama dihapus ({deleted} baris).")
+
+    def _users(self, count):
+        start = User.objects.filter(username__startswith=USER_PREFIX).count()
+        password = make_password('benchpass')  # hashing sekali saja, dipakai semua user
+        users = [User(username=f'{USER_PREFIX}{start + i:06d}', password=password) for i in range(count)]
+        self._bulk('users', User, users)  # SQLite 3.35+ dan Postgres mengisi pk dari bulk_create
+        Profile.objects.bulk_create([Profile(user=u) for u in users], batch_size=BATCH_SIZE)
+        return users
+
+    def _merchandise(self, count, users):
+        categories = [value for value, _ in Merchandise.CATEGORY_CHOICES]
+        items = [
+            Merchandise(
+                id=self._uuid(),
+                user=self.rng.choice(users),
+                name=f'Bench Item {i:06d}',
+                price=self.rng.randrange(10, 1000) * 1000,
+                category=self.rng.choice(categories),
+                stock=self.rng.randrange(0, 500),
+                thumbnail=f'https://example.com/bench/{i}.jpg',
+                description='Synthetic merchandise for benchmarks.',
+                product_views=self.rng.randrange(0, 300),
+                is_featured=self.rng.random() < 0.05,
+            )
+            for i in range(count)
+        ]
+        return self._bulk('merchandise', Merchandise, items)
+
+    def _purchases(self, count, users, merchandise):
+        purchases = []
+        now = timezone.now()
+        while merchandise and len(purchases) < count:
+            order_token = self._uuid()
+            ordered_at = now - datetime.timedelta(seconds=self.rng.randrange(0, 365 * 24 * 3600))
+            user = self.rng.choice(users)
+            for _ in range(min(self.rng.randint(1, 3), count - len(purchases))):
+                product = self.rng.choice(merchandise)
+                purchases.append(Purchase(
+                    order_token=order_token, user=user, product=product,
+                    product_name=product.name, product_price=product.price,
+                    quantity=self.rng.randint(1, 3), created_at=ordered_at,
+                ))
+        created = self._bulk('purchases', Purchase, purchases)
+        PurchasedProduct.record(created)
+        return created
+
+    def _reviews(self, count, purchases):
+        # review hanya untuk pasangan (user, produk) yang memang pernah dibeli
+        pairs = list(dict.fromkeys((p.user, p.product) for p in purchases))
+        self.rng.shuffle(pairs)
+        reviews = [
+            Review(id=self._uuid(), user=user, product=product, rating=self.rng.randint(1, 5),
+                   body='Synthetic review.')
+            for user, product in pairs[:count]
+        ]
+        return self._bulk('reviews', Review, reviews)
+
+    def _favorites(self, count, users, merchandise):
+        pairs = set()
+        limit = min(count, len(users) * len(merchandise))
+        while len(pairs) < limit:
+            pairs.add((self.rng.randrange(len(users)), self.rng.randrange(len(merchandise))))
+        favorites = [Favorite(id=self._uuid(), user=users[u], merchandise=merchandise[m]) for u, m in sorted(pairs)]
+        created = self._bulk('favorites', Favorite, favorites)
+        # bulk_create tidak lewat Favorite.save / post_save
+        favorite_cache.invalidate_many(user.pk for user in users)
+        leaderboard.apply_change(Counter(merchandise[m].pk for _, m in pairs))
+        return created
+
+    def _threads(self, count, users):
+        threads = [
+            ForumPost(id=self._uuid(), title=f'Bench thread {i:06d} {self._words(3)}', content=self._words(30),
+                      author=self.rng.choice(users), post_type=self.rng.choice(['official', 'personal']),
+                      views=self.rng.randrange(0, 100))
+            for i in range(count)
+        ]
+        return self._bulk('threads', ForumPost, threads)
+
+    def _comments(self, count, users, threads):
+        if not threads:
+            return []
+        comments = [
+            Comment(id=self._uuid(), post=self.rng.choice(threads), author=self.rng.choice(users),
+                    content=f'Synthetic comment {i}: {self._words(12)}')
+            for i in range(count)
+        ]
+        return self._bulk('comments', Comment, comments)
+
+    def _words(self, count):
+        return ' '.join(self.rng.choices(FORUM_WORDS, k=count))
+
+    def _countries(self, count):
+        start = Country.objects.filter(name__startswith=COUNTRY_PREFIX).count()
+        countries = [
+            Country(id=self._uuid(), name=f'{COUNTRY_PREFIX}{start + i:04d}',
+                    flag=f'https://example.com/flags/{start + i}.png')
+            for i in range(count)
+        ]
+        self._bulk('countries', Country, countries)
+        country_cache.invalidate()  # bulk_create tidak mengirim post_save
+        return countries
+
+    def _matches(self, count, users, countries):
+        if len(countries) < 2:
+            return []
+        first_day = datetime.date(2020, 1, 1)
+        matches = []
+        for i in range(count):
+            home, away = self.rng.sample(countries, 2)
+            matches.append(Informasi(
+                id=self._uuid(), user=self.rng.choice(users), title=f'{home.name} vs {away.name}',
+                date=first_day + datetime.timedelta(days=self.rng.randrange(0, 5 * 365)),
+                city=f'City {self.rng.randrange(100)}', country=f'Host {self.rng.randrange(30)}',
+                home_team=home, away_team=away,
+                score_home_team=self.rng.randrange(0, 5), score_away_team=self.rng.randrange(0, 5),
+                views=self.rng.randrange(0, 50),
+            ))
+        return self._bulk('matches', Informasi, matches)
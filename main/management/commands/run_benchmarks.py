@@ -0,0 +1,152 @@
+import json
+import math
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.urls import reverse
+
+from forumApp.models import ForumPost
+from InformasiPertandingan.models import Country
+from main import view_counter
+from main.request_metrics import QueryCounter
+from merchandiseApp.models import Merchandise
+
+from .generate_synthetic_data import USER_PREFIX
+
+# (nama, url name, query string, butuh login, argumen url yang diambil dari dataset)
+ENDPOINTS = [
+    ('merchandise.list', 'merchandiseApp:get_merchandise_json', {}, False, None),
+    ('merchandise.catalog', 'merchandiseApp:catalog_json', {'limit': 20}, False, None),
+    ('merchandise.search', 'merchandiseApp:search_json', {'q': 'item', 'in_stock': 'true', 'limit': 20}, False, None),
+    ('merchandise.reviews', 'reviewproduct:product_reviews_json', {'limit': 20}, False, 'product'),
+    ('forum.threads', 'forumApp:show_json', {}, False, None),
+    ('forum.comments', 'forumApp:get_comments', {}, False, 'thread'),
+    ('forum.search', 'forumApp:search', {'q': 'penalti wasit', 'limit': 20}, False, None),
+    ('forum.search.comments', 'forumApp:search', {'q': 'hattrick final var', 'type': 'comments', 'limit': 20}, False, None),
+    ('matches.list', 'InformasiPertandingan:show_json', {}, False, None),
+    ('matches.api', 'InformasiPertandingan:matches_json', {'limit': 20}, False, None),
+    ('matches.team_stats', 'InformasiPertandingan:team_stats_json', {}, False, 'team'),
+    ('matches.countries', 'InformasiPertandingan:show_json_country', {}, False, None),
+    ('favorites.list', 'favoritesApp:json', {}, True, None),
+    ('favorites.leaderboard', 'favoritesApp:leaderboard', {'limit': 20}, False, None),
+    ('cart.page', 'cartApp:cart_page', {'format': 'json'}, True, None),
+    ('cart.orders', 'cartApp:order_history', {'limit': 20}, True, None),
+]
+
+
+def _percentile(sorted_values, fraction):
+    # nearest-rank
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(fraction * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+class Command(BaseCommand):
+    help = (
+        "Jalankan benchmark endpoint JSON utama lewat Django test client terhadap database aktif "
+        "(SQLite lokal, atau Postgres kalau PRODUCTION/DB_* di-set) dan laporkan p50/p95/p99, "
+        "throughput, dan jumlah query. Isi data dulu dengan generate_synthetic_data."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=50, help="Jumlah request terukur per endpoint.")
+        parser.add_argument('--warmup', type=int, default=5, help="Request pemanasan per endpoint (tidak diukur).")
+        parser.add_argument('--only', action='append', default=[],
+                            help="Hanya endpoint yang namanya mengandung teks ini (boleh diulang).")
+        parser.add_argument('--user', help="Username untuk endpoint yang butuh login (default: user sintetis pertama).")
+        parser.add_argument('--json', action='store_true', help="Cetak hasil sebagai JSON.")
+
+    def handle(self, *args, **options):
+        if options['requests'] < 1:
+            raise CommandError("--requests minimal 1")
+
+        client = Client(SERVER_NAME='localhost')
+        user = self._bench_user(options['user'])
+        targets = {
+            'product': Merchandise.objects.order_by('id').values_list('pk', flat=True).first(),
+            'thread': ForumPost.objects.order_by('id').values_list('pk', flat=True).first(),
+            'team': Country.objects.order_by('id').values_list('pk', flat=True).first(),
+        }
+
+        results = []
+        for name, url_name, params, needs_login, target in ENDPOINTS:
+            if options['only'] and not any(part in name for part in options['only']):
+                continue
+            if needs_login and user is None:
+                self.stderr.write(f"skip {name}: tidak ada user untuk login")
+                continue
+            if target and targets[target] is None:
+                self.stderr.write(f"skip {name}: dataset belum punya {target}")
+                continue
+            url = reverse(url_name, args=[targets[target]] if target else None)
+            if needs_login:
+                client.force_login(user)
+            else:
+                client.logout()
+            results.append(self._run(client, name, url, params, options['warmup'], options['requests']))
+        view_counter.flush()
+
+        if options['json']:
+            self.stdout.write(json.dumps({'database': connection.vendor, 'results': results}, indent=2))
+        else:
+            self._print_table(results)
+
+    def _bench_user(self, username):
+        if username:
+            user = User.objects.filter(username=username).first()
+            if user is None:
+                raise CommandError(f"User {username} tidak ditemukan")
+            return user
+        return User.objects.filter(username__startswith=USER_PREFIX).order_by('username').first()
+
+    def _run(self, client, name, url, params, warmup, count):
+        for _ in range(warmup):
+            client.get(url, params)
+
+        latencies = []
+        queries = []
+        sizes = []
+        statuses = set()
+        started = time.perf_counter()
+        for _ in range(count):
+            counter = QueryCounter()
+            t0 = time.perf_counter()
+            with connection.execute_wrapper(counter):
+                response = client.get(url, params)
+            latencies.append((time.perf_counter() - t0) * 1000)
+            queries.append(counter.count)
+            sizes.append(len(response.content))
+            statuses.add(response.status_code)
+        elapsed = time.perf_counter() - started
+
+        latencies.sort()
+        return {
+            'endpoint': name,
+            'url': url,
+            'requests': count,
+            'status': sorted(statuses),
+            'p50_ms': round(_percentile(latencies, 0.50), 2),
+            'p95_ms': round(_percentile(latencies, 0.95), 2),
+            'p99_ms': round(_percentile(latencies, 0.99), 2),
+            'mean_ms': round(sum(latencies) / count, 2),
+            'throughput_rps': round(count / elapsed, 1),
+            'avg_queries': round(sum(queries) / count, 1),
+            'max_queries': max(queries),
+            'avg_bytes': round(sum(sizes) / count),
+        }
+
+    def _print_table(self, results):
+        header = f"{'endpoint':<22}{'p50':>9}{'p95':>9}{'p99':>9}{'req/s':>9}{'queries':>9}{'bytes':>11}  status"
+        self.stdout.write(f"database: {connection.vendor}")
+        self.stdout.write(header)
+        self.stdout.write('-' * len(header))
+        for r in results:
+            self.stdout.write(
+                f"{r['endpoint']:<22}{r['p50_ms']:>9.2f}{r['p95_ms']:>9.2f}{r['p99_ms']:>9.2f}"
+                f"{r['throughput_rps']:>9.1f}{r['avg_queries']:>9.1f}{r['avg_bytes']:>11}  "
+                + ','.join(str(s) for s in r['status'])
+            )
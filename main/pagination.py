@@ -0,0 +1,93 @@
+import base64
+import datetime
+import json
+import uuid
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def _to_json_value(value):
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return value.isoformat()
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    return value
+
+
+def encode_cursor(values):
+    """Bungkus nilai kolom urutan menjadi token opaque yang aman untuk URL."""
+    raw = json.dumps([_to_json_value(v) for v in values], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(token, size):
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    except (ValueError, TypeError):
+        raise InvalidCursor('Invalid cursor')
+    if not isinstance(values, list) or len(values) != size:
+        raise InvalidCursor('Invalid cursor')
+    return values
+
+
+def get_page_size(request, default=DEFAULT_PAGE_SIZE, maximum=MAX_PAGE_SIZE):
+    try:
+        size = int(request.GET.get('limit', default))
+    except (TypeError, ValueError):
+        size = default
+    return max(1, min(size, maximum))
+
+
+def _keyset_filter(ordering, values):
+    # (a, b) > (x, y)  ==>  a > x OR (a = x AND b > y), arah per kolom mengikuti ordering
+    condition = Q()
+    equal_so_far = Q()
+    for field, value in zip(ordering, values):
+        name = field.lstrip('-')
+        lookup = 'lt' if field.startswith('-') else 'gt'
+        condition |= equal_so_far & Q(**{f'{name}__{lookup}': value})
+        equal_so_far &= Q(**{name: value})
+    return condition
+
+
+def _row_value(row, field):
+    name = field.lstrip('-')
+    if isinstance(row, dict):
+        return row[name]
+    return getattr(row, name)
+
+
+def keyset_paginate(queryset, ordering, cursor=None, limit=DEFAULT_PAGE_SIZE):
+    """
+    Ambil satu halaman dari queryset dengan keyset pagination.
+
+    `ordering` harus unik secara keseluruhan (akhiri dengan primary key) dan
+    tidak boleh berisi kolom nullable. Mengembalikan (rows, next_cursor);
+    next_cursor bernilai None di halaman terakhir.
+    """
+    queryset = queryset.order_by(*ordering)
+    if cursor:
+        values = decode_cursor(cursor, len(ordering))
+        try:
+            queryset = queryset.filter(_keyset_filter(ordering, values))
+            rows = list(queryset[:limit + 1])
+        except (ValidationError, ValueError, TypeError):
+            # nilai di dalam cursor tidak cocok dengan tipe kolomnya
+            raise InvalidCursor('Invalid cursor')
+    else:
+        rows = list(queryset[:limit + 1])
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor([_row_value(rows[-1], f) for f in ordering])
+    return rows, next_cursor
@@ -0,0 +1,73 @@
+"""
+Pub/sub sederhana di dalam satu proses untuk stream SSE (mis. komentar baru per thread).
+
+Subscriber adalah coroutine di event loop ASGI; publisher boleh dari thread mana saja
+(view sync dijalankan Django di thread pool), jadi event dikirim lewat
+loop.call_soon_threadsafe. Subscriber yang idle hanya berupa asyncio.Queue kosong yang
+ditunggu, tanpa polling. Queue dibatasi; subscriber yang tertinggal ditandai overflowed
+dan sebaiknya menutup stream supaya client reconnect dan mengejar dari database.
+
+Hanya menjangkau subscriber di proses yang sama; di deployment multi-proses client
+mengejar event dari proses lain saat reconnect (Last-Event-ID).
+"""
+import asyncio
+import threading
+from collections import defaultdict
+
+DEFAULT_QUEUE_SIZE = 100
+
+_lock = threading.Lock()
+_subscribers = defaultdict(set)
+
+
+class Subscription:
+    def __init__(self, channel, maxsize=DEFAULT_QUEUE_SIZE):
+        self.channel = channel
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize)
+        self.overflowed = False
+
+    def _put(self, event):
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.overflowed = True
+
+    async def get(self, timeout=None):
+        """Event berikutnya; asyncio.TimeoutError kalau tidak ada event selama `timeout` detik."""
+        return await asyncio.wait_for(self.queue.get(), timeout)
+
+
+def subscribe(channel, maxsize=DEFAULT_QUEUE_SIZE):
+    """Daftarkan subscriber baru; harus dipanggil dari dalam event loop."""
+    subscription = Subscription(channel, maxsize)
+    with _lock:
+        _subscribers[channel].add(subscription)
+    return subscription
+
+
+def unsubscribe(subscription):
+    with _lock:
+        subscribers = _subscribers.get(subscription.channel)
+        if subscribers is not None:
+            subscribers.discard(subscription)
+            if not subscribers:
+                del _subscribers[subscription.channel]
+
+
+def publish(channel, event):
+    """Kirim event ke semua subscriber channel; aman dipanggil dari thread mana pun."""
+    with _lock:
+        subscribers = list(_subscribers.get(channel, ()))
+    for subscription in subscribers:
+        try:
+            subscription.loop.call_soon_threadsafe(subscription._put, event)
+        except RuntimeError:
+            # event loop subscriber sudah ditutup
+            unsubscribe(subscription)
+    return len(subscribers)
+
+
+def subscriber_count(channel):
+    with _lock:
+        return len(_subscribers.get(channel, ()))
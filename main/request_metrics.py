@@ -0,0 +1,148 @@
+"""
+Instrumentasi per request: wall time, jumlah query, waktu DB, dan ukuran response,
+dikelompokkan per nama URL (mis. "forumApp:show_json").
+
+Opt-in lewat REQUEST_METRICS_ENABLED (env REQUEST_METRICS_ENABLED=true). Kalau tidak
+aktif, middleware melempar MiddlewareNotUsed sehingga Django melewatinya sama sekali.
+Data hanya disimpan di memori proses (histogram dengan bucket tetap), jadi biaya per
+request cuma beberapa penjumlahan di bawah satu lock.
+"""
+import bisect
+import threading
+import time
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+
+# batas atas bucket; bucket terakhir menampung semua yang lebih besar
+LATENCY_BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 200)
+
+UNRESOLVED = '<unresolved>'
+
+
+class _Stats:
+    __slots__ = ('count', 'total_ms', 'max_ms', 'queries', 'max_queries', 'db_ms', 'bytes',
+                 'latency_hist', 'query_hist')
+
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.queries = 0
+        self.max_queries = 0
+        self.db_ms = 0.0
+        self.bytes = 0
+        self.latency_hist = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.query_hist = [0] * (len(QUERY_BUCKETS) + 1)
+
+    def add(self, wall_ms, queries, db_ms, size):
+        self.count += 1
+        self.total_ms += wall_ms
+        self.max_ms = max(self.max_ms, wall_ms)
+        self.queries += queries
+        self.max_queries = max(self.max_queries, queries)
+        self.db_ms += db_ms
+        self.bytes += size
+        self.latency_hist[bisect.bisect_left(LATENCY_BUCKETS_MS, wall_ms)] += 1
+        self.query_hist[bisect.bisect_left(QUERY_BUCKETS, queries)] += 1
+
+    def as_dict(self):
+        return {
+            'count': self.count,
+            'avg_ms': round(self.total_ms / self.count, 2),
+            'max_ms': round(self.max_ms, 2),
+            'p50_ms': _percentile(self.latency_hist, LATENCY_BUCKETS_MS, 0.50, self.max_ms),
+            'p95_ms': _percentile(self.latency_hist, LATENCY_BUCKETS_MS, 0.95, self.max_ms),
+            'p99_ms': _percentile(self.latency_hist, LATENCY_BUCKETS_MS, 0.99, self.max_ms),
+            'avg_queries': round(self.queries / self.count, 2),
+            'max_queries': self.max_queries,
+            'avg_db_ms': round(self.db_ms / self.count, 2),
+            'avg_bytes': round(self.bytes / self.count),
+            'latency_histogram': _histogram(self.latency_hist, LATENCY_BUCKETS_MS),
+            'query_histogram': _histogram(self.query_hist, QUERY_BUCKETS),
+        }
+
+
+def _percentile(hist, bounds, fraction, max_value):
+    # batas atas bucket tempat persentil jatuh (estimasi konservatif)
+    target = fraction * sum(hist)
+    seen = 0
+    for i, n in enumerate(hist):
+        seen += n
+        if n and seen >= target:
+            return bounds[i] if i < len(bounds) else round(max_value, 2)
+    return 0
+
+
+def _histogram(hist, bounds):
+    labels = [f'<={b}' for b in bounds] + [f'>{bounds[-1]}']
+    return {label: n for label, n in zip(labels, hist) if n}
+
+
+_lock = threading.Lock()
+_stats = {}
+
+
+def record(name, wall_ms, queries, db_ms, size):
+    with _lock:
+        stats = _stats.get(name)
+        if stats is None:
+            stats = _stats[name] = _Stats()
+        stats.add(wall_ms, queries, db_ms, size)
+
+
+def snapshot():
+    with _lock:
+        return {name: stats.as_dict() for name, stats in sorted(_stats.items())}
+
+
+def reset():
+    with _lock:
+        _stats.clear()
+
+
+class QueryCounter:
+    __slots__ = ('count', 'seconds')
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.seconds += time.perf_counter() - start
+
+
+class RequestMetricsMiddleware:
+    def __init__(self, get_response):
+        if not getattr(settings, 'REQUEST_METRICS_ENABLED', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        counter = QueryCounter()
+        start = time.perf_counter()
+        with connection.execute_wrapper(counter):
+            response = self.get_response(request)
+        wall_ms = (time.perf_counter() - start) * 1000
+        db_ms = counter.seconds * 1000
+
+        match = getattr(request, 'resolver_match', None)
+        name = match.view_name if match else UNRESOLVED
+        if response.streaming:
+            size = int(response.get('Content-Length') or 0)
+        else:
+            size = len(response.content)
+        record(name, wall_ms, counter.count, db_ms, size)
+
+        response['Server-Timing'] = (
+            f'app;dur={wall_ms:.1f}, db;dur={db_ms:.1f};desc="{counter.count} queries"'
+        )
+        return response
+
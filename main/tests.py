@@ -1,3 +1,446 @@
-from django.test import TestCase
+import os
+import shutil
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 
-# Create your tests here.
+import io
+import json
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import Client, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+
+from main import image_proxy, request_metrics, view_counter
+from merchandiseApp.models import Merchandise
+
+
+class ViewCounterTest(TestCase):
+    def setUp(self):
+        view_counter.flush()
+        user = User.objects.create_user(username='counter', password='testpass123')
+        self.items = [
+            Merchandise.objects.create(user=user, name=f'Item {i}', price=1000, category='ball',
+                                       stock=1, description='Test', product_views=99)
+            for i in range(3)
+        ]
+
+    def test_increments_are_buffered_until_flush(self):
+        item = self.items[0]
+        item.increment_views()
+        item.increment_views()
+
+        self.assertEqual(Merchandise.objects.get(pk=item.pk).product_views, 99)
+        self.assertEqual(item.total_views, 101)
+        self.assertTrue(item.is_product_hot)
+
+        view_counter.flush()
+        item.refresh_from_db()
+        self.assertEqual(item.product_views, 101)
+        self.assertEqual(item.total_views, 101)
+
+    def test_flush_batches_rows_with_same_delta(self):
+        for item in self.items:
+            item.increment_views()
+        with self.assertNumQueries(1):
+            self.assertEqual(view_counter.flush(), 3)
+        self.assertEqual(
+            sorted(Merchandise.objects.values_list('product_views', flat=True)), [100, 100, 100]
+        )
+
+    @override_settings(VIEW_COUNTER_FLUSH_THRESHOLD=2)
+    def test_threshold_triggers_flush(self):
+        item = self.items[0]
+        item.increment_views()
+        self.assertEqual(Merchandise.objects.get(pk=item.pk).product_views, 99)
+        item.increment_views()
+        self.assertEqual(Merchandise.objects.get(pk=item.pk).product_views, 101)
+        self.assertEqual(view_counter.pending(Merchandise, item.pk, 'product_views'), 0)
+        self.assertEqual(item.total_views, 101)
+
+
+class ViewCounterTimerTest(TransactionTestCase):
+    # timer flush berjalan di thread lain dengan koneksi sendiri, jadi barisnya harus sudah di-commit
+
+    @override_settings(VIEW_COUNTER_FLUSH_INTERVAL=0.1)
+    def test_buffer_is_flushed_without_further_views(self):
+        user = User.objects.create_user(username='timer', password='testpass123')
+        item = Merchandise.objects.create(user=user, name='Scarf', price=1000, category='ball',
+                                          stock=1, description='Test')
+        view_counter.flush()
+        item.increment_views()
+        self.assertEqual(Merchandise.objects.get(pk=item.pk).product_views, 0)
+
+        deadline = time.monotonic() + 5
+        while view_counter.pending(Merchandise, item.pk, 'product_views') and time.monotonic() < deadline:
+            time.sleep(0.05)
+        self.assertEqual(Merchandise.objects.get(pk=item.pk).product_views, 1)
+
+
+class ConditionalFeedTest(TestCase):
+    def setUp(self):
+        view_counter.flush()
+        self.user = User.objects.create_user(username='feed', password='testpass123')
+        self.item = Merchandise.objects.create(user=self.user, name='Jersey', price=1000, category='ball',
+                                               stock=5, description='Test')
+        self.url = reverse('merchandiseApp:get_merchandise_json')
+
+    def test_matching_etag_returns_304_with_version_queries_only(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        # delete tidak menggeser max(updated_at), jadi feed hanya divalidasi lewat ETag
+        self.assertNotIn('Last-Modified', response)
+
+        with self.assertNumQueries(2):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+
+    def test_changes_produce_new_etag(self):
+        etag = self.client.get(self.url)['ETag']
+
+        # view yang masih di buffer sudah terlihat di total_views, jadi ETag ikut berubah
+        self.item.increment_views()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()[0]['product_views'], 1)
+        etag = response['ETag']
+
+        self.item.stock = 4
+        self.item.save()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+
+        # views di-flush lewat UPDATE tanpa updated_at, versi tetap harus berubah
+        self.item.increment_views()
+        view_counter.flush()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+
+        self.item.delete()
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_per_user_feed_depends_on_user(self):
+        url = reverse('favoritesApp:json')
+        self.client.login(username='feed', password='testpass123')
+        response = self.client.get(url)
+        self.assertIn('Cookie', response['Vary'])
+
+        User.objects.create_user(username='other', password='testpass123')
+        self.client.login(username='other', password='testpass123')
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 200)
+
+
+class _ImageHandler(BaseHTTPRequestHandler):
+    # path -> (body, headers); diisi per test
+    images = {}
+    hits = []
+    delay = 0
+
+    def do_GET(self):
+        _ImageHandler.hits.append(self.path)
+        time.sleep(_ImageHandler.delay)
+        if self.path not in self.images:
+            self.send_response(404)
+            self.end_headers()
+            return
+        body, headers = self.images[self.path]
+        if 'ETag' in headers and self.headers.get('If-None-Match') == headers['ETag']:
+            self.send_response(304)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', 'image/png')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class ImageProxyTest(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), _ImageHandler)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.base = f'http://127.0.0.1:{cls.server.server_port}'
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.cache_dir, ignore_errors=True)
+        settings_override = override_settings(IMAGE_PROXY_CACHE_DIR=self.cache_dir)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        _ImageHandler.images = {
+            '/flag.png': (b'flag-bytes', {'Cache-Control': 'max-age=3600', 'ETag': '"v1"'}),
+            '/copy.png': (b'flag-bytes', {'Cache-Control': 'max-age=3600'}),
+            '/secret.png': (b'secret', {'Cache-Control': 'no-store'}),
+            '/stale.png': (b'stale', {'Cache-Control': 'max-age=0', 'ETag': '"s1"'}),
+        }
+        _ImageHandler.hits = []
+        _ImageHandler.delay = 0
+
+    def _get(self, path, **headers):
+        return self.client.get(reverse('InformasiPertandingan:proxy_image'), {'url': self.base + path}, **headers)
+
+    def test_second_request_served_from_disk(self):
+        first = self._get('/flag.png')
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(b''.join(first.streaming_content), b'flag-bytes')
+        second = self.client.get(reverse('cartApp:proxy_image'), {'url': self.base + '/flag.png'})
+        self.assertEqual(b''.join(second.streaming_content), b'flag-bytes')
+        self.assertEqual(_ImageHandler.hits, ['/flag.png'])
+        self.assertFalse(first['ETag'].startswith('W/'))
+        self.assertIn('max-age=', first['Cache-Control'])
+
+        not_modified = self._get('/flag.png', HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(not_modified.status_code, 304)
+
+    def test_identical_images_share_one_blob(self):
+        self.assertEqual(self._get('/flag.png')['ETag'], self._get('/copy.png')['ETag'])
+        self.assertEqual(len(os.listdir(os.path.join(self.cache_dir, 'blobs'))), 1)
+
+    def test_no_store_is_not_cached(self):
+        self.assertEqual(self._get('/secret.png').content, b'secret')
+        self.assertEqual(self._get('/secret.png').content, b'secret')
+        self.assertEqual(len(_ImageHandler.hits), 2)
+        self.assertEqual(os.listdir(os.path.join(self.cache_dir, 'blobs')), [])
+
+    def test_stale_entry_is_revalidated_and_survives_upstream_errors(self):
+        self._get('/stale.png')
+        response = self._get('/stale.png')
+        self.assertEqual(b''.join(response.streaming_content), b'stale')
+        self.assertEqual(len(_ImageHandler.hits), 2)  # revalidasi dijawab 304
+
+        del _ImageHandler.images['/stale.png']
+        response = self._get('/stale.png')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), b'stale')
+
+    def test_concurrent_misses_fetch_upstream_once(self):
+        _ImageHandler.delay = 0.3
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(image_proxy.get_image(self.base + '/flag.png')))
+                   for _ in range(5)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(len(results), 5)
+        self.assertEqual(_ImageHandler.hits, ['/flag.png'])
+
+    def test_least_recently_used_blob_is_evicted(self):
+        _ImageHandler.images = {f'/{i}.png': (bytes([i]) * 10, {}) for i in range(3)}
+        with override_settings(IMAGE_PROXY_CACHE_MAX_BYTES=25):
+            image_proxy.get_image(self.base + '/0.png')
+            image_proxy.get_image(self.base + '/1.png')
+            os.utime(image_proxy.get_image(self.base + '/1.png').path, (1, 1))  # paling lama tidak dipakai
+            image_proxy.get_image(self.base + '/2.png')
+        blobs = os.listdir(os.path.join(self.cache_dir, 'blobs'))
+        self.assertEqual(len(blobs), 2)
+        image_proxy.get_image(self.base + '/1.png')
+        self.assertEqual(_ImageHandler.hits.count('/1.png'), 2)
+
+    def test_rejects_non_http_urls(self):
+        response = self.client.get(reverse('cartApp:proxy_image'), {'url': 'file:///etc/passwd'})
+        self.assertEqual(response.status_code, 400)
+
+
+@override_settings(REQUEST_METRICS_ENABLED=True)
+class RequestMetricsTest(TestCase):
+    def setUp(self):
+        request_metrics.reset()
+        self.addCleanup(request_metrics.reset)
+        self.client = Client()  # middleware dimuat ulang dengan setting di atas
+        self.admin = User.objects.create_user(username='admin', password='testpass123', is_staff=True)
+
+    def test_records_per_url_name_and_sets_server_timing(self):
+        Merchandise.objects.create(name='Jersey', price=1000, category='ball', stock=1, description='Test')
+        response = self.client.get(reverse('merchandiseApp:get_merchandise_json'))
+        self.assertIn('db;dur=', response['Server-Timing'])
+        self.client.get(reverse('merchandiseApp:get_merchandise_json'))
+
+        stats = request_metrics.snapshot()['merchandiseApp:get_merchandise_json']
+        self.assertEqual(stats['count'], 2)
+        self.assertGreaterEqual(stats['max_queries'], 1)
+        self.assertGreater(stats['avg_bytes'], 0)
+
+    def test_endpoint_is_admin_only(self):
+        url = reverse('main:request_metrics')
+        self.assertEqual(self.client.get(url).status_code, 302)
+        self.client.login(username='admin', password='testpass123')
+        data = self.client.get(url).json()
+        self.assertTrue(data['enabled'])
+        self.assertIn('main:request_metrics', data['views'])
+
+    @override_settings(REQUEST_METRICS_ENABLED=False)
+    def test_disabled_middleware_is_skipped(self):
+        response = Client().get(reverse('merchandiseApp:get_merchandise_json'))
+        self.assertNotIn('Server-Timing', response)
+        self.assertEqual(request_metrics.snapshot(), {})
+
+
+class BenchmarkCommandsTest(TestCase):
+    def test_generate_dataset_and_run_benchmarks(self):
+        call_command('generate_synthetic_data', scale=0.01, seed=1, stdout=io.StringIO())
+        self.assertEqual(User.objects.filter(username__startswith='bench_user_').count(), 2)
+        self.assertEqual(Merchandise.objects.count(), 10)
+
+        out = io.StringIO()
+        call_command('run_benchmarks', requests=2, warmup=0, json=True, stdout=out, stderr=io.StringIO())
+        report = json.loads(out.getvalue())
+        results = {r['endpoint']: r for r in report['results']}
+        self.assertIn('forum.threads', results)
+        self.assertIn('favorites.list', results)
+        for result in results.values():
+            self.assertEqual(result['status'], [200], result['endpoint'])
+            self.assertLessEqual(result['p50_ms'], result['p99_ms'])
+
+        call_command('generate_synthetic_data', scale=0, clear=True, stdout=io.StringIO())
+        self.assertFalse(User.objects.filter(username__startswith='bench_user_').exists())
+
+
+class BulkImportTest(TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmpdir)
+        self.seller = User.objects.create_user(username='seller', password='testpass123')
+
+    def _csv(self, name, text):
+        path = os.path.join(self.tmpdir, name)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(text)
+        return path
+
+    def test_merchandise_import_batches_and_upserts(self):
+        from import_merchandise import MerchandiseImporter
+        from main.bulk_import import read_csv
+
+        path = self._csv('merch.csv', (
+            'name,price,category,thumbnail,stock,description\n'
+            'Jersey,1000,jersey,,5,A\n'
+            ',1000,jersey,,5,nama kosong\n'
+            'Ball,abc,ball,,1,harga tidak valid\n'
+            'Scarf,300,accessories,,2,C\n'
+            'Jersey,1500,jersey,,7,A baru\n'
+        ))
+        out = io.StringIO()
+        # 1 prefetch + 2 batch x (savepoint, upsert, release); baris gagal tidak menambah query
+        with self.assertNumQueries(7):
+            importer = MerchandiseImporter(self.seller, batch_size=2, stdout=out).run(read_csv(path))
+
+        self.assertEqual((importer.read, importer.skipped), (5, 2))
+        self.assertIn('baris 3', out.getvalue())
+        self.assertIn('baris 4', out.getvalue())
+        jersey = Merchandise.objects.get(name='Jersey')
+        self.assertEqual((jersey.price, jersey.stock, jersey.user), (1500, 7, self.seller))
+
+        # import ulang tidak menduplikasi, baris lama di-update
+        path = self._csv('merch2.csv', 'name,price,category,thumbnail,stock,description\nScarf,350,accessories,,9,C\n')
+        MerchandiseImporter(self.seller, stdout=io.StringIO()).run(read_csv(path))
+        self.assertEqual(Merchandise.objects.count(), 2)
+        self.assertEqual(Merchandise.objects.get(name='Scarf').stock, 9)
+
+    def test_match_import_creates_missing_teams_and_keeps_views(self):
+        from InformasiPertandingan.import_data_csv import MatchImporter
+        from InformasiPertandingan.models import Country, Informasi
+        from main.bulk_import import read_csv
+
+        Country.objects.create(name='Indonesia', flag='https://example.com/id.png')
+        header = 'date,home_team,away_team,home_score,away_score,tournament,city,country,neutral\n'
+        path = self._csv('matches.csv', header + (
+            '2024-01-01,Indonesia,Japan,1,2,Friendly,Jakarta,Indonesia,FALSE\n'
+            '2024-02-01,Japan,Vietnam,0,0,Friendly,Tokyo,Japan,FALSE\n'
+            'bukan-tanggal,Japan,Vietnam,0,0,Friendly,Tokyo,Japan,FALSE\n'
+        ))
+        importer = MatchImporter(batch_size=1, stdout=io.StringIO()).run(read_csv(path))
+
+        self.assertEqual((importer.written, importer.skipped), (2, 1))
+        self.assertEqual(Country.objects.filter(name__in=['Japan', 'Vietnam']).count(), 2)
+        match = Informasi.objects.get(home_team__name='Indonesia')
+        Informasi.objects.filter(pk=match.pk).update(views=999)
+
+        path = self._csv('matches2.csv', header + '2024-01-01,Indonesia,Japan,3,2,Friendly,Jakarta,Indonesia,FALSE\n')
+        MatchImporter(stdout=io.StringIO()).run(read_csv(path))
+        match.refresh_from_db()
+        self.assertEqual((match.score_home_team, match.views), (3, 999))
+        self.assertEqual(Informasi.objects.count(), 2)
+
+    def test_favorite_import_creates_users_and_keeps_created_at(self):
+        from favoritesApp.import_favorites import FavoriteImporter
+        from favoritesApp.models import Favorite
+        from main.bulk_import import read_csv
+
+        Merchandise.objects.create(user=self.seller, name='Face Mask Timnas', price=1000, category='others',
+                                   stock=1, description='Test')
+        path = self._csv('favorites.csv', (
+            'id,user,merchandise,created_at\n'
+            ',fans1,face mask timnas,2025-09-14 05:47:04\n'
+            ',fans1,Poster Baru,\n'
+            ',fans2,Face Mask,2025-09-15 05:47:04\n'
+        ))
+        # 3 prefetch + satu batch: user baru, placeholder merchandise, favorite,
+        # favorite_count (satu UPDATE per besar perubahan), created_at
+        with self.assertNumQueries(11):
+            importer = FavoriteImporter(stdout=io.StringIO()).run(read_csv(path))
+
+        self.assertEqual(importer.created_count, 3)
+        self.assertTrue(User.objects.filter(username='fans2', password__startswith='!').exists())
+        self.assertTrue(Merchandise.objects.filter(name='Poster Baru').exists())
+        favorite = Favorite.objects.get(user__username='fans1', merchandise__name='Face Mask Timnas')
+        self.assertEqual(favorite.created_at.year, 2025)
+
+        FavoriteImporter(stdout=io.StringIO()).run(read_csv(path))
+        self.assertEqual(Favorite.objects.count(), 3)
+        self.assertEqual(Merchandise.objects.get(name='Face Mask Timnas').favorite_count, 2)
+
+
+class PubSubTest(SimpleTestCase):
+    def test_publish_from_other_thread_wakes_subscriber(self):
+        import asyncio
+        from main import pubsub
+
+        async def scenario():
+            subscription = pubsub.subscribe('test-channel')
+            try:
+                self.assertEqual(pubsub.subscriber_count('test-channel'), 1)
+                with self.assertRaises(asyncio.TimeoutError):
+                    await subscription.get(timeout=0.01)
+                threading.Thread(target=pubsub.publish, args=('test-channel', {'n': 1})).start()
+                return await subscription.get(timeout=2)
+            finally:
+                pubsub.unsubscribe(subscription)
+
+        self.assertEqual(asyncio.run(scenario()), {'n': 1})
+        self.assertEqual(pubsub.subscriber_count('test-channel'), 0)
+        self.assertEqual(pubsub.publish('test-channel', {'n': 2}), 0)
+
+    def test_slow_subscriber_is_marked_overflowed(self):
+        import asyncio
+        from main import pubsub
+
+        async def scenario():
+            subscription = pubsub.subscribe('test-overflow', maxsize=2)
+            try:
+                for i in range(3):
+                    pubsub.publish('test-overflow', i)
+                await asyncio.sleep(0)
+                return subscription.overflowed, subscription.queue.qsize()
+            finally:
+                pubsub.unsubscribe(subscription)
+
+        self.assertEqual(asyncio.run(scenario()), (True, 2))
@@ -1,5 +1,5 @@
 from django.urls import path
-from main.views import login_user, register, guest_login
+from main.views import login_user, register, guest_login, request_metrics_view
 
 app_name = 'main'
 
@@ -7,4 +7,5 @@ urlpatterns = [
     path('', login_user, name='login'),
     path('register/', register, name='register'),
     path('guest-login/', guest_login, name='guest_login'),
+    path('metrics/requests/', request_metrics_view, name='request_metrics'),
 ]
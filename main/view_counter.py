@@ -0,0 +1,167 @@
+"""
+Penghitung views write-behind yang dipakai Merchandise, ForumPost, dan Informasi.
+
+Setiap page view hanya menambah delta di memori proses. Delta dikirim ke database
+secara batch (satu UPDATE ... SET field = field + delta per kelompok delta) saat
+jumlah view yang tertahan mencapai VIEW_COUNTER_FLUSH_THRESHOLD atau sudah lewat
+VIEW_COUNTER_FLUSH_INTERVAL detik sejak flush terakhir. Supaya delta tidak tertahan
+kalau tidak ada view berikutnya, increment juga memastikan ada timer (thread daemon)
+yang mem-flush buffer proses ini setelah interval yang sama; flush apa pun membatalkan
+timer itu karena buffernya sudah kosong.
+Nilai yang belum ter-flush tetap bisa dibaca lewat pending(), jadi badge "hot" tetap
+akurat.
+"""
+import atexit
+import logging
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import OperationalError, connection
+from django.db.models import F
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_pending = defaultdict(int)   # (model, field, pk) -> delta yang belum di-flush
+_in_flight = {}               # delta yang sedang ditulis ke database
+_pending_views = 0
+_last_flush = time.monotonic()
+_timer = None                 # timer flush yang sedang menunggu, paling banyak satu per proses
+
+
+def _flush_interval():
+    return getattr(settings, 'VIEW_COUNTER_FLUSH_INTERVAL', 10)
+
+
+def _flush_threshold():
+    return getattr(settings, 'VIEW_COUNTER_FLUSH_THRESHOLD', 100)
+
+
+def increment(model, pk, field, amount=1):
+    """
+    Tambah delta untuk satu baris. Mengembalikan delta baris ini yang baru saja
+    ditulis ke database kalau increment ini memicu flush (0 kalau tidak), supaya
+    instance yang sudah di-load bisa ikut menyesuaikan nilainya.
+    """
+    global _pending_views
+    key = (model, field, pk)
+    with _lock:
+        _pending[key] += amount
+        _pending_views += amount
+        _schedule_flush()
+        due = (_pending_views >= _flush_threshold()
+               or time.monotonic() - _last_flush >= _flush_interval())
+    if not due:
+        return 0
+    try:
+        return _flush().get(key, 0)
+    except Exception:
+        # page view tidak boleh gagal karena counter, delta tetap di buffer untuk flush berikutnya
+        logger.exception("Gagal flush view counter, delta dikembalikan ke buffer")
+        return 0
+
+
+def pending(model, pk, field):
+    key = (model, field, pk)
+    with _lock:
+        return _pending.get(key, 0) + _in_flight.get(key, 0)
+
+
+def pending_total(model, field):
+    """Total delta yang belum ada di database untuk satu kolom, dipakai versi feed (ETag)."""
+    with _lock:
+        return (sum(d for (m, f, _), d in _pending.items() if m is model and f == field)
+                + sum(d for (m, f, _), d in _in_flight.items() if m is model and f == field))
+
+
+def flush():
+    """Tulis semua delta yang tertahan ke database. Mengembalikan jumlah baris yang di-update."""
+    return len(_flush())
+
+
+def _flush():
+    global _pending_views, _last_flush
+    with _lock:
+        _cancel_timer()
+        if not _pending:
+            _last_flush = time.monotonic()
+            return {}
+        batch = dict(_pending)
+        _pending.clear()
+        _pending_views = 0
+        _last_flush = time.monotonic()
+        for key, delta in batch.items():
+            _in_flight[key] = _in_flight.get(key, 0) + delta
+
+    # baris dengan delta yang sama cukup di-update dengan satu query
+    grouped = defaultdict(list)
+    for (model, field, pk), delta in batch.items():
+        grouped[(model, field, delta)].append(pk)
+
+    groups = list(grouped.items())
+    try:
+        while groups:
+            (model, field, delta), pks = groups[0]
+            model._default_manager.filter(pk__in=pks).update(**{field: F(field) + delta})
+            groups.pop(0)
+    except Exception:
+        with _lock:
+            for (model, field, delta), pks in groups:
+                for pk in pks:
+                    _pending[(model, field, pk)] += delta
+                    _pending_views += delta
+            _schedule_flush()
+        raise
+    finally:
+        with _lock:
+            for key, delta in batch.items():
+                remaining = _in_flight.get(key, 0) - delta
+                if remaining:
+                    _in_flight[key] = remaining
+                else:
+                    _in_flight.pop(key, None)
+    return batch
+
+
+def _schedule_flush():
+    """Jadwalkan timer flush kalau belum ada. Dipanggil sambil memegang _lock."""
+    global _timer
+    if _timer is not None:
+        return
+    _timer = threading.Timer(_flush_interval(), _timed_flush)
+    _timer.daemon = True
+    _timer.start()
+
+
+def _cancel_timer():
+    """Buffer akan kosong setelah flush, jadi timer lama tidak perlu. Dipanggil sambil memegang _lock."""
+    global _timer
+    if _timer is not None and _timer is not threading.current_thread():
+        _timer.cancel()
+    _timer = None
+
+
+def _timed_flush():
+    # kalau gagal, delta sudah dikembalikan ke buffer dan timer berikutnya sudah dijadwalkan
+    try:
+        _flush()
+    except OperationalError as exc:
+        # tabel sedang dikunci transaksi lain (mis. SQLite), cukup dicoba lagi nanti
+        logger.debug("Flush view counter terjadwal ditunda: %s", exc)
+    except Exception:
+        logger.exception("Gagal flush view counter terjadwal, dicoba lagi pada interval berikutnya")
+    finally:
+        # thread timer punya koneksi database sendiri, jangan dibiarkan terbuka
+        connection.close()
+
+
+def _flush_on_exit():
+    try:
+        flush()
+    except Exception:
+        pass  # database mungkin sudah tidak tersedia saat proses berhenti
+
+
+atexit.register(_flush_on_exit)
@@ -3,6 +3,9 @@ from django.contrib.auth.forms import UserCreationForm, AuthenticationForm
 from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.models import AnonymousUser
 from django.contrib import messages
+from django.contrib.admin.views.decorators import staff_member_required
+from django.conf import settings
+from main import request_metrics
 from main.models import Profile
 from django.http import HttpResponseRedirect, JsonResponse
 import datetime
@@ -109,4 +112,15 @@ def logout_user(request):
     logout(request)
     response = HttpResponseRedirect(reverse('main:login'))
     response.delete_cookie('last_login')
-    return response
\ No newline at end of file
+    return response
+
+@staff_member_required
+def request_metrics_view(request):
+    """Histogram latency/query per nama URL (khusus admin). POST mengosongkan datanya."""
+    if request.method == 'POST':
+        request_metrics.reset()
+        return JsonResponse({'status': 'reset'})
+    return JsonResponse({
+        'enabled': getattr(settings, 'REQUEST_METRICS_ENABLED', False),
+        'views': request_metrics.snapshot(),
+    })
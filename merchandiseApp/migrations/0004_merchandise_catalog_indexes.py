@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-17 18:58
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('merchandiseApp', '0003_alter_merchandise_user'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='merchandise',
+            index=models.Index(fields=['name', 'id'], name='merchandise_name_c62961_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='merchandise',
+            index=models.Index(fields=['price', 'id'], name='merchandise_price_57a879_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='merchandise',
+            index=models.Index(fields=['category', 'name', 'id'], name='merchandise_categor_b43618_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 19:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('merchandiseApp', '0004_merchandise_catalog_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='merchandise',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
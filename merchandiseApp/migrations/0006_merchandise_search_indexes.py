@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-17 19:51
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('merchandiseApp', '0005_merchandise_updated_at'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='merchandise',
+            index=models.Index(fields=['category', 'price', 'id'], name='merchandise_categor_76dd22_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='merchandise',
+            index=models.Index(fields=['is_featured'], name='merchandise_is_feat_a7d3fa_idx'),
+        ),
+    ]
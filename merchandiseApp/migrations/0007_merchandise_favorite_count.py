@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-17 19:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('merchandiseApp', '0006_merchandise_search_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='merchandise',
+            name='favorite_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='merchandise',
+            index=models.Index(fields=['favorite_count', 'id'], name='merchandise_favorit_a94d46_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='merchandise',
+            index=models.Index(fields=['category', 'favorite_count', 'id'], name='merchandise_categor_735138_idx'),
+        ),
+    ]
@@ -0,0 +1,25 @@
+from django.db import migrations
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_favorites(apps, schema_editor):
+    Merchandise = apps.get_model('merchandiseApp', 'Merchandise')
+    Favorite = apps.get_model('favoritesApp', 'Favorite')
+    counts = (
+        Favorite.objects.filter(merchandise=OuterRef('pk')).order_by()
+        .values('merchandise').annotate(c=Count('pk')).values('c')
+    )
+    Merchandise.objects.update(favorite_count=Coalesce(Subquery(counts, output_field=IntegerField()), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('merchandiseApp', '0007_merchandise_favorite_count'),
+        ('favoritesApp', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(count_favorites, migrations.RunPython.noop),
+    ]
@@ -1,6 +1,7 @@
 import uuid
 from django.contrib.auth.models import User
 from django.db import models
+from main import view_counter
 
 class Merchandise(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, null=True)
@@ -31,17 +32,33 @@ class Merchandise(models.Model):
     description = models.TextField()
     product_views = models.IntegerField(default=0)
     is_featured = models.BooleanField(default=False)
+    # dijaga favoritesApp.leaderboard; tidak ikut feed JSON karena diubah tanpa menyentuh updated_at
+    favorite_count = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return self.name
     
+    @property
+    def total_views(self):
+        # product_views dari database + view yang masih tertahan di view_counter
+        return self.product_views + view_counter.pending(Merchandise, self.pk, 'product_views')
+
     @property
     def is_product_hot(self):
-        return self.product_views > 100
+        return self.total_views > 100
         
     def increment_views(self):
-        self.product_views += 1
-        self.save()
+        self.product_views += view_counter.increment(Merchandise, self.pk, 'product_views')
 
     class Meta:
         app_label = 'merchandiseApp'
+        indexes = [
+            models.Index(fields=['name', 'id']),
+            models.Index(fields=['price', 'id']),
+            models.Index(fields=['category', 'name', 'id']),
+            models.Index(fields=['category', 'price', 'id']),
+            models.Index(fields=['is_featured']),
+            models.Index(fields=['favorite_count', 'id']),
+            models.Index(fields=['category', 'favorite_count', 'id']),
+        ]
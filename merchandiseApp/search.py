@@ -0,0 +1,112 @@
+"""
+Search dan facet katalog merchandise.
+
+Semua hitungan facet diambil dari satu query GROUP BY category dengan COUNT bersyarat.
+Facet dihitung secara "disjunctive": setiap facet mengabaikan filternya sendiri, jadi
+memilih satu kategori tetap menampilkan jumlah produk di kategori lain, dan memilih
+rentang harga tetap menampilkan jumlah di rentang lain.
+"""
+from django.db.models import Count, Q
+
+from .models import Merchandise
+
+MAX_TERMS = 10
+
+# (key, harga minimum inklusif, harga maksimum eksklusif)
+PRICE_BUCKETS = [
+    ('0-100000', 0, 100000),
+    ('100000-250000', 100000, 250000),
+    ('250000-500000', 250000, 500000),
+    ('500000-1000000', 500000, 1000000),
+    ('1000000-', 1000000, None),
+]
+
+
+class InvalidFilter(ValueError):
+    pass
+
+
+def text_filter(text):
+    """Setiap kata harus muncul di nama atau deskripsi."""
+    condition = Q()
+    for word in (text or '').split()[:MAX_TERMS]:
+        condition &= Q(name__icontains=word) | Q(description__icontains=word)
+    return condition
+
+
+def _price_range(low, high):
+    condition = Q(price__gte=low)
+    if high is not None:
+        condition &= Q(price__lt=high)
+    return condition
+
+
+def parse_filters(params):
+    """Filter aktif per facet dari query string; facet yang tidak dipakai bernilai Q() kosong."""
+    filters = {'category': Q(), 'price': Q(), 'in_stock': Q(), 'featured': Q()}
+
+    category = params.get('category')
+    if category:
+        filters['category'] = Q(category=category)
+
+    try:
+        min_price = int(params['min_price']) if params.get('min_price') else None
+        max_price = int(params['max_price']) if params.get('max_price') else None
+    except ValueError:
+        raise InvalidFilter('Invalid price')
+    if min_price is not None:
+        filters['price'] &= Q(price__gte=min_price)
+    if max_price is not None:
+        filters['price'] &= Q(price__lt=max_price)
+
+    if params.get('in_stock') == 'true':
+        filters['in_stock'] = Q(stock__gt=0)
+    featured = params.get('featured')
+    if featured in ('true', 'false'):
+        filters['featured'] = Q(is_featured=(featured == 'true'))
+    return filters
+
+
+def combined(filters, *skip):
+    condition = Q()
+    for name, value in filters.items():
+        if name not in skip:
+            condition &= value
+    return condition
+
+
+def _count(condition):
+    return Count('pk', filter=condition) if condition else Count('pk')
+
+
+def facet_counts(queryset, filters, category=None):
+    """
+    Jumlah produk per kategori, per rentang harga, yang ada stoknya, dan yang featured,
+    plus total hasil untuk semua filter aktif. Satu query.
+    """
+    others = combined(filters, 'category')
+    aggregates = {'matches': _count(others)}
+    for i, (_, low, high) in enumerate(PRICE_BUCKETS):
+        aggregates[f'price_{i}'] = _count(combined(filters, 'category', 'price') & _price_range(low, high))
+    aggregates['in_stock'] = _count(combined(filters, 'category', 'in_stock') & Q(stock__gt=0))
+    aggregates['featured'] = _count(combined(filters, 'category', 'featured') & Q(is_featured=True))
+    rows = list(queryset.order_by().values('category').annotate(**aggregates))
+
+    # baris kategori yang lolos filter kategori; facet lain dijumlahkan dari sini
+    selected = [row for row in rows if not category or row['category'] == category]
+    by_category = {row['category']: row['matches'] for row in rows}
+    return {
+        'total': sum(row['matches'] for row in selected),
+        'facets': {
+            'category': [
+                {'value': value, 'label': label, 'count': by_category.get(value, 0)}
+                for value, label in Merchandise.CATEGORY_CHOICES
+            ],
+            'price': [
+                {'key': key, 'min': low, 'max': high, 'count': sum(row[f'price_{i}'] for row in selected)}
+                for i, (key, low, high) in enumerate(PRICE_BUCKETS)
+            ],
+            'in_stock': sum(row['in_stock'] for row in selected),
+            'featured': sum(row['featured'] for row in selected),
+        },
+    }
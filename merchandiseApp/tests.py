@@ -3,6 +3,7 @@ from django.test import TestCase, Client
 from django.urls import reverse
 from django.contrib.auth.models import User
 from .models import Merchandise
+from main import view_counter
 import uuid
 import json
 
@@ -51,7 +52,7 @@ class MerchandiseModelTest(TestCase):
         """Test method increment_views"""
         initial_views = self.merchandise.product_views
         self.merchandise.increment_views()
-        self.assertEqual(self.merchandise.product_views, initial_views + 1)
+        self.assertEqual(self.merchandise.total_views, initial_views + 1)
 
     def test_merchandise_uuid(self):
         """Test bahwa UUID di-generate dengan benar"""
@@ -96,6 +97,7 @@ class MerchandiseViewsTest(TestCase):
         url = reverse('merchandiseApp:show_merchandise', args=[self.merchandise.id])
         response = self.client.get(url)
         
+        view_counter.flush()
         self.merchandise.refresh_from_db()
         self.assertEqual(self.merchandise.product_views, initial_views + 1)
 
@@ -306,6 +308,119 @@ class MerchandiseCategoryTest(TestCase):
             )
             self.assertEqual(merchandise.category, category)
 
+class MerchandiseCatalogTest(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.user = User.objects.create_user(username='cataloguser', password='testpass123')
+        for i in range(5):
+            Merchandise.objects.create(
+                user=self.user,
+                name=f'Jersey {i}',
+                price=100000 + i,
+                category='jersey',
+                stock=10,
+                description='Test',
+                is_featured=(i % 2 == 0)
+            )
+        Merchandise.objects.create(
+            user=self.user, name='Ball', price=50000, category='ball', stock=3, description='Test'
+        )
+
+    def test_catalog_pages_with_cursor(self):
+        """Test katalog dibagi per halaman dan cursor melanjutkan tanpa duplikat"""
+        url = reverse('merchandiseApp:catalog_json')
+        first = self.client.get(url, {'limit': 4}).json()
+        self.assertEqual(len(first['results']), 4)
+        self.assertIsNotNone(first['next'])
+
+        second = self.client.get(url, {'limit': 4, 'cursor': first['next']}).json()
+        self.assertEqual(len(second['results']), 2)
+        self.assertIsNone(second['next'])
+
+        names = [m['name'] for m in first['results'] + second['results']]
+        self.assertEqual(names, sorted(names))
+        self.assertEqual(len(set(names)), 6)
+
+    def test_catalog_filters_and_sort(self):
+        """Test filter category, featured, dan sort harga"""
+        url = reverse('merchandiseApp:catalog_json')
+        data = self.client.get(url, {'category': 'jersey', 'featured': 'true'}).json()
+        self.assertEqual([m['name'] for m in data['results']], ['Jersey 0', 'Jersey 2', 'Jersey 4'])
+
+        data = self.client.get(url, {'sort': '-price', 'limit': 1}).json()
+        self.assertEqual(data['results'][0]['name'], 'Jersey 4')
+
+    def test_catalog_invalid_params(self):
+        """Test cursor dan sort yang tidak valid"""
+        url = reverse('merchandiseApp:catalog_json')
+        self.assertEqual(self.client.get(url, {'cursor': 'bukan-cursor'}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'sort': 'stock'}).status_code, 400)
+
+class MerchandiseSearchTest(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.user = User.objects.create_user(username='searchuser', password='testpass123')
+        items = [
+            ('Jersey Home', 'jersey', 599000, 10, True),
+            ('Jersey Away', 'jersey', 450000, 0, False),
+            ('Training Jersey', 'training jersey', 150000, 5, False),
+            ('Bola Resmi', 'ball', 90000, 7, True),
+            ('Syal Garuda', 'accessories', 1200000, 2, False),
+        ]
+        for name, category, price, stock, featured in items:
+            Merchandise.objects.create(
+                user=self.user, name=name, price=price, category=category, stock=stock,
+                description=f'{name} resmi timnas', is_featured=featured,
+            )
+        self.url = reverse('merchandiseApp:search_json')
+
+    def facet(self, data, name, key):
+        field = 'value' if name == 'category' else 'key'
+        return next(f['count'] for f in data['facets'][name] if f[field] == key)
+
+    def test_search_text_and_facets(self):
+        """Test search teks, total, dan semua facet diambil dari satu query grouped"""
+        with self.assertNumQueries(2):
+            data = self.client.get(self.url, {'q': 'jersey'}).json()
+        self.assertEqual(data['total'], 3)
+        self.assertEqual([m['name'] for m in data['results']], ['Jersey Away', 'Jersey Home', 'Training Jersey'])
+        self.assertEqual(self.facet(data, 'category', 'jersey'), 2)
+        self.assertEqual(self.facet(data, 'category', 'training jersey'), 1)
+        self.assertEqual(self.facet(data, 'category', 'ball'), 0)
+        self.assertEqual(self.facet(data, 'price', '100000-250000'), 1)
+        self.assertEqual(self.facet(data, 'price', '250000-500000'), 1)
+        self.assertEqual(self.facet(data, 'price', '500000-1000000'), 1)
+        self.assertEqual(data['facets']['in_stock'], 2)
+        self.assertEqual(data['facets']['featured'], 1)
+
+    def test_facets_ignore_their_own_filter(self):
+        """Test facet kategori tetap menghitung kategori lain saat satu kategori dipilih"""
+        data = self.client.get(self.url, {'category': 'jersey', 'in_stock': 'true'}).json()
+        self.assertEqual([m['name'] for m in data['results']], ['Jersey Home'])
+        self.assertEqual(data['total'], 1)
+        self.assertEqual(self.facet(data, 'category', 'ball'), 1)
+        self.assertEqual(self.facet(data, 'category', 'jersey'), 1)
+        self.assertEqual(data['facets']['in_stock'], 1)
+        self.assertEqual(self.facet(data, 'price', '250000-500000'), 0)
+
+        data = self.client.get(self.url, {'min_price': 100000, 'max_price': 500000}).json()
+        self.assertEqual(data['total'], 2)
+        self.assertEqual(self.facet(data, 'price', '1000000-'), 1)
+        self.assertEqual(self.facet(data, 'category', 'accessories'), 0)
+
+    def test_search_pagination_and_invalid_params(self):
+        """Test cursor pagination dan parameter yang tidak valid"""
+        first = self.client.get(self.url, {'sort': '-price', 'limit': 2}).json()
+        self.assertEqual([m['name'] for m in first['results']], ['Syal Garuda', 'Jersey Home'])
+        second = self.client.get(self.url, {'sort': '-price', 'limit': 2, 'cursor': first['next']}).json()
+        self.assertEqual([m['name'] for m in second['results']], ['Jersey Away', 'Training Jersey'])
+        self.assertNotIn('facets', second)
+
+        self.assertEqual(self.client.get(self.url, {'min_price': 'murah'}).status_code, 400)
+        self.assertEqual(self.client.get(self.url, {'sort': 'stock'}).status_code, 400)
+        self.assertEqual(self.client.get(self.url, {'cursor': 'rusak'}).status_code, 400)
+
+
 class MerchandiseURLTest(TestCase):
     def test_urls(self):
         """Test bahwa semua URL resolve dengan benar"""
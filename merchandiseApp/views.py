@@ -1,13 +1,26 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from .models import Merchandise
 from .forms import MerchandiseForm
-from reviewproduct.models import Review
+from . import search
+from reviewproduct.models import Review, ProductRatingSummary
 
 from django.http import HttpResponse
 from django.core import serializers
 
 from django.http import JsonResponse
 from django.views.decorators.csrf import csrf_exempt
+from django.db.models import Sum
+from main.conditional import conditional_feed, table_version
+from main import view_counter
+from main.pagination import InvalidCursor, get_page_size, keyset_paginate
+
+# urutan yang boleh dipakai katalog, selalu diakhiri id supaya keyset-nya unik
+CATALOG_ORDERINGS = {
+    'name': ('name', 'id'),
+    '-name': ('-name', '-id'),
+    'price': ('price', 'id'),
+    '-price': ('-price', '-id'),
+}
 
 def show_main_merchandise(request):
     merchandise_list = Merchandise.objects.all()
@@ -20,7 +33,7 @@ def show_main_merchandise(request):
     return render(request, "main_merchandise.html", context)
 
 def show_merchandise(request, id):
-    merchandise = get_object_or_404(Merchandise, pk=id)
+    merchandise = get_object_or_404(Merchandise.objects.select_related('rating_summary'), pk=id)
     merchandise.increment_views()
 
     if merchandise.description:
@@ -48,18 +61,14 @@ def show_merchandise(request, id):
     except ImportError:
         reviews = []
 
-    # Calculate average rating
-    if reviews:
-        average_rating = sum(review.rating for review in reviews) / len(reviews)
-        average_rating = round(average_rating, 1)
-    else:
-        average_rating = 0.0
+    # Rating diambil dari ringkasan yang di-maintain saat review dibuat/diubah/dihapus
+    summary = ProductRatingSummary.for_product(merchandise)
 
     context = {
         'merchandise': merchandise,
         'reviews': reviews,
-        'average_rating': average_rating,
-        'total_reviews': len(reviews)
+        'average_rating': summary.average_rating,
+        'total_reviews': summary.review_count
     }
 
     return render(request, "merchandise_detail.html", context)
@@ -162,35 +171,109 @@ def delete_merchandise_ajax(request, id):
 
     return JsonResponse({'error': 'Invalid request'}, status=400)
 
+def _serialize_merchandise(item):
+    return {
+        'id': str(item.id),  # Convert UUID to string
+        'user': item.user_id,
+        'name': item.name,
+        'price': item.price,
+        'category': item.category,
+        'stock': item.stock,
+        'thumbnail': item.thumbnail,
+        'description': item.description,
+        'product_views': item.total_views,
+        'is_featured': item.is_featured,
+        'rating': ProductRatingSummary.for_product(item).average_rating,
+    }
+
+def _merchandise_feed_version(request):
+    # product_views di-flush lewat UPDATE tanpa menyentuh updated_at, jadi totalnya ikut dihitung;
+    # rating berasal dari review, jadi perubahan review juga mengganti versi. total_views di payload
+    # ikut menghitung delta yang masih di buffer view_counter, jadi delta itu juga bagian dari versi
+    return [
+        table_version(Merchandise.objects.all(), views=Sum('product_views')),
+        {'pending_views': view_counter.pending_total(Merchandise, 'product_views')},
+        table_version(Review.objects.all()),
+    ]
+
+@conditional_feed(_merchandise_feed_version)
 def get_merchandise_json(request):
-    merchandise = Merchandise.objects.all()
-    print(f"DEBUG: My merchandise count = {merchandise.count()}")
-
-    merchandise_data = []
-    for item in merchandise:
-        merchandise_data.append({
-            'id': str(item.id),  # Convert UUID to string
-            'user': item.user.id if item.user else None,
-            'name': item.name,
-            'price': item.price,
-            'category': item.category,
-            'stock': item.stock,
-            'thumbnail': item.thumbnail,
-            'description': item.description,
-            'product_views': item.product_views,
-            'is_featured': item.is_featured,
-            'rating': 0.0,  # Default value
-        })
-    
+    merchandise = Merchandise.objects.select_related('rating_summary').iterator(chunk_size=500)
+    merchandise_data = [_serialize_merchandise(item) for item in merchandise]
     return JsonResponse(merchandise_data, safe=False)
 
+def catalog_json(request):
+    """
+    Katalog merchandise dengan cursor pagination untuk Flutter.
+    Query param: limit, cursor, category, featured (true/false), sort.
+    """
+    ordering = CATALOG_ORDERINGS.get(request.GET.get('sort', 'name'))
+    if ordering is None:
+        return JsonResponse({'error': 'Invalid sort'}, status=400)
+
+    merchandise = Merchandise.objects.select_related('rating_summary')
+    category = request.GET.get('category')
+    if category:
+        merchandise = merchandise.filter(category=category)
+    featured = request.GET.get('featured')
+    if featured in ('true', 'false'):
+        merchandise = merchandise.filter(is_featured=(featured == 'true'))
+
+    try:
+        items, next_cursor = keyset_paginate(
+            merchandise, ordering,
+            cursor=request.GET.get('cursor'),
+            limit=get_page_size(request),
+        )
+    except InvalidCursor:
+        return JsonResponse({'error': 'Invalid cursor'}, status=400)
+
+    return JsonResponse({
+        'results': [_serialize_merchandise(item) for item in items],
+        'next': next_cursor,
+    })
+
+def search_json(request):
+    """
+    Search katalog dengan facet, lihat merchandiseApp/search.py.
+    Query param: q, category, min_price (inklusif), max_price (eksklusif), in_stock=true,
+    featured (true/false), sort, limit, cursor. Facet dan total hanya dihitung di halaman
+    pertama (tanpa cursor).
+    """
+    ordering = CATALOG_ORDERINGS.get(request.GET.get('sort', 'name'))
+    if ordering is None:
+        return JsonResponse({'error': 'Invalid sort'}, status=400)
+    try:
+        filters = search.parse_filters(request.GET)
+    except search.InvalidFilter as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
+    matching = Merchandise.objects.filter(search.text_filter(request.GET.get('q')))
+    cursor = request.GET.get('cursor')
+    try:
+        items, next_cursor = keyset_paginate(
+            matching.filter(search.combined(filters)).select_related('rating_summary'), ordering,
+            cursor=cursor,
+            limit=get_page_size(request),
+        )
+    except InvalidCursor:
+        return JsonResponse({'error': 'Invalid cursor'}, status=400)
+
+    data = {
+        'results': [_serialize_merchandise(item) for item in items],
+        'next': next_cursor,
+    }
+    if not cursor:
+        data.update(search.facet_counts(matching, filters, category=request.GET.get('category')))
+    return JsonResponse(data)
+
 def show_xml(request):
-     merchandise_list = Merchandise.objects.all()
+     merchandise_list = Merchandise.objects.all().iterator(chunk_size=500)
      xml_data = serializers.serialize("xml", merchandise_list)
      return HttpResponse(xml_data, content_type="application/xml")
 
 def show_json(request):
-    merchandise_list = Merchandise.objects.all()
+    merchandise_list = Merchandise.objects.all().iterator(chunk_size=500)
     json_data = serializers.serialize("json", merchandise_list)
     return HttpResponse(json_data, content_type="application/json")
 
@@ -215,7 +298,6 @@ def increment_views(request, id):
     if request.method != 'POST':
         return JsonResponse({'status': 'error'}, status=400)
     
-    merchandise = get_object_or_404(Merchandise, pk=id)
-    merchandise.product_views += 1
-    merchandise.save()
-    return JsonResponse({'status': 'success', 'new_views': merchandise.product_views})
\ No newline at end of file
+    merchandise = get_object_or_404(Merchandise.objects.only('id', 'product_views'), pk=id)
+    merchandise.increment_views()
+    return JsonResponse({'status': 'success', 'new_views': merchandise.total_views})
\ No newline at end of file
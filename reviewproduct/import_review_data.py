@@ -29,7 +29,7 @@ except Exception as e:
 try:
     from django.contrib.auth.models import User
     from merchandiseApp.models import Merchandise
-    from reviewproduct.models import Review
+    from reviewproduct.models import Review, ProductRatingSummary
 except ImportError as e:
     print(f"❌ Gagal import model: {e}")
     sys.exit(1)
@@ -92,8 +92,10 @@ def import_reviews():
             )
 
     # --- Bulk insert ke database ---
+    # bulk_create tidak lewat Review.save(), jadi ringkasan rating dihitung ulang setelahnya
     with transaction.atomic():
         Review.objects.bulk_create(review_objects, ignore_conflicts=True)
+        ProductRatingSummary.rebuild({r.product_id for r in review_objects})
 
     print(f"✅ Import selesai — {len(review_objects)} review berhasil ditambahkan.")
 
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from reviewproduct.models import ProductRatingSummary
+
+
+class Command(BaseCommand):
+    help = "Hitung ulang ringkasan rating (jumlah, rata-rata, histogram) semua produk dari tabel Review."
+
+    def handle(self, *args, **options):
+        ProductRatingSummary.rebuild()
+        total = ProductRatingSummary.objects.count()
+        self.stdout.write(self.style.SUCCESS(f"Ringkasan rating dibangun ulang untuk {total} produk."))
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.18 on 2026-10-17 19:04
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+
+
+def build_summaries(apps, schema_editor):
+    Review = apps.get_model('reviewproduct', 'Review')
+    ProductRatingSummary = apps.get_model('reviewproduct', 'ProductRatingSummary')
+    stats = Review.objects.filter(deleted=False).order_by().values('product_id').annotate(
+        review_count=Count('id'),
+        rating_total=Sum('rating'),
+        **{f'star_{i}': Count('id', filter=Q(rating=i)) for i in range(1, 6)},
+    )
+    ProductRatingSummary.objects.bulk_create([ProductRatingSummary(**row) for row in stats], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('merchandiseApp', '0004_merchandise_catalog_indexes'),
+        ('reviewproduct', '0004_remove_review_unique_user_review_per_product_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductRatingSummary',
+            fields=[
+                ('product', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='rating_summary', serialize=False, to='merchandiseApp.merchandise')),
+                ('review_count', models.PositiveIntegerField(default=0)),
+                ('rating_total', models.PositiveIntegerField(default=0)),
+                ('star_1', models.PositiveIntegerField(default=0)),
+                ('star_2', models.PositiveIntegerField(default=0)),
+                ('star_3', models.PositiveIntegerField(default=0)),
+                ('star_4', models.PositiveIntegerField(default=0)),
+                ('star_5', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(build_summaries, migrations.RunPython.noop),
+    ]
@@ -1,10 +1,12 @@
 import uuid
 from django.conf import settings
 from django.core.exceptions import ValidationError
-from django.db import models
-from django.utils import timezone
+from django.db import models, transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
 from merchandiseApp.models import Merchandise
-from cartApp.models import Purchase
+from cartApp.models import Purchase, PurchasedProduct
 
 class Review(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
@@ -38,15 +40,45 @@ class Review(models.Model):
 
     def save(self, *args, **kwargs):
         if not self.purchased_at:
-            oi = (
-                Purchase.objects
-                .filter(user=self.user, product=self.product)
-                .order_by('-id')  # atau '-created_at' kalau punya field waktu
-                .first()
-            )
-            if oi:
-                self.purchased_at = timezone.now().date()
-        super().save(*args, **kwargs)
+            self.purchased_at = PurchasedProduct.first_purchase_date(self.user_id, self.product_id)
+
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and not {'rating', 'deleted', 'product', 'product_id'} & set(update_fields):
+            # save parsial yang tidak menyentuh rating, deleted, atau produk tidak menggeser ringkasan
+            super().save(*args, **kwargs)
+            return
+
+        # ringkasan rating ikut di-update dalam transaksi yang sama dengan review-nya
+        with transaction.atomic():
+            previous = None
+            if not self._state.adding:
+                previous = (
+                    Review.objects.select_for_update()
+                    .filter(pk=self.pk)
+                    .values_list('rating', 'deleted', 'product_id')
+                    .first()
+                )
+            super().save(*args, **kwargs)
+
+            # kolom di luar update_fields tidak ditulis, jadi nilainya di database tetap yang lama
+            rating, deleted, product_id = self.rating, self.deleted, self.product_id
+            if previous and update_fields is not None:
+                fields = set(update_fields)
+                if 'rating' not in fields:
+                    rating = previous[0]
+                if 'deleted' not in fields:
+                    deleted = previous[1]
+                if not {'product', 'product_id'} & fields:
+                    product_id = previous[2]
+
+            old_rating = None
+            if previous and not previous[1]:
+                if previous[2] != product_id:
+                    ProductRatingSummary.apply_change(previous[2], old_rating=previous[0])
+                else:
+                    old_rating = previous[0]
+            new_rating = None if deleted else int(rating)
+            ProductRatingSummary.apply_change(product_id, old_rating=old_rating, new_rating=new_rating)
 
 
     def delete(self, using=None, keep_parents=False):
@@ -60,3 +92,80 @@ class Review(models.Model):
     @property
     def is_critical(self):
         return self.rating <= 2
+
+
+class ProductRatingSummary(models.Model):
+    """Ringkasan rating per produk (jumlah, total bintang, histogram 1-5) dari review yang aktif."""
+    product = models.OneToOneField(Merchandise, on_delete=models.CASCADE, primary_key=True, related_name='rating_summary')
+    review_count = models.PositiveIntegerField(default=0)
+    rating_total = models.PositiveIntegerField(default=0)
+    star_1 = models.PositiveIntegerField(default=0)
+    star_2 = models.PositiveIntegerField(default=0)
+    star_3 = models.PositiveIntegerField(default=0)
+    star_4 = models.PositiveIntegerField(default=0)
+    star_5 = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.product_id}: {self.average_rating} ({self.review_count})"
+
+    @property
+    def average_rating(self):
+        if not self.review_count:
+            return 0.0
+        return round(self.rating_total / self.review_count, 1)
+
+    @property
+    def counts(self):
+        return {i: getattr(self, f'star_{i}') for i in range(1, 6)}
+
+    @classmethod
+    def for_product(cls, product):
+        """Ambil ringkasan produk; produk tanpa review dapat ringkasan kosong (tidak disimpan)."""
+        try:
+            return product.rating_summary
+        except cls.DoesNotExist:
+            return cls(product=product)
+
+    @classmethod
+    def apply_change(cls, product_id, old_rating=None, new_rating=None):
+        """Geser ringkasan produk dari old_rating ke new_rating (None = review tidak aktif)."""
+        if old_rating == new_rating:
+            return
+        deltas = {}
+        if old_rating is not None:
+            deltas['review_count'] = deltas.get('review_count', 0) - 1
+            deltas['rating_total'] = deltas.get('rating_total', 0) - old_rating
+            deltas[f'star_{old_rating}'] = -1
+        if new_rating is not None:
+            deltas['review_count'] = deltas.get('review_count', 0) + 1
+            deltas['rating_total'] = deltas.get('rating_total', 0) + new_rating
+            deltas[f'star_{new_rating}'] = deltas.get(f'star_{new_rating}', 0) + 1
+            cls.objects.get_or_create(product_id=product_id)
+        updates = {field: F(field) + delta for field, delta in deltas.items() if delta}
+        if updates:
+            cls.objects.filter(product_id=product_id).update(**updates)
+
+    @classmethod
+    def rebuild(cls, product_ids=None):
+        """Hitung ulang ringkasan dari tabel Review. Tanpa product_ids berarti semua produk."""
+        reviews = Review.objects.filter(deleted=False)
+        summaries = cls.objects.all()
+        if product_ids is not None:
+            reviews = reviews.filter(product_id__in=product_ids)
+            summaries = summaries.filter(product_id__in=product_ids)
+
+        stats = reviews.order_by().values('product_id').annotate(
+            review_count=Count('id'),
+            rating_total=Sum('rating'),
+            **{f'star_{i}': Count('id', filter=Q(rating=i)) for i in range(1, 6)},
+        )
+        with transaction.atomic():
+            summaries.delete()
+            cls.objects.bulk_create([cls(**row) for row in stats.iterator()], batch_size=1000)
+
+
+@receiver(post_delete, sender=Review)
+def _remove_deleted_review_from_summary(sender, instance, **kwargs):
+    # hard delete (queryset.delete() atau cascade dari user); soft delete sudah lewat Review.save()
+    if not instance.deleted:
+        ProductRatingSummary.apply_change(instance.product_id, old_rating=int(instance.rating))
@@ -1,10 +1,14 @@
 # reviewproduct/tests.py
+import io
+
 from django.test import TestCase, Client
 from django.urls import reverse, resolve
 from django.contrib.auth import get_user_model
 from django.utils import timezone
 
-from reviewproduct.models import Review, Merchandise, Purchase
+from django.core.management import call_command
+
+from reviewproduct.models import Review, Merchandise, Purchase, ProductRatingSummary
 
 
 class ReviewProductTests(TestCase):
@@ -221,3 +225,89 @@ class ReviewProductTests(TestCase):
         self.assertEqual(
             Review.objects.filter(product=self.product, user=self.user, deleted=False).count(), 1
         )
+
+    # ---------- ringkasan rating ----------
+    def _summary(self):
+        return ProductRatingSummary.objects.get(product=self.product)
+
+    def test_rating_summary_follows_create_edit_and_delete(self):
+        r1 = Review.objects.create(product=self.product, user=self.user, rating=5, body="a")
+        r2 = Review.objects.create(product=self.product, user=self.user2, rating=2, body="b")
+        summary = self._summary()
+        self.assertEqual((summary.review_count, summary.rating_total), (2, 7))
+        self.assertEqual(summary.counts, {1: 0, 2: 1, 3: 0, 4: 0, 5: 1})
+        self.assertEqual(summary.average_rating, 3.5)
+
+        # edit rating memindahkan histogram
+        r2.rating = 4
+        r2.save()
+        summary = self._summary()
+        self.assertEqual(summary.counts, {1: 0, 2: 0, 3: 0, 4: 1, 5: 1})
+        self.assertEqual(summary.rating_total, 9)
+
+        # soft delete dan hard delete sama-sama mengeluarkan review dari ringkasan
+        r1.delete()
+        self.assertEqual(self._summary().review_count, 1)
+        Review.objects.filter(pk=r2.pk).delete()
+        summary = self._summary()
+        self.assertEqual((summary.review_count, summary.rating_total, summary.average_rating), (0, 0, 0.0))
+
+    def test_rating_summary_ignores_fields_not_saved(self):
+        review = Review.objects.create(product=self.product, user=self.user, rating=5, body="a")
+
+        # rating di memori berubah tapi tidak ikut disimpan
+        review.rating = 1
+        review.body = "edit"
+        review.save(update_fields=['body'])
+        self.assertEqual(self._summary().counts, {1: 0, 2: 0, 3: 0, 4: 0, 5: 1})
+
+        # soft delete lewat update_fields=['deleted'] tetap memakai rating di database
+        review.delete()
+        summary = self._summary()
+        self.assertEqual((summary.review_count, summary.rating_total), (0, 0))
+        self.assertEqual(summary.counts, {1: 0, 2: 0, 3: 0, 4: 0, 5: 0})
+
+    def test_rating_summary_rebuild_command(self):
+        Review.objects.create(product=self.product, user=self.user, rating=3, body="a")
+        Review.objects.create(product=self.product, user=self.user2, rating=5, body="b")
+        ProductRatingSummary.objects.filter(product=self.product).update(review_count=99, star_3=0)
+
+        call_command("rebuild_rating_summaries", stdout=io.StringIO())
+        summary = self._summary()
+        self.assertEqual(summary.review_count, 2)
+        self.assertEqual(summary.counts, {1: 0, 2: 0, 3: 1, 4: 0, 5: 1})
+
+    def test_review_page_json_uses_summary(self):
+        Review.objects.create(product=self.product, user=self.user, rating=4, body="a")
+        url = reverse("reviewproduct:product_reviews_json", kwargs={"product_id": self.product.pk})
+        data = self.client.get(url).json()
+        self.assertEqual(data["total"], 1)
+        self.assertEqual(data["counts"]["4"], 1)
+        self.assertEqual(data["average_rating"], 4.0)
+
+    def test_review_page_json_fixed_queries_and_cursor(self):
+        User = get_user_model()
+        for i in range(5):
+            reviewer = User.objects.create_user(username=f"reviewer{i}", password="pw12345")
+            Review.objects.create(product=self.product, user=reviewer, rating=5 if i % 2 else 3, body=f"r{i}")
+        Purchase.objects.create(user=self.user, product=self.product)
+        self.client.login(username="alice", password="pw12345")
+        url = reverse("reviewproduct:product_reviews_json", kwargs={"product_id": self.product.pk})
+
+        # session, user, produk + ringkasan + kelayakan, satu halaman review
+        with self.assertNumQueries(4):
+            first = self.client.get(url, {"limit": 3}).json()
+        self.assertTrue(first["can_review"])
+        self.assertEqual([r["body"] for r in first["reviews"]], ["r4", "r3", "r2"])
+        self.assertEqual(first["total"], 5)
+
+        second = self.client.get(url, {"limit": 3, "cursor": first["next"]}).json()
+        self.assertEqual([r["body"] for r in second["reviews"]], ["r1", "r0"])
+        self.assertIsNone(second["next"])
+
+        rated = self.client.get(url, {"stars": "5"}).json()
+        self.assertEqual([r["body"] for r in rated["reviews"]], ["r3", "r1"])
+
+        self.assertEqual(self.client.get(url, {"cursor": "rusak"}).status_code, 400)
+        missing = reverse("reviewproduct:product_reviews_json", kwargs={"product_id": "00000000-0000-0000-0000-000000000000"})
+        self.assertEqual(self.client.get(missing).status_code, 404)
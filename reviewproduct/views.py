@@ -1,45 +1,49 @@
 from django.shortcuts import render, get_object_or_404
-from django.http import JsonResponse
-from django.db.models import Count, Q
+from django.db.models import Exists, OuterRef
+from django.http import Http404, HttpResponseBadRequest, JsonResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
 from django.contrib.auth.decorators import login_required
-from .models import Merchandise, Review, Purchase
+from .models import Merchandise, Review, PurchasedProduct, ProductRatingSummary
+from main.pagination import InvalidCursor, get_page_size, keyset_paginate
 import json
 
 
 def _get_review_data(product_id, request):
-    product = get_object_or_404(Merchandise, pk=product_id)
+    """
+    Data halaman review dengan jumlah query tetap: produk + ringkasan rating + kelayakan review
+    dalam satu query, lalu satu halaman review (terbaru dulu, cursor pagination).
+    """
+    products = Merchandise.objects.select_related('rating_summary')
+    user = request.user
+    if user.is_authenticated:
+        # boleh review kalau pernah membeli dan belum punya review aktif
+        products = products.annotate(
+            has_purchase=Exists(PurchasedProduct.objects.filter(user=user, product=OuterRef('pk'))),
+            has_review=Exists(Review.objects.filter(user=user, product=OuterRef('pk'), deleted=False)),
+        )
+    product = get_object_or_404(products, pk=product_id)
     stars = request.GET.get("stars", "all")
 
-    reviews_all = Review.objects.filter(product=product, deleted=False)
-    reviews_qs = reviews_all.order_by("-created_at")
-
+    reviews_qs = Review.objects.filter(product=product, deleted=False).select_related('user')
     if stars in {"1", "2", "3", "4", "5"}:
         reviews_qs = reviews_qs.filter(rating=int(stars))
-
-    stats = reviews_all.aggregate(
-        total=Count("id"),
-        c1=Count("id", filter=Q(rating=1)),
-        c2=Count("id", filter=Q(rating=2)),
-        c3=Count("id", filter=Q(rating=3)),
-        c4=Count("id", filter=Q(rating=4)),
-        c5=Count("id", filter=Q(rating=5)),
+    reviews, next_cursor = keyset_paginate(
+        reviews_qs, ('-created_at', '-id'),
+        cursor=request.GET.get('cursor'),
+        limit=get_page_size(request),
     )
 
-    counts = {i: stats.get(f"c{i}", 0) for i in range(1, 6)}
-
-    can_review = (
-        request.user.is_authenticated
-        and Purchase.objects.filter(user=request.user, product=product).exists()
-        and not Review.objects.filter(product=product, user=request.user, deleted=False).exists()
-    )
+    summary = ProductRatingSummary.for_product(product)
+    can_review = user.is_authenticated and product.has_purchase and not product.has_review
 
     return {
         "product": product,
-        "reviews": reviews_qs,
-        "counts": counts,
-        "total": stats["total"],
+        "reviews": reviews,
+        "next_cursor": next_cursor,
+        "counts": summary.counts,
+        "total": summary.review_count,
+        "average_rating": summary.average_rating,
         "stars": stars,
         "can_review": can_review,
     }
@@ -48,7 +52,10 @@ def _get_review_data(product_id, request):
 # ============ HTML VIEW (untuk web) ============
 def product_reviews(request, product_id):
     """View HTML untuk ditampilkan di web browser"""
-    ctx = _get_review_data(product_id, request)
+    try:
+        ctx = _get_review_data(product_id, request)
+    except InvalidCursor:
+        return HttpResponseBadRequest("Invalid cursor")
     return render(request, "main_review.html", ctx)
 
 
@@ -75,16 +82,18 @@ def review_page(request, product_id):
                 }
                 for r in data["reviews"]
             ],
+            "next": data["next_cursor"],
             "stars_filter": data["stars"],
             "counts": {str(k): v for k, v in data["counts"].items()},  # String keys!
             "total": data["total"],
+            "average_rating": data["average_rating"],
             "can_review": data["can_review"],
         }
-        
-        print(f"✅ Sending JSON response for product {product_id}")
         return JsonResponse(response_data, safe=False)
-        
-    except Merchandise.DoesNotExist:
+
+    except InvalidCursor:
+        return JsonResponse({"error": "Invalid cursor"}, status=400)
+    except (Merchandise.DoesNotExist, Http404):
         return JsonResponse({
             "error": "Product not found",
             "product": None,
@@ -132,8 +141,8 @@ def add_review(request, product_id):
     product = get_object_or_404(Merchandise, pk=product_id)
 
     # Cek purchase
-    has_purchase = Purchase.objects.filter(user=request.user, product=product).exists()
-    if not has_purchase:
+    purchased_at = PurchasedProduct.first_purchase_date(request.user.pk, product.pk)
+    if purchased_at is None:
         return JsonResponse({"success": False, "error": "Kamu hanya dapat review produk yang pernah dibeli."}, status=403)
 
     # Cek sudah review
@@ -151,6 +160,7 @@ def add_review(request, product_id):
         user=request.user,
         rating=rating,
         body=comment,
+        purchased_at=purchased_at,
     )
 
     return JsonResponse({
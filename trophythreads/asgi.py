@@ -5,6 +5,10 @@ It exposes the ASGI callable as a module-level variable named ``application``.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
+
+Stream SSE (forumApp comment_stream) hanya berjalan di server ASGI, mis.
+``gunicorn trophythreads.asgi:application -k uvicorn.workers.UvicornWorker``.
+Di bawah WSGI endpoint stream menjawab 501 dan halaman thread kembali ke polling.
 """
 
 import os
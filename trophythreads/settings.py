@@ -13,6 +13,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 from pathlib import Path
 import os
 from dotenv import load_dotenv
+from corsheaders.defaults import default_headers
 # Load environment variables from .env file
 load_dotenv()
 
@@ -57,7 +58,11 @@ INSTALLED_APPS = [
     'corsheaders'
 ]
 
+# Instrumentasi query/latency per URL (lihat main/request_metrics.py), nonaktif kecuali di-set
+REQUEST_METRICS_ENABLED = os.getenv('REQUEST_METRICS_ENABLED', 'False').lower() == 'true'
+
 MIDDLEWARE = [
+    'main.request_metrics.RequestMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -72,6 +77,8 @@ MIDDLEWARE = [
 # CORS Flags
 CORS_ALLOW_ALL_ORIGINS = True
 CORS_ALLOW_CREDENTIALS = True
+CORS_ALLOW_HEADERS = (*default_headers, 'idempotency-key')
+CORS_EXPOSE_HEADERS = ['X-Next-Cursor', 'X-Latest-Cursor', 'X-Total-Count', 'Idempotent-Replayed', 'Server-Timing']
 CSRF_COOKIE_SECURE = True
 SESSION_COOKIE_SECURE = True
 CSRF_COOKIE_SAMESITE = 'None'